@@ -0,0 +1,230 @@
+"""
+The benchmark cases, graded by size.
+
+Each case builds its problem when run, so that only the measured case is
+loaded in the process running it.
+"""
+from __future__ import absolute_import
+
+import collections
+import glob
+import os.path
+
+from simplesat.constraints import InstallRequirement
+from simplesat.dependency_solver import DependencySolver
+from simplesat.errors import SatisfiabilityError, SolverException
+from simplesat.examples.van_der_waerden import van_der_waerden
+from simplesat.pool import Pool
+from simplesat.repository import Repository
+from simplesat.request import Request
+from simplesat.sat import MiniSATSolver, SolverStats
+from simplesat.synthetic import SyntheticIndex
+from simplesat.test_utils import Scenario
+from simplesat.utils import timed_context
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS_DIRECTORY = os.path.join(
+    HERE, os.pardir, "simplesat", "tests")
+
+GRADES = ("small", "medium", "large")
+
+
+class CaseSkipped(Exception):
+    """ Raised by a case which cannot run, e.g. because its input cannot be
+    read.
+    """
+
+
+class Case(object):
+    """ A benchmark case.
+
+    Parameters
+    ----------
+    name : str
+        The unique name of the case.
+    grade : str
+        One of "small", "medium" and "large".
+    """
+
+    def __init__(self, name, grade):
+        self.name = name
+        self.grade = grade
+
+    def run(self):
+        """ Solve the problem once and return a dict of measurements. """
+        raise NotImplementedError()
+
+
+def _search_measurements(stats):
+    return {
+        "conflicts": stats.conflicts,
+        "decisions": stats.decisions,
+        "propagations": stats.propagations,
+        "policy_time": stats.policy_time,
+    }
+
+
+class DependencyCase(Case):
+    """ Solve a request with a :class:`DependencySolver`. """
+
+    def setup(self):
+        """ Return the remote repositories, installed repository and request
+        to solve.
+        """
+        raise NotImplementedError()
+
+    def run(self):
+        with timed_context("Load") as load_time:
+            remote_repositories, installed_repository, request = self.setup()
+            pool = Pool(remote_repositories)
+            pool.add_repository(installed_repository)
+        solver = DependencySolver(
+            pool, remote_repositories, installed_repository,
+            collect_stats=True)
+
+        with timed_context("Total") as total_time:
+            try:
+                transaction = solver.solve(request)
+            except SatisfiabilityError as e:
+                status = "unsatisfiable"
+                stats = e.stats
+            except SolverException as e:
+                status = e.__class__.__name__
+                stats = None
+            else:
+                status = "ok"
+                stats = transaction.stats
+
+        measurements = {
+            "status": status,
+            "load_time": load_time.elapsed,
+            "total_time": total_time.elapsed,
+        }
+        measurements.update(solver._timings())
+        if stats is not None:
+            measurements.update(_search_measurements(stats))
+        return measurements
+
+
+class SyntheticCase(DependencyCase):
+    """ Install some of the least popular packages of a
+    :class:`SyntheticIndex`.
+
+    Parameters
+    ----------
+    name, grade : str
+        See :class:`Case`.
+    n_requirements : int, optional
+        The number of packages to install.
+    older : bool, optional
+        If True, install builds older than the latest.
+    **index_parameters
+        The parameters of the :class:`SyntheticIndex`.
+    """
+
+    def __init__(self, name, grade, n_requirements=3, older=False,
+                 **index_parameters):
+        super(SyntheticCase, self).__init__(name, grade)
+        self.n_requirements = n_requirements
+        self.older = older
+        self.index_parameters = index_parameters
+
+    def setup(self):
+        index = SyntheticIndex(**self.index_parameters)
+        request = Request()
+        for requirement in index.requirement_strings(
+                self.n_requirements, older=self.older):
+            request.install(InstallRequirement._from_string(requirement))
+        return [index.repository()], Repository(), request
+
+
+class ScenarioCase(DependencyCase):
+    """ Solve the request of a YAML scenario. """
+
+    def __init__(self, name, grade, path):
+        super(ScenarioCase, self).__init__(name, grade)
+        self.path = path
+
+    def setup(self):
+        # Some scenario files use syntax which Scenario cannot read.
+        try:
+            scenario = Scenario.from_yaml(self.path)
+        except ValueError as e:
+            raise CaseSkipped(str(e))
+        return (scenario.remote_repositories, scenario.installed_repository,
+                scenario.request)
+
+
+class VanDerWaerdenCase(Case):
+    """ Solve a van der Waerden problem with the bare SAT solver. """
+
+    def __init__(self, name, grade, j, k, n):
+        super(VanDerWaerdenCase, self).__init__(name, grade)
+        self.j = j
+        self.k = k
+        self.n = n
+
+    def run(self):
+        stats = SolverStats()
+        with timed_context("Total") as total_time:
+            with timed_context("Solver Init") as init_time:
+                solver = MiniSATSolver(stats=stats)
+                for clause in van_der_waerden(self.j, self.k, self.n):
+                    solver.add_clause(clause)
+                solver._setup_assignments()
+            with timed_context("SAT Solve") as solve_time:
+                try:
+                    solver.search()
+                except SatisfiabilityError:
+                    status = "unsatisfiable"
+                else:
+                    status = "ok"
+
+        measurements = {
+            "status": status,
+            "total_time": total_time.elapsed,
+            "solver_init_time": init_time.elapsed,
+            "solve_time": solve_time.elapsed,
+        }
+        measurements.update(_search_measurements(stats))
+        return measurements
+
+
+# Scenarios which take much longer than the others.
+_LARGE_SCENARIOS = ("slow_bokeh_blaze",)
+
+
+def _scenario_cases():
+    paths = glob.glob(os.path.join(SCENARIOS_DIRECTORY, "*.yaml"))
+    for path in sorted(paths):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        grade = "large" if stem in _LARGE_SCENARIOS else "small"
+        yield ScenarioCase("scenario-" + stem, grade, path)
+
+
+def _all_cases():
+    cases = [
+        SyntheticCase(
+            "synthetic-small", "small", n_requirements=10, n_names=1000,
+            builds_per_name=5),
+        SyntheticCase(
+            "synthetic-medium", "medium", n_requirements=20, n_names=20000,
+            builds_per_name=5, mean_dependencies=4),
+        SyntheticCase(
+            "synthetic-large", "large", n_requirements=30, n_names=100000,
+            builds_per_name=5, mean_dependencies=4),
+        SyntheticCase(
+            "synthetic-pinned", "medium", n_requirements=5, older=True,
+            n_names=5000, builds_per_name=8, mean_dependencies=4,
+            pin_probability=0.5, conflict_probability=0.1),
+        VanDerWaerdenCase("vdw-3-5-22", "small", 3, 5, 22),
+        VanDerWaerdenCase("vdw-4-4-34", "small", 4, 4, 34),
+        VanDerWaerdenCase("vdw-3-6-32", "medium", 3, 6, 32),
+        VanDerWaerdenCase("vdw-4-4-35", "medium", 4, 4, 35),
+    ]
+    cases.extend(_scenario_cases())
+    return collections.OrderedDict((case.name, case) for case in cases)
+
+
+CASES = _all_cases()
@@ -0,0 +1,213 @@
+"""
+Run the solver benchmarks, and compare them with a baseline.
+
+Examples::
+
+    # Run the small cases and store the results as the baseline.
+    python benchmarks/run.py --grade small --output baseline.json
+
+    # Later, compare a new run with it.
+    python benchmarks/run.py --grade small --baseline baseline.json
+
+Each case runs in its own process, so that its peak memory can be measured.
+With --baseline, the exit status is 1 if any measurement regressed by more
+than the threshold.
+"""
+from __future__ import absolute_import, print_function
+
+import argparse
+import collections
+import fnmatch
+import json
+import math
+import multiprocessing
+import platform
+import sys
+import traceback
+
+from cases import CASES, GRADES, CaseSkipped
+
+
+# Measurements compared with the baseline. Lower is better for all of them.
+COMPARED = (
+    "rules_time", "solver_init_time", "solve_time", "total_time",
+    "conflicts", "peak_memory_kb",
+)
+
+# Differences in times below this many seconds are considered noise.
+MIN_TIME_DELTA = 0.01
+
+
+def _peak_memory_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # Reported in bytes rather than kilobytes.
+        peak //= 1024
+    return peak
+
+
+def run_case(name, repeat=1):
+    """ Run a case `repeat` times, and return the measurements of the fastest
+    run.
+    """
+    case = CASES[name]
+    try:
+        runs = [case.run() for _ in range(repeat)]
+    except CaseSkipped as e:
+        return {"status": "skipped", "error": str(e)}
+    except Exception:
+        return {"status": "error", "error": traceback.format_exc()}
+    fastest = min(runs, key=lambda run: run["total_time"])
+    # Phases which did not run have a NaN time, which is not valid JSON.
+    measurements = dict(
+        (key, value if _finite(value) else None)
+        for key, value in fastest.items())
+    measurements["peak_memory_kb"] = _peak_memory_kb()
+    return measurements
+
+
+def _run_isolated(name, repeat):
+    pool = multiprocessing.Pool(processes=1)
+    try:
+        return pool.apply(run_case, (name, repeat))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def select_cases(grades, patterns):
+    names = []
+    for name, case in CASES.items():
+        if case.grade not in grades:
+            continue
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        names.append(name)
+    return names
+
+
+def _finite(value):
+    return value is not None and not (
+        isinstance(value, float) and math.isnan(value))
+
+
+def compare(results, baseline, threshold):
+    """ Return the regressions of `results` with respect to `baseline`, as
+    (case, measurement, baseline value, new value) tuples.
+    """
+    regressions = []
+    for name, measurements in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if measurements["status"] != reference["status"]:
+            regressions.append(
+                (name, "status", reference["status"],
+                 measurements["status"]))
+            continue
+        for key in COMPARED:
+            old = reference.get(key)
+            new = measurements.get(key)
+            if not (_finite(old) and _finite(new)):
+                continue
+            if key.endswith("_time") and new - old < MIN_TIME_DELTA:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append((name, key, old, new))
+    return regressions
+
+
+def _format(value):
+    if isinstance(value, float):
+        return "{:.4f}".format(value)
+    return str(value)
+
+
+def print_results(results, stream=sys.stdout):
+    columns = ("status", "rules_time", "solver_init_time", "solve_time",
+               "conflicts", "peak_memory_kb")
+    width = max([len(name) for name in results] + [4])
+    header = "{:{width}}  ".format("case", width=width) + "  ".join(
+        "{:>16}".format(column) for column in columns)
+    print(header, file=stream)
+    for name, measurements in results.items():
+        print("{:{width}}  ".format(name, width=width) + "  ".join(
+            "{:>16}".format(_format(measurements.get(column, "")))
+            for column in columns), file=stream)
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("-g", "--grade", action="append", choices=GRADES,
+                   help="Run the cases of this grade (may be repeated). "
+                        "Defaults to small and medium.")
+    p.add_argument("-k", dest="patterns", action="append", metavar="GLOB",
+                   help="Only run the cases whose name matches GLOB.")
+    p.add_argument("--list", action="store_true",
+                   help="List the selected cases and exit.")
+    p.add_argument("-r", "--repeat", type=int, default=1,
+                   help="Run each case this many times, keeping the fastest.")
+    p.add_argument("-o", "--output", metavar="FILE",
+                   help="Write the results as JSON to FILE.")
+    p.add_argument("-b", "--baseline", metavar="FILE",
+                   help="Compare the results with those stored in FILE.")
+    p.add_argument("-t", "--threshold", type=float, default=0.2,
+                   help="Relative increase over the baseline considered a "
+                        "regression (default: 0.2).")
+    p.add_argument("--no-isolate", dest="isolate", action="store_false",
+                   help="Run the cases in this process. Peak memory is then "
+                        "not measured per case.")
+
+    ns = p.parse_args(argv)
+
+    names = select_cases(ns.grade or ("small", "medium"), ns.patterns)
+    if ns.list:
+        for name in names:
+            print("{:8} {}".format(CASES[name].grade, name))
+        return 0
+
+    results = {}
+    for name in names:
+        if ns.isolate:
+            measurements = _run_isolated(name, ns.repeat)
+        else:
+            measurements = run_case(name, ns.repeat)
+            measurements["peak_memory_kb"] = None
+        if measurements["status"] in ("error", "skipped"):
+            last_line = measurements["error"].strip().splitlines()[-1]
+            print("{}: {}".format(name, last_line), file=sys.stderr)
+        results[name] = measurements
+
+    print_results(collections.OrderedDict(
+        (name, results[name]) for name in names))
+
+    if ns.output:
+        with open(ns.output, "w") as fp:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, fp, indent=2, sort_keys=True)
+
+    if ns.baseline:
+        with open(ns.baseline) as fp:
+            baseline = json.load(fp)["results"]
+        regressions = compare(results, baseline, ns.threshold)
+        if regressions:
+            print("\nRegressions:", file=sys.stderr)
+            for name, key, old, new in regressions:
+                print("  {}: {} {} -> {}".format(
+                    name, key, _format(old), _format(new)), file=sys.stderr)
+            return 1
+        print("\nNo regressions.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
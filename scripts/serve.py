@@ -0,0 +1,36 @@
+from __future__ import print_function
+
+import argparse
+import sys
+
+from simplesat.service import SolverService
+from simplesat.test_utils import Scenario
+
+
+def main(argv=None):
+    argv = argv or sys.argv[1:]
+
+    p = argparse.ArgumentParser(
+        description="Answer JSON-lines requests against the packages of a "
+                    "scenario, on stdin/stdout or on a Unix socket.")
+    p.add_argument("scenario", help="Path to the YAML scenario file.")
+    p.add_argument("--socket", metavar="PATH",
+                   help="Listen on the Unix socket at PATH instead of stdin.")
+    p.add_argument("--no-prune", dest="prune", action="store_false")
+    p.add_argument("--strict", action="store_true",
+                   help="Use stricter error checking for package metadata.")
+
+    ns = p.parse_args(argv)
+
+    scenario = Scenario.from_yaml(ns.scenario)
+    service = SolverService.from_scenario(
+        scenario, use_pruning=ns.prune, strict=ns.strict)
+
+    if ns.socket:
+        service.serve_unix_socket(ns.socket)
+    else:
+        service.serve(sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,49 @@
 from __future__ import print_function
 
 import argparse
+import cProfile
 import logging
+import pstats
 import sys
 
 from simplesat.dependency_solver import DependencySolver
 from simplesat.pool import Pool
-from simplesat.sat.policy import InstalledFirstPolicy
 from simplesat.test_utils import Scenario
 from simplesat.errors import SatisfiabilityError
+from simplesat.utils.profiling import StackSampler, summarize_pstats
+
+
+COLLAPSED_EXTENSIONS = (".collapsed", ".folded")
 
 
 def solve_and_print(request, remote_repositories, installed_repository,
-                    print_ids, prune=True, prefer_installed=True, debug=0,
-                    simple=False, strict=False):
+                    print_ids, prune=True, debug=0, simple=False,
+                    strict=False, profile=None, profile_out=None,
+                    profile_top=20):
     pool = Pool(remote_repositories)
     pool.add_repository(installed_repository)
 
-    policy = InstalledFirstPolicy(pool, installed_repository,
-                                  prefer_installed=prefer_installed)
     solver = DependencySolver(
         pool, remote_repositories, installed_repository,
-        policy=policy, use_pruning=prune, strict=strict)
+        use_pruning=prune, strict=strict, log_policy=bool(debug))
+
+    if profile == "cprofile":
+        profiler = cProfile.Profile()
+    elif profile == "sample":
+        profiler = StackSampler()
+    else:
+        profiler = None
 
     fmt = "ELAPSED : {description:20} : {elapsed:e}"
     try:
-        transaction = solver.solve(request)
+        if profiler is None:
+            transaction = solver.solve(request)
+        else:
+            profiler.enable()
+            try:
+                transaction = solver.solve(request)
+            finally:
+                profiler.disable()
         if simple:
             print(transaction.to_simple_string())
         else:
@@ -35,15 +53,32 @@ def solve_and_print(request, remote_repositories, installed_repository,
         print(msg.format(e.unsat.to_string(pool)))
         print(e.unsat._find_requirement_time.pretty(fmt), file=sys.stderr)
 
-    if debug:
-        counts, hist = solver._policy._log_histogram()
+    if debug and solver._last_policy is not None:
+        counts, hist = solver._last_policy._log_histogram()
         print(hist, file=sys.stderr)
-        report = solver._policy._log_report(with_assignments=debug > 1)
+        report = solver._last_policy._log_report(with_assignments=debug > 1)
         print(report, file=sys.stderr)
     print(solver._last_rules_time.pretty(fmt), file=sys.stderr)
     print(solver._last_solver_init_time.pretty(fmt), file=sys.stderr)
     print(solver._last_solve_time.pretty(fmt), file=sys.stderr)
 
+    if profiler is not None:
+        write_profile(profile, profiler, profile_out, profile_top)
+
+
+def write_profile(profile, profiler, profile_out, profile_top):
+    if profile == "cprofile":
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        if profile_out is not None:
+            stats.dump_stats(profile_out)
+        summary = summarize_pstats(stats, top=profile_top)
+    else:
+        if profile_out is not None:
+            with open(profile_out, "w") as fp:
+                profiler.write_collapsed(fp)
+        summary = profiler.summary(top=profile_top)
+    print(summary, file=sys.stderr)
+
 
 def main(argv=None):
     argv = argv or sys.argv[1:]
@@ -52,16 +87,33 @@ def main(argv=None):
     p.add_argument("scenario", help="Path to the YAML scenario file.")
     p.add_argument("--print-ids", action="store_true")
     p.add_argument("--no-prune", dest="prune", action="store_false")
-    p.add_argument("--no-prefer-installed", dest="prefer_installed",
-                   action="store_false")
     p.add_argument("-d", "--debug", default=0, action="count")
     p.add_argument("--simple", action="store_true",
                    help="Show a simpler description of the transaction.")
     p.add_argument("--strict", action="store_true",
                    help="Use stricter error checking for package metadata.")
+    p.add_argument("--profile", nargs="?", const="cprofile",
+                   choices=("cprofile", "sample"),
+                   help="Profile the solve with cProfile (the default) or a "
+                        "stack sampler, and print the hot functions grouped "
+                        "by subsystem.")
+    p.add_argument("--profile-out", metavar="PATH",
+                   help="Write the profile to PATH: pstats for cProfile, or "
+                        "collapsed stacks for flamegraph tools when sampling."
+                        " Implies --profile, sampling if PATH ends with "
+                        ".collapsed or .folded.")
+    p.add_argument("--profile-top", type=int, default=20, metavar="N",
+                   help="The number of hot functions to print.")
 
     ns = p.parse_args(argv)
 
+    profile = ns.profile
+    if profile is None and ns.profile_out is not None:
+        if ns.profile_out.endswith(COLLAPSED_EXTENSIONS):
+            profile = "sample"
+        else:
+            profile = "cprofile"
+
     logging.basicConfig(
         format=('%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s]'
                 ' %(message)s'),
@@ -71,8 +123,9 @@ def main(argv=None):
     scenario = Scenario.from_yaml(ns.scenario)
     solve_and_print(scenario.request, scenario.remote_repositories,
                     scenario.installed_repository, ns.print_ids,
-                    prune=ns.prune, prefer_installed=ns.prefer_installed,
-                    debug=ns.debug, simple=ns.simple, strict=ns.strict)
+                    prune=ns.prune, debug=ns.debug, simple=ns.simple,
+                    strict=ns.strict, profile=profile,
+                    profile_out=ns.profile_out, profile_top=ns.profile_top)
 
 
 if __name__ == '__main__':
@@ -4,7 +4,7 @@ import six
 
 from simplesat import InstallRequirement, Pool
 from simplesat.utils.graph import (package_lit_dependency_graph,
-                                   transitive_neighbors)
+                                   reachable_nodes)
 
 
 def compute_dependencies(repositories, requirement, transitive=False):
@@ -24,10 +24,16 @@ def compute_dependencies(repositories, requirement, transitive=False):
     dependencies : set
         Set of packages in the given repositories that any packages satisfying
         the given requirement depend on.
+
+    Note
+    ----
+    Dependencies are computed lazily, so only the packages reachable from
+    `requirement` are ever looked at.
     """
     pool = Pool(repositories)
-    neighbors = _neighbors_in_repositories(pool, transitive)
-    dependencies = _neighbors_for_requirement(pool, neighbors, requirement)
+    neighbors = _LazyNeighbors(pool)
+    dependencies = _neighbors_for_requirement(pool, neighbors, requirement,
+                                              transitive)
     return dependencies
 
 
@@ -50,9 +56,9 @@ def compute_reverse_dependencies(repositories, requirement, transitive=False):
         packages satisfying the given requirement.
     """
     pool = Pool(repositories)
-    reverse_neighbors = _reverse_neighbors_in_repositories(pool, transitive)
+    reverse_neighbors = _reverse_neighbors_in_repositories(pool)
     dependencies = _neighbors_for_requirement(pool, reverse_neighbors,
-                                              requirement)
+                                              requirement, transitive)
     return dependencies
 
 
@@ -84,16 +90,13 @@ def compute_leaf_packages(repositories):
     return leaf_packages
 
 
-def _neighbors_in_repositories(pool, transitive=False):
+def _neighbors_in_repositories(pool):
     """ Compute neighboring packages for all packages in a pool of
     repositories.
 
     Parameters
     ----------------
     pool: Pool
-    transitive : bool
-        If True, recursively walk up the dependency graph. If False (default),
-        only returns the packages on which the package directly depends.
 
     Returns
     -----------
@@ -101,42 +104,48 @@ def _neighbors_in_repositories(pool, transitive=False):
          dict of all packages mapped to their neighbors.
     """
     package_ids = set(pool.iter_package_ids())
-    neighbors = _compute_dependency_dict(pool, package_ids, transitive)
+    neighbors = _compute_dependency_dict(pool, package_ids)
     return neighbors
 
 
-def _reverse_neighbors_in_repositories(pool, transitive=False):
+def _reverse_neighbors_in_repositories(pool):
     """ Compute Reverse mapping of packages in a pool of repositories such that
     package ids point to the packages which depend on them.
 
     Parameters
     ----------------
     pool: Pool
-    transitive : bool
-        If True, recursively walk up the dependency graph. If False (default),
-        only returns the packages on which the package directly depends.
 
     Returns
     -----------
     reverse_neighbors : dict
          dict of all packages mapped to packages that depend on them.
     """
-    neighbors = _neighbors_in_repositories(pool, transitive)
+    neighbors = _neighbors_in_repositories(pool)
     reverse_neighbors = _reverse_mapping(neighbors)
     return reverse_neighbors
 
 
-def _compute_dependency_dict(pool, package_ids, transitive=False):
-    """ Return mapping of package ids to their dependent package ids.
-
-    If transitive is False, a package id will point to only its immediate
-    dependencies. Otherwise, the mapping will include all recursive
+def _compute_dependency_dict(pool, package_ids):
+    """ Return mapping of package ids to the ids of their immediate
     dependencies.
     """
-    graph = package_lit_dependency_graph(pool, package_ids, closed=False)
-    if transitive:
-        return transitive_neighbors(graph)
-    return graph
+    return package_lit_dependency_graph(pool, package_ids, closed=False)
+
+
+class _LazyNeighbors(dict):
+    """ Mapping of package ids to the ids of their direct dependencies, which
+    are only computed the first time a package id is looked up. """
+
+    def __init__(self, pool):
+        super(_LazyNeighbors, self).__init__()
+        self._pool = pool
+
+    def __missing__(self, package_id):
+        graph = package_lit_dependency_graph(
+            self._pool, (package_id,), closed=False)
+        neighbors = self[package_id] = graph[package_id]
+        return neighbors
 
 
 def _reverse_mapping(mapping):
@@ -148,7 +157,8 @@ def _reverse_mapping(mapping):
     return reversed_map
 
 
-def _neighbors_for_requirement(pool, neighbor_mapping, requirement):
+def _neighbors_for_requirement(pool, neighbor_mapping, requirement,
+                               transitive=False):
     """ Compute neighboring packages for all packages satisfying `requirement`
 
     Parameters
@@ -161,6 +171,9 @@ def _neighbors_for_requirement(pool, neighbor_mapping, requirement):
     requirement : Requirement
         The package requirement for which to look up neighbors. All packages
         which satisfy the requirement will be used.
+    transitive : bool
+        If True, also include the neighbors of neighbors, recursively. Only
+        the part of `neighbor_mapping` reachable from `requirement` is used.
 
     Returns
     -----------
@@ -168,12 +181,16 @@ def _neighbors_for_requirement(pool, neighbor_mapping, requirement):
          Set of packages in the pool that are neighbors of packages which
          satisfy `requirement`.
     """
-    neighbors = set()
-    for package_id in _package_ids_satisfying_requirement(pool, requirement):
-        neighbor_ids = neighbor_mapping[package_id]
-        neighbors.update(pool.id_to_package(d_id) for d_id in neighbor_ids)
-
-    return neighbors
+    package_ids = _package_ids_satisfying_requirement(pool, requirement)
+    if transitive:
+        neighbor_ids = reachable_nodes(package_ids,
+                                       neighbor_mapping.__getitem__)
+    else:
+        neighbor_ids = set()
+        for package_id in package_ids:
+            neighbor_ids.update(neighbor_mapping[package_id])
+
+    return set(pool.id_to_package(d_id) for d_id in neighbor_ids)
 
 
 def _package_ids_satisfying_requirement(pool, requirement):
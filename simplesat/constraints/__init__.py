@@ -3,5 +3,5 @@ from .requirement import (
     Requirement, ConflictRequirement, InstallRequirement
 )
 from .constraint_modifiers import (
-    ConstraintModifiers, modify_requirement,
+    ConstraintModifiers, FrozenConstraintModifiers, modify_requirement,
 )
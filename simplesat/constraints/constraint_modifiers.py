@@ -77,8 +77,17 @@ def as_set(container):
     return set(container)
 
 
+def as_frozenset(container):
+    """ Return a frozenset from an iterable, being careful not to disassemble
+    strings.
+    """
+    return frozenset(as_set(container))
+
+
 _coerced_set = dict(default=(), convert=as_set,
                     validator=instance_of(set))
+_coerced_frozenset = dict(default=(), convert=as_frozenset,
+                          validator=instance_of(frozenset))
 
 
 @attributes
@@ -116,6 +125,39 @@ class ConstraintModifiers(object):
     def targets(self):
         return set.union(self.allow_newer, self.allow_any, self.allow_older)
 
+    def freeze(self):
+        """ Return a :class:`FrozenConstraintModifiers` snapshot of these
+        modifiers.
+        """
+        return FrozenConstraintModifiers(
+            allow_newer=self.allow_newer,
+            allow_any=self.allow_any,
+            allow_older=self.allow_older,
+        )
+
+
+@attributes(frozen=True)
+class FrozenConstraintModifiers(object):
+    """ An immutable and hashable copy of :class:`ConstraintModifiers`.
+
+    Requirements modified by the same frozen modifiers are only computed once
+    by :func:`modify_requirement`.
+    """
+    allow_newer = attr(**_coerced_frozenset)
+    allow_any = attr(**_coerced_frozenset)
+    allow_older = attr(**_coerced_frozenset)
+
+    def asdict(self):
+        return {k: sorted(v) for k, v in six.iteritems(asdict(self))}
+
+    @property
+    def targets(self):
+        return frozenset.union(
+            self.allow_newer, self.allow_any, self.allow_older)
+
+    def freeze(self):
+        return self
+
 
 def _modify_install_requirement(requirement, modifiers):
     """If any of the modifier rules apply, return a new Requirement with
@@ -151,7 +193,53 @@ def _modify_constraints(constraints, type_map):
     )
 
 
+# The requirements returned by modify_requirement, keyed on the class of the
+# requirement, the requirement and the frozen modifiers.
+_MODIFIED_REQUIREMENTS = {}
+_MAX_MODIFIED_REQUIREMENTS = 2 ** 16
+
+
 def modify_requirement(requirement, modifiers):
+    """ Return `requirement` with its constraints relaxed by `modifiers`.
+
+    Parameters
+    ----------
+    requirement : Requirement
+        The requirement to modify.
+    modifiers : ConstraintModifiers or FrozenConstraintModifiers
+        The modifiers to apply. Pass a frozen snapshot when modifying many
+        requirements, so that it is not frozen again for each of them.
+
+    Returns
+    -------
+    Requirement
+        The modified requirement, or `requirement` itself if no modifier
+        applies to it.
+
+    Raises
+    ------
+    NotImplementedError
+        If a modifier would change the constraints of a requirement other
+        than an :class:`InstallRequirement`.
+    """
+    modifiers = modifiers.freeze()
+    name = requirement.name
+    if not (name in modifiers.allow_newer or name in modifiers.allow_any or
+            name in modifiers.allow_older):
+        return requirement
+
+    key = (requirement.__class__, requirement, modifiers)
+    try:
+        return _MODIFIED_REQUIREMENTS[key]
+    except KeyError:
+        modified = _modify_requirement(requirement, modifiers)
+        if len(_MODIFIED_REQUIREMENTS) >= _MAX_MODIFIED_REQUIREMENTS:
+            _MODIFIED_REQUIREMENTS.clear()
+        _MODIFIED_REQUIREMENTS[key] = modified
+        return modified
+
+
+def _modify_requirement(requirement, modifiers):
     if isinstance(requirement, InstallRequirement):
         return _modify_install_requirement(requirement, modifiers)
     elif requirement.has_any_version_constraint:
@@ -1,12 +1,146 @@
 from okonomiyaki.versions import EnpkgVersion
 
+from .kinds import Any, EnpkgUpstreamMatch, Equal, GEQ, GT, LEQ, LT, Not
 from .parser import _RawConstraintsParser
 
 
+class _Interval(object):
+    """ The versions accepted by a conjunction of constraints, normalized into
+    a lower and an upper bound, a set of excluded versions and an upstream
+    version to match.
+
+    Constraints of other kinds are kept in ``others`` and checked one by one.
+
+    Parameters
+    ----------
+    constraints : iterable of IConstraint
+        The constraints to compile.
+
+    Raises
+    ------
+    TypeError
+        If the versions of the constraints cannot be compared.
+    """
+
+    def __init__(self, constraints):
+        self.lower = self.upper = None
+        self.lower_inclusive = self.upper_inclusive = True
+        self.excluded = set()
+        self.upstream = None
+        self.others = []
+        self.is_empty = False
+        # The only version within the bounds, if any.
+        self.pinned = None
+
+        for constraint in constraints:
+            self._add(constraint)
+        self._normalize()
+
+    def _add(self, constraint):
+        kind = type(constraint)
+        if kind is Any:
+            pass
+        elif kind is GEQ:
+            self._tighten_lower(constraint.version, True)
+        elif kind is GT:
+            self._tighten_lower(constraint.version, False)
+        elif kind is LEQ:
+            self._tighten_upper(constraint.version, True)
+        elif kind is LT:
+            self._tighten_upper(constraint.version, False)
+        elif kind is Equal:
+            self._tighten_lower(constraint.version, True)
+            self._tighten_upper(constraint.version, True)
+        elif kind is Not:
+            self.excluded.add(constraint.version)
+        elif kind is EnpkgUpstreamMatch:
+            upstream = constraint.version.upstream
+            if self.upstream is None:
+                self.upstream = upstream
+            elif self.upstream != upstream:
+                self.is_empty = True
+        else:
+            self.others.append(constraint)
+
+    def _tighten_lower(self, version, inclusive):
+        if self.lower is None or version > self.lower:
+            self.lower, self.lower_inclusive = version, inclusive
+        elif version == self.lower:
+            self.lower_inclusive = self.lower_inclusive and inclusive
+
+    def _tighten_upper(self, version, inclusive):
+        if self.upper is None or version < self.upper:
+            self.upper, self.upper_inclusive = version, inclusive
+        elif version == self.upper:
+            self.upper_inclusive = self.upper_inclusive and inclusive
+
+    def _normalize(self):
+        lower, upper, upstream = self.lower, self.upper, self.upstream
+        if lower is not None and upper is not None:
+            if lower > upper or (lower == upper and not (
+                    self.lower_inclusive and self.upper_inclusive)):
+                self.is_empty = True
+        if upstream is not None:
+            # Versions are ordered by upstream first.
+            if isinstance(lower, EnpkgVersion) and lower.upstream > upstream:
+                self.is_empty = True
+            if isinstance(upper, EnpkgVersion) and upper.upstream < upstream:
+                self.is_empty = True
+        self.excluded = frozenset(
+            version for version in self.excluded
+            if self._matches_bounds(version))
+        if (lower is not None and upper is not None and lower == upper and
+                self.lower_inclusive and self.upper_inclusive):
+            self.pinned = lower
+            if lower in self.excluded:
+                self.is_empty = True
+
+    def _matches_bounds(self, candidate):
+        # Only ``<`` and ``>`` are used, as the other comparisons of
+        # EnpkgVersion are implemented with them.
+        lower, upper = self.lower, self.upper
+        if lower is not None:
+            if self.lower_inclusive:
+                if candidate < lower:
+                    return False
+            elif not candidate > lower:
+                return False
+        if upper is not None:
+            if self.upper_inclusive:
+                if candidate > upper:
+                    return False
+            elif not candidate < upper:
+                return False
+        if self.upstream is not None:
+            return candidate.upstream == self.upstream
+        return True
+
+    def matches(self, candidate):
+        if self.is_empty:
+            return False
+        if self.pinned is not None:
+            # Exclusions and the upstream version are checked when compiling.
+            if candidate != self.pinned:
+                return False
+        elif not self._matches_bounds(candidate):
+            return False
+        elif self.excluded and candidate in self.excluded:
+            return False
+        for constraint in self.others:
+            if not constraint.matches(candidate):
+                return False
+        return True
+
+
 class MultiConstraints(object):
     """
     A set of constraints to match a version against.
 
+    The constraints are compiled into an interval of versions the first time
+    they are matched, so that redundant constraints are checked once and
+    constraints which no version can satisfy are found up front, see
+    :attr:`is_empty`.
+
     Example
     -------
 
@@ -33,6 +167,27 @@ class MultiConstraints(object):
             self._constraints = tuple()
         else:
             self._constraints = tuple(constraints)
+        self._interval = None
+        self._hash = None
+
+    def _compile(self):
+        """ Return the :class:`_Interval` of the constraints. """
+        if self._interval is None:
+            try:
+                self._interval = _Interval(self._constraints)
+            except TypeError:
+                # Versions which cannot be compared to each other are left to
+                # the constraints themselves.
+                self._interval = _Interval(())
+                self._interval.others = list(self._constraints)
+        return self._interval
+
+    @property
+    def is_empty(self):
+        """ True if no version can match these constraints, e.g.
+        ``>= 1.3, < 1.2``.
+        """
+        return self._compile().is_empty
 
     def matches(self, version_candidate):
         """ Returns True if the given version matches this set of
@@ -44,10 +199,7 @@ class MultiConstraints(object):
             A comparable version instance. Must match the version class
             used for the set of requirements.
         """
-        for constraint in self._constraints:
-            if not constraint.matches(version_candidate):
-                return False
-        return True
+        return self._compile().matches(version_candidate)
 
     def __eq__(self, other):
         return (isinstance(other, self.__class__)
@@ -56,5 +208,13 @@ class MultiConstraints(object):
     def __ne__(self, other):
         return not (self == other)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Hashes of strings differ between processes.
+        state["_hash"] = None
+        return state
+
     def __hash__(self):
-        return hash(self._constraints)
+        if self._hash is None:
+            self._hash = hash(self._constraints)
+        return self._hash
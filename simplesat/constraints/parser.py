@@ -13,8 +13,7 @@ from simplesat.errors import InvalidConstraint
 # NOTE: The _DISTRIBUTION_R regex is based on PEP508. Additionally, we remove
 # the '-' because it breaks too many other things to do otherwise. We must also
 # permit a leading or trailling underscore because of names like
-# `_distribute_remove` re.Scanner seems to ignore (?i), so we have to write
-# case-insensitivity into the regex manually.
+# `_distribute_remove`.
 _DISTRIBUTION_NAME_R = r"(?!\.)(?:\.?\w+)+(?<!\.)"
 _DISTRIBUTION_R = "({})".format(_DISTRIBUTION_NAME_R)
 _VERSION_R = r"((?=\d){}(?:-\w+)?$)".format(_DISTRIBUTION_NAME_R)
@@ -28,206 +27,210 @@ _ENPKG_UPSTREAM_MATCH_R = r"\^="
 _ANY_R = r"\*"
 _WS_R = r" +"
 
-_CONSTRAINTS_SCANNER = re.Scanner([
-    (_VERSION_R, lambda scanner, token: VersionToken(token)),
-    (_EQUAL_R, lambda scanner, token: EqualToken(token)),
-    (_GEQ_R, lambda scanner, token: GEQToken(token)),
-    (_GT_R, lambda scanner, token: GTToken(token)),
-    (_LEQ_R, lambda scanner, token: LEQToken(token)),
-    (_LT_R, lambda scanner, token: LTToken(token)),
-    (_NOT_R, lambda scanner, token: NotToken(token)),
-    (_ENPKG_UPSTREAM_MATCH_R,
-        lambda scanner, token: EnpkgUpstreamMatchToken(token)),
-    (_ANY_R, lambda scanner, token: AnyToken(token)),
-    (_WS_R, lambda scanner, token: None),
-])
-
-_REQUIREMENTS_SCANNER = re.Scanner([
-    (_VERSION_R, lambda scanner, token: VersionToken(token)),
-    (_DISTRIBUTION_R, lambda scanner, token: DistributionNameToken(token)),
-    (_EQUAL_R, lambda scanner, token: EqualToken(token)),
-    (_GEQ_R, lambda scanner, token: GEQToken(token)),
-    (_GT_R, lambda scanner, token: GTToken(token)),
-    (_LEQ_R, lambda scanner, token: LEQToken(token)),
-    (_LT_R, lambda scanner, token: LTToken(token)),
-    (_NOT_R, lambda scanner, token: NotToken(token)),
-    (_ENPKG_UPSTREAM_MATCH_R,
-        lambda scanner, token: EnpkgUpstreamMatchToken(token)),
-    (_ANY_R, lambda scanner, token: AnyToken(token)),
-    (_WS_R, lambda scanner, token: None),
-])
-
-
-class Token(object):
-    kind = None
-
-    def __init__(self, value=None):
-        self.value = value
-
-
-class CommaToken(Token):
-    kind = "comma"
-
-
-class DistributionNameToken(Token):
-    kind = "distribution_name"
-
-
-class AnyToken(Token):
-    kind = "any"
-
-
-class VersionToken(Token):
-    kind = "version"
-
-
-class ComparisonToken(Token):
-    kind = "comparison"
-
-
-class LEQToken(ComparisonToken):
-    kind = "leq"
-
-
-class LTToken(ComparisonToken):
-    kind = "lt"
-
-
-class GEQToken(ComparisonToken):
-    kind = "geq"
-
-
-class GTToken(ComparisonToken):
-    kind = "gt"
-
-
-class EnpkgUpstreamMatchToken(ComparisonToken):
-    kind = "enpkg_upstream"
-
-
-class EqualToken(ComparisonToken):
-    kind = "equal"
-
-
-class NotToken(ComparisonToken):
-    kind = "not"
-
+# The characters removed by str.strip, which \s does not all match in ASCII
+# mode.
+_STRIPPED_R = "[{}]".format("".join(
+    re.escape(character)
+    for character in map(six.unichr, range(0x3001))
+    if character.isspace()))
+_COMMA_R = "{0}*,{0}*".format(_STRIPPED_R)
+
+# A version ends its comma separated part of the string.
+_VERSION_TOKEN_R = r"(?=\d){}(?:-\w+)?(?={}*(?:,|\Z))".format(
+    _DISTRIBUTION_NAME_R, _STRIPPED_R)
+
+
+def _token_regex(with_distribution_name):
+    # The alternatives are tried in order at each position of the string, so
+    # that e.g. '>=' is not scanned as '>' followed by '='.
+    alternatives = [("version", _VERSION_TOKEN_R)]
+    if with_distribution_name:
+        alternatives.append(("distribution_name", _DISTRIBUTION_NAME_R))
+    alternatives.extend([
+        ("comparison", "|".join((
+            _EQUAL_R, _GEQ_R, _GT_R, _LEQ_R, _LT_R, _NOT_R,
+            _ENPKG_UPSTREAM_MATCH_R))),
+        ("any", _ANY_R),
+        ("comma", _COMMA_R),
+        ("ws", _WS_R),
+    ])
+    # Names and versions are made of ASCII characters only.
+    return re.compile("|".join(
+        "(?P<{}>{})".format(name, regex) for name, regex in alternatives),
+        getattr(re, "ASCII", 0))
+
+
+_CONSTRAINTS_TOKEN_RC = _token_regex(with_distribution_name=False)
+_REQUIREMENTS_TOKEN_RC = _token_regex(with_distribution_name=True)
 
 _OPERATOR_TO_SPEC = {
-    EnpkgUpstreamMatchToken: EnpkgUpstreamMatch,
-    EqualToken: Equal,
-    GEQToken: GEQ,
-    GTToken: GT,
-    LEQToken: LEQ,
-    LTToken: LT,
-    NotToken: Not,
+    "^=": EnpkgUpstreamMatch,
+    "==": Equal,
+    ">=": GEQ,
+    ">": GT,
+    "<=": LEQ,
+    "<": LT,
+    "!=": Not,
 }
 
-
-def _spec_factory(comparison_token):
-    klass = _OPERATOR_TO_SPEC.get(comparison_token.__class__, None)
-    if klass is None:
-        msg = "Unsupported comparison token {0!r}".format(comparison_token)
-        raise InvalidConstraint(msg)
-    else:
-        return klass
-
-
-def _tokenize(scanner, requirement_string):
-    requirement_string = requirement_string.strip()
-
-    if len(requirement_string) == 0:
-        return [[AnyToken()]]
-    else:
-        tokens = []
-
-        for part in requirement_string.split(","):
-            scanned, remaining = scanner.scan(part.strip())
-            if len(remaining) > 0:
-                msg = "{0!r}"
-                for tok in scanned:
-                    if isinstance(tok, DistributionNameToken):
-                        msg += "(distribution name: {0!r})".format(tok.value)
-                    if isinstance(tok, VersionToken):
-                        msg += "(version: {0!r})".format(tok.value)
-                msg += "(unparsed {0!r})".format(remaining)
-                raise InvalidConstraint(msg.format(requirement_string))
-            elif len(scanned) > 0:
-                tokens.append(scanned)
-        return tokens
+# The number of strings whose parsing each parser remembers.
+_CACHE_SIZE = 2 ** 12
+
+
+class _LRUCache(object):
+    """ A mapping which only keeps its `maxsize` most recently used items.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+def _tokenize(token_rc, requirement_string):
+    """ Split the stripped `requirement_string` into blocks of tokens, one for
+    each comma separated part which is not empty.
+
+    The tokens are the matches of `token_rc`, whose ``lastgroup`` is the kind
+    of token.
+    """
+    match = token_rc.match
+    blocks = []
+    block = []
+    position = 0
+    end = len(requirement_string)
+    while position < end:
+        token = match(requirement_string, position)
+        if token is None:
+            _raise_unparsed(requirement_string, position, block)
+        kind = token.lastgroup
+        if kind == "comma":
+            if len(block) > 0:
+                blocks.append(block)
+                block = []
+        elif kind != "ws":
+            block.append(token)
+        position = token.end()
+    if len(block) > 0:
+        blocks.append(block)
+    return blocks
+
+
+def _raise_unparsed(requirement_string, position, block):
+    part_end = requirement_string.find(",", position)
+    if part_end < 0:
+        part_end = len(requirement_string)
+    remaining = requirement_string[position:part_end].rstrip()
+
+    msg = "{0!r}"
+    for token in block:
+        if token.lastgroup == "distribution_name":
+            msg += "(distribution name: {0!r})".format(token.group())
+        if token.lastgroup == "version":
+            msg += "(version: {0!r})".format(token.group())
+    msg += "(unparsed {0!r})".format(remaining)
+    raise InvalidConstraint(msg.format(requirement_string))
 
 
 def _operator_factory(operator, version, version_factory):
-    operator = _spec_factory(operator)
-    version = version_factory(version.value)
-    return operator(version)
+    klass = _OPERATOR_TO_SPEC.get(operator.group())
+    if klass is None:
+        msg = "Unsupported comparison token {0!r}".format(operator.group())
+        raise InvalidConstraint(msg)
+    return klass(version_factory(version.group()))
 
 
 class _RawConstraintsParser(object):
     """A simple parser for requirement strings."""
-    def __init__(self):
-        self._scanner = _CONSTRAINTS_SCANNER
+
+    _cache = _LRUCache(_CACHE_SIZE)
 
     def parse(self, requirement_string, version_factory):
-        def compute_constraint(requirement_block):
-            if len(requirement_block) == 2:
-                operator, version = requirement_block
-                return _operator_factory(operator, version, version_factory)
-            elif len(requirement_block) == 1:
-                assert isinstance(requirement_block[0], AnyToken)
-                return Any()
+        key = (requirement_string, version_factory)
+        constraints = self._cache.get(key)
+        if constraints is None:
+            constraints = self._parse(requirement_string, version_factory)
+            self._cache[key] = constraints
+        return constraints
+
+    def _parse(self, requirement_string, version_factory):
+        stripped = requirement_string.strip()
+        if len(stripped) == 0:
+            return (Any(),)
+
+        constraints = []
+        for block in _tokenize(_CONSTRAINTS_TOKEN_RC, stripped):
+            if len(block) == 2:
+                operator, version = block
+                constraints.append(
+                    _operator_factory(operator, version, version_factory))
+            elif len(block) == 1:
+                assert block[0].lastgroup == "any"
+                constraints.append(Any())
             else:
                 msg = "{0!r}".format(requirement_string)
                 raise InvalidConstraint(msg)
-
-        constraints = []
-        tokens_blocks = _tokenize(self._scanner, requirement_string)
-
-        for requirement_block in tokens_blocks:
-            constraints.append(compute_constraint(requirement_block))
-
         return tuple(constraints)
 
 
 class _RawRequirementParser(object):
     """A simple parser for requirement strings."""
-    def __init__(self):
-        self._scanner = _REQUIREMENTS_SCANNER
 
-    def parse(self, requirement_string, version_factory):
-        def compute_constraint(requirement_block):
-            msg = "{0!r}".format(requirement_string)
+    _cache = _LRUCache(_CACHE_SIZE)
 
-            if len(requirement_block) == 3:
-                distribution, operator, version = requirement_block
-                if not isinstance(distribution, DistributionNameToken):
+    def parse(self, requirement_string, version_factory):
+        key = (requirement_string, version_factory)
+        named_constraints = self._cache.get(key)
+        if named_constraints is None:
+            named_constraints = self._parse(
+                requirement_string, version_factory)
+            self._cache[key] = named_constraints
+        # The dictionary is returned to the caller, the cache keeps a copy.
+        return dict(named_constraints)
+
+    def _parse(self, requirement_string, version_factory):
+        stripped = requirement_string.strip()
+        if len(stripped) == 0:
+            return {None: (Any(),)}
+
+        msg = "{0!r}".format(requirement_string)
+        named_constraints = {}
+        for block in _tokenize(_REQUIREMENTS_TOKEN_RC, stripped):
+            if len(block) == 3:
+                distribution, operator, version = block
+                if distribution.lastgroup != "distribution_name":
                     raise InvalidConstraint(msg + ' (bad distribution name)')
-                if not isinstance(version, VersionToken):
+                if version.lastgroup != "version":
                     raise InvalidConstraint(msg + ' (bad version)')
-                name = distribution.value
-                op = _operator_factory(operator, version, version_factory)
-                return name, (op,)
-            elif len(requirement_block) == 2:
-                distribution, operator = requirement_block
-                name = distribution.value
-                if isinstance(operator, AnyToken):
-                    return name, (Any(),)
-                else:
+                constraint = _operator_factory(
+                    operator, version, version_factory)
+            elif len(block) == 2:
+                distribution, operator = block
+                if operator.lastgroup != "any":
                     raise InvalidConstraint(msg)
-            elif len(requirement_block) == 1:
-                name = requirement_block[0].value
-                return name, (Any(),)
+                constraint = Any()
+            elif len(block) == 1:
+                distribution, = block
+                constraint = Any()
             else:
                 raise InvalidConstraint(msg)
-
-        named_constraints = collections.defaultdict(list)
-        tokens_blocks = _tokenize(self._scanner, requirement_string)
-
-        for requirement_block in tokens_blocks:
-            name, constraint = compute_constraint(requirement_block)
-            named_constraints[name].extend(constraint)
-
-        return dict(
-            (name, tuple(constraints))
-            for name, constraints in six.iteritems(named_constraints)
-        )
+            name = distribution.group()
+            named_constraints[name] = (
+                named_constraints.get(name, ()) + (constraint,))
+        return named_constraints
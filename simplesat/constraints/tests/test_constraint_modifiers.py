@@ -1,6 +1,10 @@
 import unittest
 
-from ..constraint_modifiers import ConstraintModifiers
+import attr
+
+from ..constraint_modifiers import (
+    ConstraintModifiers, FrozenConstraintModifiers
+)
 
 
 class TestConstraintModifiers(unittest.TestCase):
@@ -68,3 +72,37 @@ class TestConstraintModifiers(unittest.TestCase):
 
         # Then
         self.assertEqual(modifiers.targets, set(('a', 'b', 'c', 'u', 'v')))
+
+    def test_freeze(self):
+        # Given
+        modifiers = ConstraintModifiers(allow_any='a',
+                                        allow_newer=('u', 'v'))
+
+        # When
+        frozen = modifiers.freeze()
+        modifiers.allow_older.add('x')
+
+        # Then
+        self.assertIsInstance(frozen, FrozenConstraintModifiers)
+        self.assertEqual(frozen.allow_any, frozenset(('a',)))
+        self.assertEqual(frozen.allow_newer, frozenset(('u', 'v')))
+        self.assertEqual(frozen.allow_older, frozenset())
+        self.assertEqual(frozen.targets, frozenset(('a', 'u', 'v')))
+        self.assertIs(frozen.freeze(), frozen)
+        self.assertEqual(
+            frozen.asdict(),
+            {'allow_any': ['a'], 'allow_newer': ['u', 'v'],
+             'allow_older': []})
+        with self.assertRaises(attr.exceptions.FrozenInstanceError):
+            frozen.allow_any = frozenset()
+
+    def test_frozen_hashing(self):
+        # Given
+        frozen1 = ConstraintModifiers(allow_newer=('u', 'v')).freeze()
+        frozen2 = FrozenConstraintModifiers(allow_newer=['v', 'u'])
+        frozen3 = FrozenConstraintModifiers(allow_older=['v', 'u'])
+
+        # Then
+        self.assertEqual(frozen1, frozen2)
+        self.assertEqual(hash(frozen1), hash(frozen2))
+        self.assertNotEqual(frozen1, frozen3)
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from okonomiyaki.versions import EnpkgVersion
@@ -220,3 +221,87 @@ class TestMultiConstraints(unittest.TestCase):
             self.assertEqual(
                 constraints1.matches(version), constraints2.matches(version)
             )
+
+    def test_redundant_constraints(self):
+        # Given
+        constraints = MultiConstraints([
+            GEQ(V("1.2-1")), Any(), GT(V("1.3-1")), GEQ(V("1.3-1")),
+            LT(V("2.0-1")), LEQ(V("2.0-1")), Not(V("3.0-1")),
+        ])
+
+        # When
+        interval = constraints._compile()
+
+        # Then
+        self.assertEqual(interval.lower, V("1.3-1"))
+        self.assertFalse(interval.lower_inclusive)
+        self.assertEqual(interval.upper, V("2.0-1"))
+        self.assertFalse(interval.upper_inclusive)
+        self.assertEqual(interval.excluded, frozenset())
+        self.assertFalse(constraints.is_empty)
+        self.assertFalse(constraints.matches(V("1.3-1")))
+        self.assertTrue(constraints.matches(V("1.3-2")))
+        self.assertFalse(constraints.matches(V("2.0-1")))
+
+    def test_upstream_and_exclusions(self):
+        # Given
+        constraints_string = "^= 1.3, != 1.3-2, >= 1.3-1"
+
+        # When
+        constraints = MultiConstraints._from_string(constraints_string)
+
+        # Then
+        self.assertFalse(constraints.is_empty)
+        self.assertFalse(constraints.matches(V("1.3-0")))
+        self.assertTrue(constraints.matches(V("1.3-1")))
+        self.assertFalse(constraints.matches(V("1.3-2")))
+        self.assertTrue(constraints.matches(V("1.3-3")))
+        self.assertFalse(constraints.matches(V("1.3.1-1")))
+
+    def test_is_empty(self):
+        # Given
+        constraints_strings = (
+            ">= 1.3, < 1.2",
+            "> 1.3-1, <= 1.3-1",
+            "== 1.3-1, != 1.3-1",
+            "== 1.3-1, == 1.3-2",
+            "^= 1.3, ^= 1.4",
+            "^= 1.3, >= 1.4",
+            "^= 1.3, < 1.2",
+            "^= 1.3, == 1.4-1",
+        )
+
+        for constraints_string in constraints_strings:
+            # When
+            constraints = MultiConstraints._from_string(constraints_string)
+
+            # Then
+            self.assertTrue(constraints.is_empty, constraints_string)
+            self.assertFalse(constraints.matches(V("1.3-1")))
+
+    def test_is_not_empty(self):
+        # Given
+        constraints_strings = (
+            "", "*", ">= 1.3, <= 1.3", "^= 1.3, < 1.3.1", "!= 1.3-1",
+            "^= 1.3, >= 1.3-5",
+        )
+
+        for constraints_string in constraints_strings:
+            # When
+            constraints = MultiConstraints._from_string(constraints_string)
+
+            # Then
+            self.assertFalse(constraints.is_empty, constraints_string)
+
+    def test_pickle(self):
+        # Given
+        constraints = MultiConstraints._from_string(">= 1.3, < 2.0")
+        hash(constraints)
+
+        # When
+        unpickled = pickle.loads(pickle.dumps(constraints))
+
+        # Then
+        self.assertEqual(unpickled, constraints)
+        self.assertIsNone(unpickled._hash)
+        self.assertEqual(hash(unpickled), hash(constraints))
@@ -7,7 +7,7 @@ from simplesat.constraints.kinds import (
     Any, EnpkgUpstreamMatch, Equal, GT, GEQ, LT, LEQ, Not
 )
 from simplesat.constraints.parser import (
-    _RawConstraintsParser, _RawRequirementParser
+    _LRUCache, _RawConstraintsParser, _RawRequirementParser
 )
 from simplesat.errors import SolverException
 
@@ -104,6 +104,30 @@ class Test_RawConstraintsParser(unittest.TestCase):
         with self.assertRaises(SolverException):
             self._parse(constraints_string)
 
+    def test_whitespace(self):
+        # Given
+        constraints_string = " >= 1.2.0-1\t,\n< 2.0 ,, * "
+        r_constraints = (GEQ(V("1.2.0-1")), LT(V("2.0")), Any())
+
+        # When
+        constraints = self._parse(constraints_string)
+
+        # Then
+        self.assertEqual(constraints, r_constraints)
+
+    def test_remembered(self):
+        # Given
+        constraints_string = ">= 1.2.0-1, != 1.3.0-1"
+
+        # When
+        constraints = self._parse(constraints_string)
+
+        # Then
+        self.assertIs(self._parse(constraints_string), constraints)
+        self.assertEqual(
+            self.parser.parse(constraints_string, EnpkgVersion.from_string),
+            constraints)
+
 
 class Test_RawRequirementParser(unittest.TestCase):
     def setUp(self):
@@ -209,3 +233,61 @@ class Test_RawRequirementParser(unittest.TestCase):
         # When/Then
         with self.assertRaises(SolverException):
             self._parse(requirement_string)
+
+    def test_invalid_messages(self):
+        # Given
+        messages = {
+            "numpy >= 1.8, scipy >= 0.14.0;":
+                "'numpy >= 1.8, scipy >= 0.14.0;'"
+                "(distribution name: 'scipy')(distribution name: '0.14.0')"
+                "(unparsed ';')",
+            "numpy == 1.8.1-1 ; mkl":
+                "'numpy == 1.8.1-1 ; mkl'"
+                "(distribution name: 'numpy')(distribution name: '1.8.1')"
+                "(unparsed '-1 ; mkl')",
+            "numpy >= 1.8.1, scipy >= 0.14.0 mkl":
+                "'numpy >= 1.8.1, scipy >= 0.14.0 mkl'",
+            " numpy >= 1.8.1 >= 1.9\t":
+                "' numpy >= 1.8.1 >= 1.9\\t'",
+            "numpy ==, mkl":
+                "'numpy ==, mkl'",
+            "numpy == numpy":
+                "'numpy == numpy' (bad version)",
+        }
+
+        for requirement_string, message in messages.items():
+            # When/Then
+            with self.assertRaises(SolverException) as context:
+                self._parse(requirement_string)
+            self.assertEqual(str(context.exception), message)
+
+    def test_returns_a_copy(self):
+        # Given
+        requirement_string = "numpy >= 1.8.1, scipy"
+
+        # When
+        constraints = self._parse(requirement_string)
+        constraints["mkl"] = (Any(),)
+
+        # Then
+        self.assertEqual(
+            self._parse(requirement_string),
+            {"numpy": (GEQ(V("1.8.1-0")),), "scipy": (Any(),)})
+
+
+class Test_LRUCache(unittest.TestCase):
+    def test_eviction(self):
+        # Given
+        cache = _LRUCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+
+        # When
+        cache.get("a")
+        cache["c"] = 3
+
+        # Then
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
@@ -9,7 +9,9 @@ from simplesat.errors import (
 
 from ..kinds import Equal
 from ..multi import MultiConstraints
-from ..requirement import InstallRequirement, parse_package_full_name
+from ..requirement import (
+    ConflictRequirement, InstallRequirement, parse_package_full_name
+)
 from ..constraint_modifiers import ConstraintModifiers, modify_requirement
 
 
@@ -338,6 +340,40 @@ class TestRequirementModification(unittest.TestCase):
         self.assertEqual(2, len(constraints))
         self.assertEqual(expected, modified)
 
+    def test_modified_requirements_are_remembered(self):
+        # Given
+        requirement = R("MKL == 10.3-1")
+        other_requirement = R("numpy == 1.8-1")
+        modifiers = ConstraintModifiers(allow_newer='MKL')
+
+        # When
+        modified = modify_requirement(requirement, modifiers)
+        modified_again = modify_requirement(
+            R("MKL == 10.3-1"),
+            modifiers.freeze())
+        modified_any = modify_requirement(
+            requirement, ConstraintModifiers(allow_any='MKL'))
+
+        # Then
+        self.assertEqual(
+            R("MKL >= 10.3-1"), modified)
+        self.assertIs(modified, modified_again)
+        self.assertEqual(R("MKL"), modified_any)
+        self.assertIs(
+            other_requirement,
+            modify_requirement(other_requirement, modifiers))
+
+    def test_modify_conflict_requirement(self):
+        # Given
+        requirement = ConflictRequirement._from_string("MKL == 10.3-1")
+        modifiers = ConstraintModifiers(allow_newer='MKL')
+
+        # Then
+        modify_requirement(
+            R("MKL == 10.3-1"), modifiers)
+        with self.assertRaises(NotImplementedError):
+            modify_requirement(requirement, modifiers)
+
     def _stable_unique(self, sequence):
         return tuple(OrderedDict.fromkeys(sequence).keys())
 
@@ -1,5 +1,9 @@
 import collections
+import functools
 import itertools
+import multiprocessing
+import threading
+from timeit import default_timer
 
 import attr
 import six
@@ -8,15 +12,27 @@ from simplesat.constraints import ConstraintModifiers
 from simplesat.constraints.requirement import InstallRequirement
 from simplesat.errors import (
     NoPackageFound, SatisfiabilityError, SatisfiabilityErrorWithHint,
+    SolverBudgetExceeded, SolverException, SolverInterrupted, SolverTimeout,
     UnexpectedlySatisfiable)
-from simplesat.pool import Pool
+from simplesat.pool import MemoizedPool, Pool
 from simplesat.repository import Repository
 from simplesat.request import JobType, Request
 from simplesat.rules_generator import RulesGenerator
-from simplesat.sat.policy import InstalledFirstPolicy
-from simplesat.sat import MiniSATSolver
+from simplesat.sat.policy import (
+    DefaultPolicy, InstalledFirstPolicy, LoggedInstalledFirstPolicy)
+from simplesat.sat import MiniSATSolver, SolverStats
 from simplesat.transaction import Transaction, InstallOperation
-from simplesat.utils import timed_context, connected_nodes
+from simplesat.utils import timed_context
+from simplesat.utils.graph import (
+    connected_components, package_lit_dependency_graph)
+from simplesat.utils.tracing import Tracer
+
+
+SatisfiabilityResult = collections.namedtuple(
+    "SatisfiabilityResult", "is_satisfiable message")
+
+# How often to check the stop event while worker processes search, in seconds.
+_WORKER_POLL_INTERVAL = 0.01
 
 
 def requirements_from_packages(packages):
@@ -131,25 +147,12 @@ def requirements_are_satisfiable(packages, requirements, modifiers=None):
 
     Returns
     -------
-    bool
-        Return True if the `requirements` can be satisfied by the `packages`.
+    SatisfiabilityResult
+        A named tuple whose `is_satisfiable` is True if the `requirements` can
+        be satisfied by the `packages`. Otherwise `message` explains why not.
     """
-    modifiers = modifiers or ConstraintModifiers()
-    Result = collections.namedtuple("Result", "is_satisfiable message")
-
-    request = Request(modifiers=modifiers)
-    for requirement in requirements:
-        request.install(requirement)
-    repositories = (Repository(packages),)
-    pool = Pool(repositories, modifiers=modifiers)
-
-    try:
-        DependencySolver(pool, repositories, []).solve(request)
-        return Result(is_satisfiable=True, message="")
-    except SatisfiabilityError as e:
-        return Result(
-            is_satisfiable=False, message=e.unsat.to_string(pool=pool)
-        )
+    checker = RequirementChecker(packages, modifiers=modifiers)
+    return checker.requirements_are_satisfiable(requirements)
 
 
 def satisfy_requirements(packages, requirements, modifiers=None):
@@ -175,22 +178,8 @@ def satisfy_requirements(packages, requirements, modifiers=None):
     SatisfiabilityError
         If the `requirements` cannot be satisfied using the `packages`.
     """
-    request = Request(modifiers=modifiers)
-    for requirement in requirements:
-        request.install(requirement)
-    repositories = (Repository(packages),)
-    pool = Pool(repositories, modifiers=modifiers)
-    transaction = DependencySolver(pool, repositories, []).solve(request)
-    msg = ("""
-        Unexpected operation in the transaction. This should never occur.
-        Something in simplesat is broken.
-        {!r}""")
-    for op in transaction.operations:
-        # Our installed repository was empty so everything should be an install
-        # operation
-        assert isinstance(op, InstallOperation), msg.format(op)
-    packages = tuple(op.package for op in transaction.operations)
-    return packages
+    checker = RequirementChecker(packages, modifiers=modifiers)
+    return checker.satisfy_requirements(requirements)
 
 
 def simplify_requirements(packages, requirements):
@@ -306,6 +295,58 @@ def minimal_unsatisfiable_subset(clauses, callback):
     return minimal_unsat(clauses)
 
 
+_POLICIES = ("installed_first", "latest_first", "default")
+
+
+def _validate_policy(instance, attribute, value):
+    if value not in _POLICIES:
+        raise ValueError("Unknown policy {!r}".format(value))
+
+
+@attr.attributes
+class SearchConfiguration(object):
+    """
+    A way of searching the rules, for :class:`DependencySolver` portfolios.
+
+    Parameters
+    ----------
+    policy : str, optional
+        The policy guiding the search:
+
+        * "installed_first" (the default) prefers the installed packages, then
+          the most recent versions of the other packages,
+        * "latest_first" prefers the most recent versions of every package,
+        * "default" decides the variables in order of package id, which may
+          find a solution fast but ignores versions and installed packages,
+          so it is not part of :data:`PORTFOLIO`.
+    preprocess : bool, optional
+        Whether to simplify the clauses before the search.
+
+    Raises
+    ------
+    ValueError
+        If `policy` is not one of the names above.
+
+
+    >>> portfolio = [SearchConfiguration(),
+    ...              SearchConfiguration("latest_first", preprocess=True)]
+    >>> solver = DependencySolver(pool, [remote], installed,
+    ...                           portfolio=portfolio)
+    """
+    policy = attr.attr(default="installed_first", validator=_validate_policy)
+    preprocess = attr.attr(default=False)
+
+
+# The configurations raced by DependencySolver(..., portfolio=PORTFOLIO),
+# the first one being the one used by default. "default" is left out, as its
+# solutions ignore versions and installed packages.
+PORTFOLIO = (
+    SearchConfiguration(),
+    SearchConfiguration(preprocess=True),
+    SearchConfiguration("latest_first"),
+)
+
+
 class DependencySolver(object):
 
     """
@@ -335,6 +376,48 @@ class DependencySolver(object):
         When true, behave more harshly when dealing with broken packages. INFO
         level log messages become WARNINGs and missing dependencies become
         errors rather than causing the package to be ignored.
+    budget : SearchBudget, optional
+        If given, limits the work done by the SAT search of each solve. A
+        solve which exceeds it raises SolverBudgetExceeded.
+    collect_stats : bool, optional
+        When true, collect the :class:`SolverStats` of each search. They are
+        available as the ``stats`` attribute of the returned Transaction, or
+        of the raised SatisfiabilityError.
+    tracer : Tracer, optional
+        If given, spans are opened on it around each phase of a solve.
+    log_policy : bool, optional
+        When true, the policy records each decision and the assignments
+        changed before it, for debugging. This costs time and memory
+        proportional to the length of the search.
+    backend : SatBackend, optional
+        If given, the SAT search of each solve is delegated to it instead of
+        the built-in MiniSATSolver, e.g. to an external solver with
+        :class:`SubprocessBackend`.
+    preprocess : bool, optional
+        When true, the clauses are simplified before the search of the
+        built-in MiniSATSolver, which helps on large problems. The installed
+        packages are left to the policy.
+    decompose : bool, optional
+        When true, the rules are split into components sharing no package,
+        e.g. for jobs touching unrelated parts of an environment, and the
+        built-in MiniSATSolver searches each of them on its own. The budget
+        then applies to the search of each component.
+    processes : int, optional
+        If greater than 1, the components found with ``decompose`` are
+        searched in this many worker processes. Starting them costs about as
+        much as copying the pool, so this only pays off when some components
+        are hard.
+    portfolio : sequence of SearchConfiguration, optional
+        If given, each solve searches the rules with all of these
+        configurations at once, in worker processes, and uses the answer of
+        the earliest configuration in the sequence which answers within
+        `portfolio_grace` seconds of the first answer. The solution may then
+        not be the one the first configuration prefers, but the solve takes
+        little more than the time of the fastest configuration. ``decompose``
+        is ignored.
+    portfolio_grace : float, optional
+        How long to wait for the configurations of the portfolio preceding
+        one which has answered, in seconds.
 
 
     >>> from simplesat.constraints.package_parser import \\
@@ -353,7 +436,10 @@ class DependencySolver(object):
     """
 
     def __init__(self, pool, remote_repositories, installed_repository,
-                 use_pruning=True, strict=False):
+                 use_pruning=True, strict=False, budget=None,
+                 collect_stats=False, tracer=None, log_policy=False,
+                 backend=None, preprocess=False, decompose=False,
+                 processes=None, portfolio=None, portfolio_grace=1.0):
         self._pool = pool
         self._installed_repository = installed_repository
 
@@ -364,20 +450,52 @@ class DependencySolver(object):
             )
 
         self._remote_repositories = remote_repositories
+        self._reset_timers()
+        # The policy of the last solve, kept for debugging.
+        self._last_policy = None
+        # Solves share the pool's modifiers and the timers, so solves run by
+        # solve_async on the same solver are serialized.
+        self._solve_lock = threading.Lock()
+
+        self.strict = strict
+        self.use_pruning = use_pruning
+        self.budget = budget
+        self.collect_stats = collect_stats
+        self.tracer = tracer or Tracer()
+        self.log_policy = log_policy
+        self.backend = backend
+        self.preprocess = preprocess
+        self.decompose = decompose
+        self.processes = processes
+        self.portfolio = portfolio
+        self.portfolio_grace = portfolio_grace
+
+    def _reset_timers(self):
         self._last_rules_time = timed_context("Generate Rules")
         self._last_solver_init_time = timed_context("Solver Init")
         self._last_solve_time = timed_context("SAT Solve")
 
-        self.strict = strict
-        self.use_pruning = use_pruning
+    def _timings(self):
+        return {
+            "rules_time": self._last_rules_time.elapsed,
+            "solver_init_time": self._last_solver_init_time.elapsed,
+            "solve_time": self._last_solve_time.elapsed,
+        }
 
-    def solve(self, request):
+    def _raise_if_stopped(self, stop_event):
+        if stop_event is not None and stop_event.is_set():
+            raise SolverInterrupted("Solve interrupted")
+
+    def solve(self, request, stop_event=None):
         """Given a request return a Transaction that would satisfy it.
 
         Parameters
         ----------
         request : Request
             The request that should be satisifed.
+        stop_event : threading.Event, optional
+            If given, the solve is abandoned once the event is set. The event
+            is checked between phases and at each step of the SAT search.
 
         Returns
         -------
@@ -388,36 +506,367 @@ class DependencySolver(object):
         ------
         SatisfiabilityError
             If no resolution is found.
+        SolverInterrupted
+            If `stop_event` was set before the solve completed.
+        SolverBudgetExceeded
+            If the SAT search exceeded the solver's budget.
         """
-        request = _convert_upgrade_request_if_needed(
-            request, self._remote_repositories, self._installed_repository
-        )
+        # Phases which don't run in this call will report a NaN time.
+        self._reset_timers()
+        tracer = self.tracer
+        with tracer.span("solve", jobs=len(request.jobs)) as solve_span:
+            if tracer.enabled:
+                cache_hits = getattr(self._pool, "cache_hits", 0)
+                cache_misses = getattr(self._pool, "cache_misses", 0)
+            try:
+                solution, requirement_ids, dependency_ids, stats = (
+                    self._search(request, stop_event))
+            except SolverInterrupted as e:
+                e.statistics.update(self._timings())
+                raise
+
+            solution_ids = _solution_to_ids(solution)
+
+            installed_package_ids = set(
+                self._pool.package_id(p)
+                for p in self._installed_repository
+            )
+
+            if self.use_pruning:
+                with tracer.span("prune") as span:
+                    span.set_attribute("solution_size", len(solution_ids))
+                    root_ids = installed_package_ids.union(requirement_ids)
+                    solution_ids = _connected_packages(
+                        solution_ids, root_ids, self._pool, dependency_ids
+                    )
+                    span.set_attribute("pruned_size", len(solution_ids))
+
+            with tracer.span("transaction") as span:
+                transaction = Transaction(
+                    self._pool, solution_ids, installed_package_ids,
+                    dependency_ids=dependency_ids, stats=stats)
+                span.set_attribute("operations", len(transaction.operations))
+
+            if tracer.enabled:
+                solve_span.set_attribute(
+                    "cache_hits",
+                    getattr(self._pool, "cache_hits", 0) - cache_hits)
+                solve_span.set_attribute(
+                    "cache_misses",
+                    getattr(self._pool, "cache_misses", 0) - cache_misses)
+        return transaction
+
+    def _search(self, request, stop_event):
+        tracer = self.tracer
+        self._raise_if_stopped(stop_event)
+        with tracer.span("upgrade_conversion"):
+            request = _convert_upgrade_request_if_needed(
+                request, self._remote_repositories,
+                self._installed_repository
+            )
 
         modifiers = request.modifiers
         self._pool.modifiers = modifiers if modifiers.targets else None
-        with self._last_rules_time:
-            init_rules_and_policy = self._create_rules_and_initialize_policy
-            requirement_ids, rules, policy = init_rules_and_policy(
-                request
-            )
-        with self._last_solver_init_time:
-            sat_solver = MiniSATSolver.from_rules(rules, policy)
-        with self._last_solve_time:
-            solution = sat_solver.search()
-        solution_ids = _solution_to_ids(solution)
-
-        installed_package_ids = set(
-            self._pool.package_id(p)
-            for p in self._installed_repository
-        )
-
-        if self.use_pruning:
-            root_ids = installed_package_ids.union(requirement_ids)
-            solution_ids = _connected_packages(
-                solution_ids, root_ids, self._pool
-            )
+        with tracer.span("generate_rules") as span, self._last_rules_time:
+            requirement_ids, rules, dependency_ids, ignored_ids = (
+                self._create_rules(request))
+            policy = self._create_policy(requirement_ids, ignored_ids)
+            self._last_policy = policy
+            span.set_attribute("rules", len(rules))
+            if tracer.enabled:
+                span.set_attribute("pool_size", len(self._pool.package_ids))
+        self._raise_if_stopped(stop_event)
+        stats = SolverStats() if self.collect_stats else None
+        if self.backend is not None:
+            with tracer.span("search") as span, self._last_solve_time:
+                try:
+                    solution = self.backend.solve(
+                        rules, policy, stop_event=stop_event,
+                        budget=self.budget, stats=stats)
+                except SatisfiabilityError as e:
+                    e.stats = stats
+                    raise
+            return solution, requirement_ids, dependency_ids, stats
+
+        if self.portfolio:
+            with tracer.span("search") as span, self._last_solve_time:
+                try:
+                    solution, index = self._search_portfolio(
+                        rules, requirement_ids, ignored_ids, stop_event,
+                        stats)
+                except SatisfiabilityError as e:
+                    e.stats = stats
+                    raise
+                span.set_attribute("configuration", index)
+            return solution, requirement_ids, dependency_ids, stats
+
+        if self.decompose:
+            with tracer.span("decompose") as span:
+                components = _rule_components(rules)
+                span.set_attribute("components", len(components))
+            if len(components) > 1:
+                with tracer.span("search") as span, self._last_solve_time:
+                    try:
+                        solution = self._search_components(
+                            components, requirement_ids, ignored_ids,
+                            stop_event, stats)
+                    except SatisfiabilityError as e:
+                        e.stats = stats
+                        raise
+                return solution, requirement_ids, dependency_ids, stats
+
+        with tracer.span("solver_init") as span, self._last_solver_init_time:
+            sat_solver = self._create_sat_solver(rules, policy, stats)
+            span.set_attribute("clauses", len(sat_solver.clauses))
+            span.set_attribute("variables", sat_solver.number_variables)
+        self._raise_if_stopped(stop_event)
+        with tracer.span("search") as span, self._last_solve_time:
+            try:
+                solution = sat_solver.search(
+                    stop_event=stop_event, budget=self.budget)
+            except SatisfiabilityError as e:
+                e.stats = stats
+                raise
+            finally:
+                span.set_attribute("conflicts", sat_solver.conflicts)
+                span.set_attribute("decisions", sat_solver.decisions)
+                span.set_attribute("propagations", sat_solver.propagations)
+        return solution, requirement_ids, dependency_ids, stats
+
+    def _create_sat_solver(self, rules, policy, stats, preprocess=None):
+        if preprocess is None:
+            preprocess = self.preprocess
+        if preprocess:
+            frozen = [self._pool.package_id(package)
+                      for package in self._installed_repository]
+        else:
+            frozen = ()
+        return MiniSATSolver.from_rules(
+            rules, policy, stats=stats, preprocess=preprocess,
+            frozen=frozen)
+
+    def _search_components(self, components, requirement_ids, ignored_ids,
+                           stop_event, stats):
+        """ Search each component of the rules on its own, and merge their
+        solutions.
+        """
+        solution = {}
+        # Installed packages which no rule mentions are kept, as the policy
+        # of a single search would do.
+        installed_ids = set(self._pool.package_id(package)
+                            for package in self._installed_repository)
+        installed_ids.difference_update(
+            abs(lit) for rules in components for rule in rules
+            for lit in rule.literals)
+        for package_id in installed_ids:
+            solution[package_id] = True
+
+        if self.processes is None or self.processes <= 1:
+            for rules in components:
+                self._raise_if_stopped(stop_event)
+                policy = self._create_policy(
+                    requirement_ids, ignored_ids, _rule_variables(rules))
+                self._last_policy = policy
+                sat_solver = self._create_sat_solver(rules, policy, stats)
+                component_solution = sat_solver.search(
+                    stop_event=stop_event, budget=self.budget)
+                solution.update(component_solution.items())
+            return solution
+
+        # The largest components first, so that they start early.
+        order = sorted(range(len(components)),
+                       key=lambda i: len(components[i]), reverse=True)
+        tasks = [(components[i], requirement_ids, ignored_ids,
+                  self.budget, stats is not None) for i in order]
+        workers = multiprocessing.Pool(
+            self.processes, initializer=_initialize_component_worker,
+            initargs=(self._pool, self._installed_repository,
+                      self.preprocess))
+        try:
+            result = workers.map_async(_search_component_in_worker, tasks, 1)
+            while not result.ready():
+                self._raise_if_stopped(stop_event)
+                result.wait(_WORKER_POLL_INTERVAL)
+            results = result.get()
+        finally:
+            workers.terminate()
+            workers.join()
+
+        unsatisfiable = []
+        for i, (component_solution, component_stats) in zip(order, results):
+            if component_stats is not None:
+                stats.update(component_stats)
+            if component_solution is None:
+                unsatisfiable.append(i)
+            else:
+                solution.update(component_solution)
+        # Search the unsatisfiable components again, in this process, to
+        # explain the conflict in terms of their rules. Should a search
+        # succeed after all, its solution is merged.
+        for i in sorted(unsatisfiable):
+            rules = components[i]
+            policy = self._create_policy(
+                requirement_ids, ignored_ids, _rule_variables(rules))
+            component_solution = self._create_sat_solver(
+                rules, policy, None).search(
+                    stop_event=stop_event, budget=self.budget)
+            solution.update(component_solution.items())
+        return solution
+
+    def _search_portfolio(self, rules, requirement_ids, ignored_ids,
+                          stop_event, stats):
+        """ Search the rules with each configuration of the portfolio in
+        parallel, and return the chosen solution and the index of its
+        configuration.
+        """
+        portfolio = list(self.portfolio)
+        # One process per configuration, which can be killed as soon as the
+        # answer is chosen.
+        processes = []
+        connections = []
+        try:
+            for configuration in portfolio:
+                reader, writer = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_search_configuration_in_process,
+                    args=(writer, self._pool, self._installed_repository,
+                          rules, requirement_ids, ignored_ids, configuration,
+                          self.budget, stats is not None))
+                process.daemon = True
+                process.start()
+                writer.close()
+                processes.append(process)
+                connections.append(reader)
+            index, solution, configuration_stats = self._wait_for_portfolio(
+                connections, stop_event)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            for connection in connections:
+                connection.close()
+
+        if configuration_stats is not None:
+            stats.update(configuration_stats)
+        if solution is None:
+            # Search again in this process, to explain the conflict in terms
+            # of our rules. Should the search succeed after all, its solution
+            # is used.
+            configuration = portfolio[index]
+            policy = self._create_policy(
+                requirement_ids, ignored_ids, policy=configuration.policy)
+            sat_solver = self._create_sat_solver(
+                rules, policy, None, configuration.preprocess)
+            solution = dict(sat_solver.search(
+                stop_event=stop_event, budget=self.budget).items())
+        return solution, index
+
+    def _wait_for_portfolio(self, connections, stop_event):
+        """ Return the index of the chosen configuration, with its solution
+        and statistics, or raise the error of the first configuration if none
+        could answer.
+        """
+        outcomes = [None] * len(connections)
+        first_answer_time = None
+        while True:
+            self._raise_if_stopped(stop_event)
+            for i, connection in enumerate(connections):
+                if outcomes[i] is None and connection.poll():
+                    try:
+                        outcomes[i] = connection.recv()
+                    except EOFError:
+                        outcomes[i] = (False, SolverException(
+                            "The search process exited unexpectedly"))
+            pending = [connection for connection, outcome
+                       in zip(connections, outcomes) if outcome is None]
+            answered = [i for i, outcome in enumerate(outcomes)
+                        if outcome is not None and outcome[0]]
+            if answered:
+                index = answered[0]
+                if all(outcome is not None for outcome in outcomes[:index]):
+                    # The configurations preceding this one all failed.
+                    break
+                now = default_timer()
+                if first_answer_time is None:
+                    first_answer_time = now
+                if now - first_answer_time >= self.portfolio_grace:
+                    break
+            elif not pending:
+                # Every configuration failed, e.g. exceeded its budget.
+                raise outcomes[0][1]
+            pending[0].poll(_WORKER_POLL_INTERVAL)
+        solution, configuration_stats = outcomes[index][1]
+        return index, solution, configuration_stats
+
+    def solve_async(self, request, timeout=None, executor=None, loop=None):
+        """Solve `request` in a worker thread, without blocking the event
+        loop.
+
+        This requires Python 3. Solves started on the same solver run one at a
+        time; use several solvers to run solves concurrently.
+
+        Parameters
+        ----------
+        request : Request
+            The request that should be satisifed.
+        timeout : float, optional
+            If given, the maximum number of seconds to wait for the solve,
+            including the time spent waiting for a worker.
+        executor : concurrent.futures.Executor, optional
+            The executor running the solve. Defaults to the loop's default
+            executor.
+        loop : asyncio.AbstractEventLoop, optional
+            The event loop. Defaults to the current event loop.
+
+        Returns
+        -------
+        asyncio.Future
+            A future to await for the Transaction. It fails like
+            :meth:`solve`, or with SolverTimeout if `timeout` expires, in
+            which case the exception's ``statistics`` describe how far the
+            solve went. Cancelling the future stops the solve.
 
-        return Transaction(self._pool, solution_ids, installed_package_ids)
+        >>> transaction = await solver.solve_async(request, timeout=10)
+        """
+        import asyncio
+
+        loop = loop or asyncio.get_event_loop()
+        stop_event = threading.Event()
+        result = loop.create_future()
+        timer = None
+        if timeout is not None:
+            timer = loop.call_later(timeout, stop_event.set)
+
+        def on_worker_done(worker):
+            if timer is not None:
+                timer.cancel()
+            if result.cancelled():
+                return
+            exc = worker.exception()
+            if exc is None:
+                result.set_result(worker.result())
+            elif (isinstance(exc, SolverInterrupted) and
+                    not isinstance(exc, SolverBudgetExceeded)):
+                msg = "Solve timed out after {} seconds".format(timeout)
+                result.set_exception(SolverTimeout(msg, exc.statistics))
+            else:
+                result.set_exception(exc)
+
+        def on_result_done(result):
+            # The worker stops at its next check, and frees the executor.
+            if result.cancelled():
+                stop_event.set()
+
+        solve = functools.partial(self._solve_locked, request, stop_event)
+        worker = loop.run_in_executor(executor, solve)
+        worker.add_done_callback(on_worker_done)
+        result.add_done_callback(on_result_done)
+        return result
+
+    def _solve_locked(self, request, stop_event):
+        with self._solve_lock:
+            return self.solve(request, stop_event=stop_event)
 
     def solve_with_hint(self, request):
         """Given a request return a Transaction that would satisfy it.
@@ -463,6 +912,16 @@ class DependencySolver(object):
             raise SatisfiabilityErrorWithHint(exc.unsat, conflicting_jobs)
 
     def _create_rules_and_initialize_policy(self, request):
+        requirement_ids, rules, dependency_ids, ignored_ids = (
+            self._create_rules(request))
+        policy = self._create_policy(requirement_ids, ignored_ids)
+        return requirement_ids, rules, policy, dependency_ids
+
+    def _create_rules(self, request):
+        """ Return the ids of the packages the jobs require, the rules, the
+        dependency ids found by the RulesGenerator and the ids of the
+        installed packages the policy should not prefer.
+        """
         pool = self._pool
         installed_repository = self._installed_repository
 
@@ -498,17 +957,258 @@ class DependencySolver(object):
             package_id = pool.package_id(package)
             installed_package_ids[package_id] = package
 
-        # Prefer the installed versions of all packages
-        policy = InstalledFirstPolicy(
-            pool, installed_repository,
-            ignore_installed_packages=soft_update_packages)
-        policy.add_requirements(all_requirement_ids)
-
         rules_generator = RulesGenerator(
             pool, request, installed_package_ids=installed_package_ids,
             strict=self.strict)
 
-        return all_requirement_ids, list(rules_generator.iter_rules()), policy
+        rules = list(rules_generator.iter_rules())
+        ignored_ids = set(pool.package_id(p) for p in soft_update_packages)
+        return (all_requirement_ids, rules, rules_generator.dependency_ids,
+                ignored_ids)
+
+    def _create_policy(self, requirement_ids, ignored_ids, package_ids=None,
+                       policy="installed_first"):
+        """ Return the policy guiding the search, restricted to `package_ids`
+        if given. `policy` is one of the names described in
+        :class:`SearchConfiguration`.
+        """
+        if policy == "default":
+            return DefaultPolicy()
+
+        pool = self._pool
+        installed_packages = self._installed_repository
+        if policy == "latest_first":
+            installed_packages = []
+        elif package_ids is not None:
+            installed_packages = [
+                package for package in installed_packages
+                if pool.package_id(package) in package_ids]
+            requirement_ids = [package_id for package_id in requirement_ids
+                               if package_id in package_ids]
+
+        # Prefer the installed versions of all packages
+        if self.log_policy:
+            policy_factory = LoggedInstalledFirstPolicy
+        else:
+            policy_factory = InstalledFirstPolicy
+        policy = policy_factory(
+            pool, installed_packages,
+            ignore_installed_packages=set(
+                pool.id_to_package(package_id) for package_id in ignored_ids))
+        policy.add_requirements(requirement_ids)
+        return policy
+
+
+class RequirementChecker(object):
+
+    """
+    Check many sets of requirements against one collection of packages.
+
+    The repository, the pool and the solver are built once, and the packages
+    satisfying each requirement are remembered across queries, so that only
+    the solving itself is repeated for each set of requirements.
+
+    Parameters
+    ----------
+    packages : iterable of PackageMetadata
+        The packages available to draw from when satisfying requirements.
+    modifiers : ConstraintModifiers, optional
+        If not None, modify requirements before resolving packages.
+
+
+    >>> checker = RequirementChecker(packages)
+    >>> checker.requirements_are_satisfiable([R('numpy < 1.10')])
+    SatisfiabilityResult(is_satisfiable=True, message='')
+    >>> results = checker.check_many(
+    ...     [[R('numpy')], [R('numpy < 1.10'), R('MKL >= 11')]], processes=2)
+    >>> [result.is_satisfiable for result in results]
+    [True, False]
+    """
+
+    def __init__(self, packages, modifiers=None):
+        self._packages = tuple(packages)
+        # Take a copy, as the cached lookups depend on the modifiers.
+        self._modifiers = ConstraintModifiers()
+        if modifiers is not None:
+            self._modifiers.update(modifiers)
+
+        self._repositories = (Repository(self._packages),)
+        self._pool = MemoizedPool(self._repositories)
+        self._pool.modifiers = (
+            self._modifiers if self._modifiers.targets else None)
+        self._solver = DependencySolver(self._pool, self._repositories, [])
+
+    @property
+    def pool(self):
+        """ The :class:`Pool` shared by all queries. """
+        return self._pool
+
+    def packages_from_requirements(self, requirements):
+        """ Return the packages satisfying any of the `requirements`, as
+        described in :func:`packages_from_requirements`. """
+        listed_packages = set()
+        for requirement in requirements:
+            listed_packages.update(self._pool.what_provides(requirement))
+        return tuple(sorted(listed_packages, key=lambda p: p._key))
+
+    def requirements_are_satisfiable(self, requirements):
+        """ Determine if the `requirements` can be satisfied together, as
+        described in :func:`requirements_are_satisfiable`. """
+        try:
+            self._solve(requirements)
+            return SatisfiabilityResult(is_satisfiable=True, message="")
+        except SatisfiabilityError as e:
+            message = e.unsat.to_string(pool=self._pool)
+            return SatisfiabilityResult(is_satisfiable=False, message=message)
+
+    def requirements_are_complete(self, requirements):
+        """ Return True if `requirements` includes all required transitive
+        dependencies, as described in :func:`requirements_are_complete`. """
+        packages = self.packages_from_requirements(requirements)
+        checker = RequirementChecker(packages, modifiers=self._modifiers)
+        return checker.requirements_are_satisfiable(requirements)
+
+    def satisfy_requirements(self, requirements):
+        """ Find a collection of packages that satisfy the requirements, as
+        described in :func:`satisfy_requirements`. """
+        transaction = self._solve(requirements)
+        msg = ("""
+            Unexpected operation in the transaction. This should never occur.
+            Something in simplesat is broken.
+            {!r}""")
+        for op in transaction.operations:
+            # Our installed repository was empty so everything should be an
+            # install operation
+            assert isinstance(op, InstallOperation), msg.format(op)
+        return tuple(op.package for op in transaction.operations)
+
+    def check_many(self, requirement_sets, processes=None):
+        """ Determine, for each set of requirements, if it can be satisfied.
+
+        Parameters
+        ----------
+        requirement_sets : iterable of iterables of Requirement
+            The sets of requirements to check independently of each other.
+        processes : int, optional
+            If greater than 1, check the sets in this many worker processes.
+            Each worker builds its own checker from the same packages.
+
+        Returns
+        -------
+        list of SatisfiabilityResult
+            One result per set of requirements, in the same order.
+        """
+        requirement_sets = [tuple(r) for r in requirement_sets]
+        if processes is None or processes <= 1:
+            return [self.requirements_are_satisfiable(requirements)
+                    for requirements in requirement_sets]
+
+        # Unpickled versions cannot be turned back into strings, which we need
+        # for the messages, so send the requirements as constraint strings.
+        constraint_sets = [
+            tuple((r.__class__, r.to_constraints()) for r in requirements)
+            for requirements in requirement_sets
+        ]
+        workers = multiprocessing.Pool(
+            processes, initializer=_initialize_checker_worker,
+            initargs=(self._packages, self._modifiers))
+        try:
+            chunksize = max(1, len(constraint_sets) // (processes * 4))
+            return workers.map(_check_in_worker, constraint_sets, chunksize)
+        finally:
+            workers.terminate()
+            workers.join()
+
+    def _solve(self, requirements):
+        request = Request(modifiers=self._modifiers)
+        for requirement in requirements:
+            request.install(requirement)
+        return self._solver.solve(request)
+
+
+# The checker of each worker process used by RequirementChecker.check_many
+_worker_checker = None
+
+
+def _initialize_checker_worker(packages, modifiers):
+    global _worker_checker
+    _worker_checker = RequirementChecker(packages, modifiers=modifiers)
+
+
+def _check_in_worker(constraint_set):
+    requirements = [cls.from_constraints(constraints)
+                    for cls, constraints in constraint_set]
+    return _worker_checker.requirements_are_satisfiable(requirements)
+
+
+# The solver of each worker process used by DependencySolver to search
+# components of the rules in parallel
+_component_solver = None
+
+
+def _initialize_component_worker(pool, installed_repository, preprocess):
+    global _component_solver
+    _component_solver = DependencySolver(
+        pool, [], installed_repository, preprocess=preprocess)
+
+
+def _search_component_in_worker(task):
+    """ Return the solution of a component, or None if it is unsatisfiable,
+    and the statistics of its search.
+    """
+    rules, requirement_ids, ignored_ids, budget, collect_stats = task
+    solver = _component_solver
+    policy = solver._create_policy(
+        requirement_ids, ignored_ids, _rule_variables(rules))
+    stats = SolverStats() if collect_stats else None
+    try:
+        sat_solver = solver._create_sat_solver(rules, policy, stats)
+        solution = sat_solver.search(budget=budget)
+    except SatisfiabilityError:
+        # The explanation refers to copies of the rules, so the parent
+        # process finds the conflict again to explain it.
+        return None, stats
+    return dict(solution.items()), stats
+
+
+def _search_configuration_in_process(connection, pool, installed_repository,
+                                     rules, requirement_ids, ignored_ids,
+                                     configuration, budget, collect_stats):
+    """ Send through `connection` whether the search with `configuration`
+    ended, with the solution, or None if the rules are unsatisfiable, and the
+    statistics of the search, or the error which stopped it.
+    """
+    solver = DependencySolver(pool, [], installed_repository)
+    stats = SolverStats() if collect_stats else None
+    try:
+        policy = solver._create_policy(
+            requirement_ids, ignored_ids, policy=configuration.policy)
+        sat_solver = solver._create_sat_solver(
+            rules, policy, stats, configuration.preprocess)
+        try:
+            solution = dict(sat_solver.search(budget=budget).items())
+        except SatisfiabilityError:
+            # The explanation refers to copies of the rules, so the parent
+            # process finds the conflict again to explain it.
+            solution = None
+        outcome = (True, (solution, stats))
+    except Exception as e:
+        outcome = (False, e)
+    connection.send(outcome)
+    connection.close()
+
+
+def _rule_variables(rules):
+    return set(abs(lit) for rule in rules for lit in rule.literals)
+
+
+def _rule_components(rules):
+    """ Split `rules` into groups sharing no package, which can be searched
+    independently of each other.
+    """
+    indices = connected_components(
+        [[abs(lit) for lit in rule.literals] for rule in rules])
+    return [[rules[i] for i in component] for component in indices]
 
 
 def _convert_upgrade_request_if_needed(request, remote_repositories,
@@ -539,11 +1239,18 @@ def _convert_upgrade_request_if_needed(request, remote_repositories,
         return request
 
 
-def _connected_packages(solution, root_ids, pool):
-    """ Return packages in `solution` which are associated with `root_ids`. """
+def _connected_packages(solution, root_ids, pool, dependency_ids=None):
+    """ Return packages in `solution` which are associated with `root_ids`.
+
+    `dependency_ids` maps package ids to the ids of the packages satisfying
+    their install_requires, as recorded by the :class:`RulesGenerator`.
+    Packages missing from it have their dependencies looked up in the pool.
+    """
+    dependency_ids = dependency_ids or {}
 
-    # Our strategy is as follows:
-    # ... -> pkg.install_requires -> pkg names -> ids -> _id_to_package -> ...
+    # Our strategy is as follows: mark the packages installed in the solution
+    # which provide one of the root names, then flood fill along the
+    # dependency edges, only following edges to installed packages.
 
     def get_names(pkg_id):
         provides = pool.id_to_package(abs(pkg_id)).provides
@@ -551,37 +1258,39 @@ def _connected_packages(solution, root_ids, pool):
 
     root_names = {name for pkg_id in root_ids for name in get_names(pkg_id)}
 
-    solution_name_to_id = {
-        name: pkg_id
-        for pkg_id in solution
-        for name in get_names(pkg_id)
-        if pkg_id > 0
-    }
-
-    solution_root_ids = set(
-        pkg_id for name, pkg_id in six.iteritems(solution_name_to_id)
-        if name in root_names
-    )
-
-    def neighborfunc(pkg_id):
-        """ Given a pkg id, return the pkg ids of the immediate dependencies
-        that appeared in our solution. """
-        constraints = pool.id_to_package(pkg_id).install_requires
-        neighbors = set(solution_name_to_id[name] for name, _ in constraints)
-        return neighbors
-
-    # Each package can root its own independent graph, so we must start at
-    # each one individually
-    should_include = set()
-    for pkg_id in solution_root_ids:
-        # We pass in `should_include` to avoid re-walking a subgraph
-        nodes = connected_nodes(pkg_id, neighborfunc, should_include)
-        should_include.update(nodes)
-    assert should_include.issuperset(solution_root_ids)
+    solution = tuple(solution)
+    size = max(abs(pkg_id) for pkg_id in solution) + 1 if solution else 1
+    marks = bytearray(size)
+    IN_SOLUTION, CONNECTED = 1, 2
+
+    for pkg_id in solution:
+        if pkg_id > 0:
+            marks[pkg_id] = IN_SOLUTION
+
+    stack = []
+    for pkg_id in solution:
+        if pkg_id > 0 and not root_names.isdisjoint(get_names(pkg_id)):
+            marks[pkg_id] = CONNECTED
+            stack.append(pkg_id)
+
+    while stack:
+        pkg_id = stack.pop()
+        neighbors = dependency_ids.get(pkg_id)
+        if neighbors is None:
+            neighbors = package_lit_dependency_graph(
+                pool, (pkg_id,), closed=False)[pkg_id]
+        for dep_id in neighbors:
+            if dep_id < size and marks[dep_id] == IN_SOLUTION:
+                marks[dep_id] = CONNECTED
+                stack.append(dep_id)
 
     # In addition to all updates and additions to root ids, we must also keep
     # all packages newly *excluded* from root_ids
-    connected = should_include.union(s for s in solution if abs(s) in root_ids)
+    connected = set(
+        pkg_id for pkg_id in solution
+        if (pkg_id > 0 and marks[pkg_id] == CONNECTED) or
+        abs(pkg_id) in root_ids
+    )
     return connected
 
 
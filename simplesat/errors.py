@@ -10,6 +10,39 @@ class UnexpectedlySatisfiable(SolverException):
     pass
 
 
+class SolverInterrupted(SolverException):
+    """ Raised when a solve is stopped before it could complete.
+
+    The ``statistics`` attribute is a dict describing how far the solve went.
+    """
+    def __init__(self, message, statistics=None):
+        super(SolverInterrupted, self).__init__(message)
+        self.statistics = statistics if statistics is not None else {}
+
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.statistics))
+
+
+class SolverTimeout(SolverInterrupted):
+    pass
+
+
+class SolverBudgetExceeded(SolverInterrupted):
+    """ Raised when the SAT search runs out of one of the limits given by a
+    SearchBudget.
+
+    The ``budget`` attribute names the exhausted limit: one of "conflicts",
+    "decisions", "propagations" or "timeout".
+    """
+    def __init__(self, message, statistics=None, budget=None):
+        super(SolverBudgetExceeded, self).__init__(message, statistics)
+        self.budget = budget
+
+    def __reduce__(self):
+        return (self.__class__,
+                (self.args[0], self.statistics, self.budget))
+
+
 class InvalidConstraint(SolverException):
     pass
 
@@ -30,6 +63,10 @@ class NoPackageFound(SolverException):
         self.requirement = requirement
         self.args = self.args or (str(requirement),)
 
+    def __reduce__(self):
+        # Keep the requirement when pickled, e.g. from a worker process.
+        return (self.__class__, (self.requirement,) + tuple(self.args))
+
 
 class MissingInstallRequires(NoPackageFound):
     pass
@@ -40,9 +77,23 @@ class MissingConflicts(NoPackageFound):
 
 
 class SatisfiabilityError(SolverException):
+    # The SolverStats of the failed search, when collected.
+    stats = None
+
     def __init__(self, unsat):
         self.unsat = unsat
-        super(SatisfiabilityError, self).__init__(self.reason)
+        # The reason is only worked out when the error is displayed, as
+        # explaining a conflict can cost more than finding it.
+        super(SatisfiabilityError, self).__init__(unsat)
+
+    def __reduce__(self):
+        return (self.__class__, (self.unsat,), {"stats": self.stats})
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.unsat)
+
+    def __str__(self):
+        return self.reason
 
     @property
     def reason(self):
@@ -60,6 +111,10 @@ class SatisfiabilityErrorWithHint(SatisfiabilityError):
         self.conflicting_jobs = conflicting_jobs
         super(SatisfiabilityErrorWithHint, self).__init__(unsat)
 
+    def __reduce__(self):
+        return (self.__class__, (self.unsat, self.conflicting_jobs),
+                {"stats": self.stats})
+
     @property
     def hint_pretty_string(self):
         return (
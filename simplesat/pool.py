@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+from bisect import bisect_left, bisect_right
+
 import six
 
 from .utils import DefaultOrderedDict
@@ -7,6 +9,94 @@ from simplesat.constraints import Requirement, modify_requirement
 from simplesat.errors import InvalidConstraint
 
 
+class _VersionRanks(object):
+    """ The distinct versions of the packages of one name, in increasing
+    order, and the rank of each package's version among them.
+
+    The interval of versions of a requirement is compiled into an interval of
+    ranks, so that matching candidates compares integers instead of
+    versions.
+
+    Parameters
+    ----------
+    packages : list of PackageMetadata
+        The packages of one name, in the order of the pool.
+    """
+
+    def __init__(self, packages):
+        self.versions = sorted(set(package.version for package in packages))
+        rank = dict((version, i) for i, version in enumerate(self.versions))
+        self.ranks = [rank[package.version] for package in packages]
+        # Packages come sorted by version from each repository, so that the
+        # matching packages are usually a slice of the pool's list.
+        self.is_sorted = all(
+            previous <= current
+            for previous, current in zip(self.ranks, self.ranks[1:]))
+        self._upstreams = None
+
+    @property
+    def upstreams(self):
+        # Sorted as well, as versions are ordered by upstream first.
+        if self._upstreams is None:
+            self._upstreams = [version.upstream for version in self.versions]
+        return self._upstreams
+
+    def rank_interval(self, interval):
+        """ Compile the interval of versions of a :class:`MultiConstraints`
+        into the ranks it accepts.
+
+        Returns
+        -------
+        rank_interval : tuple or None
+            ``(low, high, excluded)``, meaning the ranks in ``[low, high)``
+            which are not in the set ``excluded``, or None if some constraints
+            cannot be compiled.
+        """
+        if interval.others:
+            return None
+        versions = self.versions
+        low, high = 0, len(versions)
+        if interval.lower is not None:
+            find = bisect_left if interval.lower_inclusive else bisect_right
+            low = find(versions, interval.lower)
+        if interval.upper is not None:
+            find = bisect_right if interval.upper_inclusive else bisect_left
+            high = find(versions, interval.upper)
+        if interval.upstream is not None:
+            low = max(low, bisect_left(self.upstreams, interval.upstream))
+            high = min(high, bisect_right(self.upstreams, interval.upstream))
+        excluded = set()
+        for version in interval.excluded:
+            rank = bisect_left(versions, version)
+            if rank < len(versions) and versions[rank] == version:
+                excluded.add(rank)
+        return low, high, excluded
+
+    def select(self, packages, low, high, excluded):
+        """ Return the packages whose rank is in the given interval, in the
+        order of `packages`.
+        """
+        if low >= high:
+            return []
+        ranks = self.ranks
+        if self.is_sorted:
+            start = bisect_left(ranks, low)
+            stop = bisect_left(ranks, high, start)
+            selected = packages[start:stop]
+            if excluded:
+                selected = [
+                    package
+                    for package, rank in zip(selected, ranks[start:stop])
+                    if rank not in excluded
+                ]
+            return selected
+        return [
+            package
+            for package, rank in zip(packages, ranks)
+            if low <= rank < high and rank not in excluded
+        ]
+
+
 class Pool(object):
     """ A pool of repositories.
 
@@ -18,7 +108,9 @@ class Pool(object):
     repositories : list of Repository, optional
         The repositories to query for packages.
     modifiers : ConstraintModifiers, optional
-        If given, modify the requirements prior to querying.
+        If given, modify the requirements prior to querying. The pool uses a
+        frozen copy of the modifiers, so they must not be changed in place
+        once assigned to the pool; assign them again instead.
     """
 
     def __init__(self, repositories=None, modifiers=None):
@@ -30,6 +122,7 @@ class Pool(object):
         self._package_to_id_ = {}
         self._id_to_package_ = {}
         self._packages_by_name_ = DefaultOrderedDict(list)
+        self._version_ranks = {}
 
         self.modifiers = modifiers
 
@@ -45,6 +138,7 @@ class Pool(object):
             The repository to add
         """
         self._repositories.append(repository)
+        self._version_ranks.clear()
         for package in repository:
             current_id = self._id
             self._id += 1
@@ -74,19 +168,56 @@ class Pool(object):
         list of PackageMetadata
             The packages satisfying `requirement`.
         """
-        ret = []
-        if requirement.name in self._packages_by_name_:
-            if use_modifiers:
-                requirement = self.modify_requirement(requirement)
-            for package in self._packages_by_name_[requirement.name]:
-                if requirement.matches(package.version):
-                    ret.append(package)
-        return ret
+        if requirement.name not in self._packages_by_name_:
+            return []
+        if use_modifiers:
+            requirement = self.modify_requirement(requirement)
+        constraints = requirement._constraints
+        if constraints.is_empty:
+            return []
+        packages = self._packages_by_name_[requirement.name]
+
+        ranks = self._ranks(requirement.name)
+        interval = None
+        if ranks is not None:
+            try:
+                interval = ranks.rank_interval(constraints._compile())
+            except TypeError:
+                # The requirement's versions are not comparable with ours.
+                pass
+        if interval is None:
+            return [
+                package for package in packages
+                if requirement.matches(package.version)
+            ]
+        return ranks.select(packages, *interval)
+
+    def _ranks(self, name):
+        try:
+            return self._version_ranks[name]
+        except KeyError:
+            try:
+                ranks = _VersionRanks(self._packages_by_name_[name])
+            except TypeError:
+                # Versions of different kinds cannot be ranked together.
+                ranks = None
+            self._version_ranks[name] = ranks
+            return ranks
+
+    @property
+    def modifiers(self):
+        return self._modifiers
+
+    @modifiers.setter
+    def modifiers(self, modifiers):
+        self._modifiers = modifiers
+        self._frozen_modifiers = modifiers.freeze() if modifiers else None
 
     def modify_requirement(self, requirement):
         """Return requirement modified by the pool's ConstraintModifiers."""
-        if self.modifiers:
-            requirement = modify_requirement(requirement, self.modifiers)
+        if self._frozen_modifiers is not None:
+            requirement = modify_requirement(
+                requirement, self._frozen_modifiers)
         return requirement
 
     def package_id(self, package):
@@ -132,3 +263,43 @@ class Pool(object):
     @property
     def package_ids(self):
         return tuple(self._id_to_package_.keys())
+
+
+class MemoizedPool(Pool):
+    """ A Pool which remembers the packages satisfying each requirement.
+
+    This is useful when many requests are solved against the same packages.
+    Lookups are remembered separately for each set of modifiers. The number
+    of lookups answered from the cache and computed is counted in
+    ``cache_hits`` and ``cache_misses``.
+
+    Parameters
+    ----------
+    repositories : list of Repository, optional
+        The repositories to query for packages.
+    modifiers : ConstraintModifiers, optional
+        If given, modify the requirements prior to querying.
+    """
+
+    def __init__(self, repositories=None, modifiers=None):
+        self._providers = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        super(MemoizedPool, self).__init__(repositories, modifiers=modifiers)
+
+    def add_repository(self, repository):
+        super(MemoizedPool, self).add_repository(repository)
+        self._providers.clear()
+
+    def what_provides(self, requirement, use_modifiers=True):
+        modifiers = self._frozen_modifiers if use_modifiers else None
+        key = (requirement.__class__, requirement, modifiers)
+        try:
+            providers = self._providers[key]
+            self.cache_hits += 1
+        except KeyError:
+            self.cache_misses += 1
+            providers = self._providers[key] = tuple(
+                super(MemoizedPool, self).what_provides(
+                    requirement, use_modifiers=use_modifiers))
+        return list(providers)
@@ -36,7 +36,7 @@ class Repository(object):
     """
     def __init__(self, packages=None):
         self._name_to_packages = {}
-        self._default_factory = lambda: []
+        self._default_factory = list
         # Sorted list of keys in self._name_to_packages, to keep iteration
         # over a repository reproducible
         self._names = []
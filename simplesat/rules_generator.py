@@ -161,6 +161,9 @@ class RulesGenerator(object):
         self.request = request
         self.installed_package_ids = installed_package_ids or OrderedDict()
         self.added_package_ids = set()
+        # Mapping of package ids to the ids of every package satisfying one
+        # of their install_requires, as found while creating the rules.
+        self.dependency_ids = {}
         self.strict = strict
 
     def iter_rules(self):
@@ -168,6 +171,7 @@ class RulesGenerator(object):
         Return an iterator over each created rule.
         """
         self.added_package_ids = set()
+        self.dependency_ids = {}
         # This attaches the job requirement to the created rule. We need
         # to run it first because duplicated rules are ignored. Otherwise,
         # we'll end up keeping the rule instance that doesn't know it should be
@@ -357,6 +361,9 @@ class RulesGenerator(object):
                 (candidate, combined_requirements)
                 for candidate in dependency_candidates)
         work_queue.extend(all_dependency_candidates)
+        self.dependency_ids[self._pool.package_id(package)] = tuple(
+            self._pool.package_id(candidate)
+            for candidate, _ in all_dependency_candidates)
 
     def _add_conflicts_rules(self, package, requirements):
         """
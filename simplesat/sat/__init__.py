@@ -1,5 +1,7 @@
 from simplesat.errors import SatisfiabilityError  # noqa
-from .minisat import MiniSATSolver  # noqa
+from .minisat import MiniSATSolver, SearchBudget  # noqa
+from .stats import SolverStats  # noqa
+from .backends import MiniSATBackend, SatBackend, SubprocessBackend  # noqa
 
 
 def is_satisfiable(rules):
@@ -0,0 +1,195 @@
+"""
+Interchangeable SAT solvers for the rules of a dependency problem.
+
+:class:`MiniSATBackend` uses the built-in :class:`MiniSATSolver`, guided by
+a policy. :class:`SubprocessBackend` offloads the search to an external
+solver reading DIMACS, such as minisat, glucose, cadical or kissat, which may
+be much faster on hard problems. External solvers know nothing of the
+policy: their solution satisfies the rules, but may not be the one the
+policy prefers, e.g. it may not pick the latest versions.
+"""
+from __future__ import absolute_import
+
+import abc
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from attr import attr, attributes
+from attr.validators import instance_of
+import six
+
+from simplesat.errors import (
+    SolverBudgetExceeded, SolverException, SolverInterrupted
+)
+from .assignment_set import AssignmentSet
+from .dimacs import DimacsError, read_dimacs_solution, write_dimacs
+from .minisat import MiniSATSolver, SearchBudget
+
+
+class SatBackend(six.with_metaclass(abc.ABCMeta)):
+
+    @abc.abstractmethod
+    def solve(self, rules, policy=None, stop_event=None, budget=None,
+              stats=None):
+        """ Return an assignment of every variable which satisfies the rules.
+
+        Parameters
+        ----------
+        rules : list of PackageRule
+            The rules to satisfy.
+        policy : IPolicy, optional
+            The policy guiding the choice of a solution, for backends which
+            support one.
+        stop_event : threading.Event, optional
+            If given, the search is abandoned once the event is set, raising
+            SolverInterrupted.
+        budget : SearchBudget, optional
+            If given, limits the work done by the search. Backends support the
+            limits they can, and at least the timeout.
+        stats : SolverStats, optional
+            If given, the statistics to fill while searching, for backends
+            which collect them.
+
+        Returns
+        -------
+        AssignmentSet
+            The value of each variable.
+
+        Raises
+        ------
+        SatisfiabilityError
+            If the rules cannot be satisfied.
+        """
+
+
+class MiniSATBackend(SatBackend):
+    """ Search with the built-in :class:`MiniSATSolver`. """
+
+    def solve(self, rules, policy=None, stop_event=None, budget=None,
+              stats=None):
+        solver = MiniSATSolver.from_rules(rules, policy, stats=stats)
+        return solver.search(stop_event=stop_event, budget=budget)
+
+
+@attributes
+class SubprocessBackend(SatBackend):
+    """ Search with an external solver, run once per problem.
+
+    The problem is written to a temporary DIMACS file, whose path replaces
+    ``{input}`` in the command. The solver writes its result to the file
+    replacing ``{output}`` if the command has one, e.g. minisat, or to its
+    standard output otherwise, as SAT competition solvers do.
+
+    When the rules are unsatisfiable, :class:`MiniSATSolver` searches them
+    again, so that the raised error can explain the conflict. That search
+    uses the rest of the budget's timeout, and stops with the `stop_event`.
+
+    Parameters
+    ----------
+    command : list of str
+        The command running the solver.
+    poll_interval : float, optional
+        How often to check the `stop_event` and timeout, in seconds.
+
+
+    >>> backend = SubprocessBackend(["kissat", "-q", "{input}"])
+    >>> solver = DependencySolver(pool, [remote], installed, backend=backend)
+    """
+    command = attr(validator=instance_of(list))
+    poll_interval = attr(default=0.01)
+
+    @classmethod
+    def minisat(cls, executable="minisat"):
+        """ Return a backend running minisat, or None if `executable` is not
+        found.
+        """
+        path = _which(executable)
+        if path is None:
+            return None
+        return cls([path, "-verb=0", "{input}", "{output}"])
+
+    def solve(self, rules, policy=None, stop_event=None, budget=None,
+              stats=None):
+        start = time.time()
+        directory = tempfile.mkdtemp(prefix="simplesat-")
+        try:
+            model = self._run(rules, directory, stop_event, budget)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        if model is None:
+            # Search again to explain the conflict, or to find a solution if
+            # the external solver was wrong.
+            if budget is not None and budget.timeout is not None:
+                remaining = budget.timeout - (time.time() - start)
+                budget = SearchBudget(
+                    max_conflicts=budget.max_conflicts,
+                    max_decisions=budget.max_decisions,
+                    max_propagations=budget.max_propagations,
+                    timeout=max(remaining, 0))
+            return MiniSATBackend().solve(
+                rules, policy, stop_event=stop_event, budget=budget,
+                stats=stats)
+
+        values = dict((abs(lit), lit > 0) for lit in model)
+        assignments = AssignmentSet()
+        for rule in rules:
+            for lit in rule.literals:
+                assignments[abs(lit)] = values.get(abs(lit), False)
+        return assignments
+
+    def _run(self, rules, directory, stop_event, budget):
+        input_path = os.path.join(directory, "problem.cnf")
+        output_path = os.path.join(directory, "solution")
+        stdout_path = os.path.join(directory, "stdout")
+        with io.open(input_path, "w", encoding="ascii") as fp:
+            write_dimacs(fp, [rule.literals for rule in rules])
+
+        uses_output = any("{output}" in arg for arg in self.command)
+        command = [
+            arg.replace("{input}", input_path).replace("{output}", output_path)
+            for arg in self.command
+        ]
+        timeout = budget.timeout if budget is not None else None
+        start = time.time()
+        with open(stdout_path, "wb") as stdout:
+            process = subprocess.Popen(
+                command, stdout=stdout, stderr=subprocess.STDOUT)
+            try:
+                while process.poll() is None:
+                    if stop_event is not None and stop_event.is_set():
+                        raise SolverInterrupted("SAT search interrupted")
+                    if timeout is not None and time.time() - start > timeout:
+                        raise SolverBudgetExceeded(
+                            "SAT search exceeded its timeout",
+                            {"search_time": time.time() - start},
+                            budget="timeout")
+                    time.sleep(self.poll_interval)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+        result_path = output_path if uses_output else stdout_path
+        try:
+            with io.open(result_path, encoding="ascii",
+                         errors="replace") as fp:
+                return read_dimacs_solution(fp)
+        except (IOError, DimacsError) as e:
+            raise SolverException(
+                "{!r} failed with code {}: {}".format(
+                    " ".join(self.command), process.returncode, e))
+
+
+def _which(executable):
+    if os.path.dirname(executable):
+        return executable if os.access(executable, os.X_OK) else None
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        path = os.path.join(directory, executable)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
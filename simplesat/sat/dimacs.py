@@ -0,0 +1,228 @@
+"""
+Read and write CNF problems in the DIMACS format used by most SAT solvers.
+
+Clauses are written and read one at a time, so that large problems need not
+be held in memory as text. The package each variable stands for may be
+recorded in comment lines of the form::
+
+    c key 12 numpy 1.9.2-1
+
+which other solvers ignore, and :func:`read_dimacs` reads back.
+"""
+from __future__ import absolute_import
+
+import itertools
+
+from attr import attr, attributes
+import six
+
+from simplesat.errors import SolverException
+
+
+KEY_COMMENT = "key"
+
+
+class DimacsError(SolverException):
+    pass
+
+
+@attributes
+class CNF(object):
+    """ A problem read from a DIMACS file.
+
+    Attributes
+    ----------
+    n_variables : int
+        The number of variables declared in the header.
+    clauses : list of list of int
+        The clauses, as lists of literals.
+    key : dict
+        A mapping from variables to the description of their package, from
+        the key comments.
+    """
+    n_variables = attr()
+    clauses = attr()
+    key = attr()
+
+
+def _clause_literals(clause):
+    return getattr(clause, "lits", clause)
+
+
+def write_dimacs(fp, clauses, n_variables=None, key=None, comments=()):
+    """ Write clauses to the text file `fp` in DIMACS format.
+
+    Parameters
+    ----------
+    fp : file-like object
+        A text file to write to.
+    clauses : sequence of Clause or sequence of lists of int
+        The clauses to write.
+    n_variables : int, optional
+        The highest variable, declared in the header. Computed from the
+        clauses if not given.
+    key : iterable of (int, str) pairs, optional
+        The description of the package of some variables, written as key
+        comments.
+    comments : iterable of str, optional
+        Other comment lines, written first.
+    """
+    if n_variables is None:
+        n_variables = max(itertools.chain([0], (
+            abs(lit) for clause in clauses
+            for lit in _clause_literals(clause))))
+
+    for comment in comments:
+        fp.write(u"c {}\n".format(comment))
+    if key is not None:
+        for variable, description in key:
+            fp.write(u"c {} {} {}\n".format(KEY_COMMENT, variable,
+                                            description))
+    fp.write(u"p cnf {} {}\n".format(n_variables, len(clauses)))
+    for clause in clauses:
+        literals = _clause_literals(clause)
+        fp.write(u" ".join(six.text_type(lit) for lit in literals))
+        fp.write(u" 0\n" if literals else u"0\n")
+
+
+def pool_key(pool, package_ids=None):
+    """ Yield the (variable, description) pairs describing the packages of
+    `pool`, to be written with :func:`write_dimacs`.
+
+    Parameters
+    ----------
+    pool : Pool
+        The pool whose package ids are the variables.
+    package_ids : iterable of int, optional
+        The package ids to describe. Defaults to all the packages of the pool.
+    """
+    if package_ids is None:
+        package_ids = pool.package_ids
+    for package_id in sorted(package_ids):
+        package = pool.id_to_package(package_id)
+        yield package_id, u"{} {}".format(package.name, package.version)
+
+
+def iter_dimacs(fp, key=None, header=None):
+    """ Yield the clauses of a DIMACS file, as lists of literals.
+
+    Parameters
+    ----------
+    fp : file-like object
+        A text file to read from.
+    key : dict, optional
+        If given, it is updated with the key comments as they are read.
+    header : dict, optional
+        If given, the "n_variables" and "n_clauses" of the problem line are
+        stored in it once read.
+
+    Raises
+    ------
+    DimacsError
+        If the file is not valid DIMACS.
+    """
+    clause = []
+    seen_header = False
+    for lineno, line in enumerate(fp, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("c"):
+            if key is not None:
+                words = line.split(None, 3)
+                if len(words) == 4 and words[1] == KEY_COMMENT:
+                    try:
+                        key[int(words[2])] = words[3]
+                    except ValueError:
+                        pass
+            continue
+        if line.startswith("p"):
+            if seen_header:
+                raise DimacsError(
+                    "Line {}: duplicate problem line".format(lineno))
+            words = line.split()
+            if len(words) != 4 or words[1] != "cnf":
+                raise DimacsError(
+                    "Line {}: invalid problem line {!r}".format(lineno, line))
+            if header is not None:
+                header["n_variables"] = int(words[2])
+                header["n_clauses"] = int(words[3])
+            seen_header = True
+            continue
+        if line.startswith("%"):
+            # Some benchmark files end with a "%" line.
+            break
+        if not seen_header:
+            raise DimacsError(
+                "Line {}: clause before the problem line".format(lineno))
+        for word in line.split():
+            try:
+                literal = int(word)
+            except ValueError:
+                raise DimacsError(
+                    "Line {}: invalid literal {!r}".format(lineno, word))
+            if literal == 0:
+                yield clause
+                clause = []
+            else:
+                clause.append(literal)
+    if clause:
+        yield clause
+
+
+def read_dimacs(fp):
+    """ Return the :class:`CNF` problem read from a DIMACS file.
+
+    Parameters
+    ----------
+    fp : file-like object
+        A text file to read from.
+    """
+    key = {}
+    header = {}
+    clauses = list(iter_dimacs(fp, key=key, header=header))
+    if not header:
+        raise DimacsError("Missing problem line")
+    if header["n_clauses"] != len(clauses):
+        raise DimacsError("Expected {} clauses, found {}".format(
+            header["n_clauses"], len(clauses)))
+    return CNF(header["n_variables"], clauses, key)
+
+
+def read_dimacs_solution(fp):
+    """ Return the model written by a SAT solver, as a list of literals, or
+    None if the problem is unsatisfiable.
+
+    Both the output file of minisat (``SAT`` followed by the literals) and the
+    SAT competition output (``s SATISFIABLE`` followed by ``v`` lines) are
+    understood.
+
+    Raises
+    ------
+    DimacsError
+        If the output does not give a result.
+    """
+    status = None
+    literals = []
+    for line in fp:
+        words = line.split()
+        if not words or words[0] == "c":
+            continue
+        if words[0] == "s":
+            words = words[1:]
+        elif words[0] == "v":
+            literals.extend(int(word) for word in words[1:])
+            continue
+        if words and words[0] in ("SAT", "SATISFIABLE"):
+            status = True
+        elif words and words[0] in ("UNSAT", "UNSATISFIABLE"):
+            status = False
+        elif words and words[0] in ("INDET", "UNKNOWN"):
+            raise DimacsError("The solver could not find a result")
+        else:
+            literals.extend(int(word) for word in words)
+    if status is None:
+        raise DimacsError("No result in the solver output")
+    if not status:
+        return None
+    return [literal for literal in literals if literal != 0]
@@ -6,17 +6,56 @@ from __future__ import absolute_import
 
 from collections import defaultdict, deque, OrderedDict
 import itertools
+from timeit import default_timer
 
+from attr import attr, attributes
+from attr.validators import instance_of, optional
 from six.moves import range
 
-from simplesat.errors import SatisfiabilityError
+from simplesat.errors import (
+    SatisfiabilityError, SolverBudgetExceeded, SolverInterrupted
+)
 from .assignment_set import AssignmentSet
 from .clause import Clause
+from .preprocess import preprocess_clauses
 from .policy import DefaultPolicy
 from simplesat.utils import timed_context
 from simplesat.utils.graph import breadth_first_search
 
 
+@attributes
+class SearchBudget(object):
+    """
+    Limits on the work done by a single :meth:`MiniSATSolver.search`.
+
+    Each limit is optional, and counts from the start of the search. The
+    search stops as soon as it exceeds any of them.
+
+    Parameters
+    ----------
+    max_conflicts : int, optional
+        The maximum number of conflicts to analyze.
+    max_decisions : int, optional
+        The maximum number of decisions to make.
+    max_propagations : int, optional
+        The maximum number of assignments to propagate.
+    timeout : float, optional
+        The maximum number of seconds to search for.
+
+
+    >>> budget = SearchBudget(max_conflicts=1000, timeout=2.0)
+    >>> solver.search(budget=budget)
+    """
+    max_conflicts = attr(
+        default=None, validator=optional(instance_of(int)))
+    max_decisions = attr(
+        default=None, validator=optional(instance_of(int)))
+    max_propagations = attr(
+        default=None, validator=optional(instance_of(int)))
+    timeout = attr(
+        default=None, validator=optional(instance_of((int, float))))
+
+
 class UNSAT(object):
 
     """An unsatisfiable set of boolean clauses."""
@@ -52,18 +91,32 @@ class UNSAT(object):
         self._clause_requirements = {}
 
         # The a list of lists representing "problems". These are the clauses
-        # that we'll use to construct our paths, one per problem.
+        # that we'll use to construct our paths, one per problem. They are
+        # only computed when the conflict is explained, since callers often
+        # only need to know that there is one.
         self._conflict_details = []
-        self._conflict_paths = []
+        self._lazy_conflict_paths = None
 
-        self._find_requirement_time = None
+        self._find_requirement_time = timed_context("Find Requirements")
+
+    @property
+    def _conflict_paths(self):
+        if self._lazy_conflict_paths is None:
+            self._lazy_conflict_paths = self._explain()
+        return self._lazy_conflict_paths
+
+    def _explain(self):
+        """ Return the paths of clauses which explain the conflict. """
+        learned_clause = self._learned_clause
+        conflict_clause = self._conflict_clause
         with timed_context("Find Requirements") as self._find_requirement_time:
             # We'll look at the chain of clauses that led us to assign the
             # original value and then the chain of clauses that led us to want
             # to assign the opposite value
             assert len(learned_clause.lits) == 1
             self._implicand = -learned_clause[0]
-            self._implicand_clause = assigning_clauses[abs(self._implicand)]
+            self._implicand_clause = self._assigning_clauses[
+                abs(self._implicand)]
             assert self._implicand_clause is not None
 
             # The clauses that led us to our first assignment
@@ -83,8 +136,7 @@ class UNSAT(object):
         # conflict(s).
         clauses = self._conflict_details
         end_clauses = self._end_clauses(clauses, implicand=self._implicand)
-        paths = self._find_conflict_paths(end_clauses, clauses)
-        self._conflict_paths.extend(paths)
+        return list(self._find_conflict_paths(end_clauses, clauses))
 
     def _key(self, clause):
         return tuple(sorted(l for l in clause.lits))
@@ -105,11 +157,20 @@ class UNSAT(object):
                 lit_to_clauses[abs(lit)].add(c)
         lit_to_clauses = dict(lit_to_clauses)
 
+        # The searches from each end clause expand the same clauses, so the
+        # neighbors of each clause are only computed once.
+        neighbors = {}
+
         def get_neighbors(clause):
             """ Return the set of clauses which have at least one variable in
             common with this one. """
-            clause_sets = (lit_to_clauses[abs(lit)] for lit in clause)
-            return sorted(set.union(*clause_sets), key=lambda c: c.lits)
+            try:
+                return neighbors[clause]
+            except KeyError:
+                clause_sets = (lit_to_clauses[abs(lit)] for lit in clause)
+                result = neighbors[clause] = sorted(
+                    set.union(*clause_sets), key=lambda c: c.lits)
+                return result
 
         # If there aren't two end points then none of this makes any sense.
         # Just return what we have.
@@ -180,59 +241,55 @@ class UNSAT(object):
         return tuple(OrderedDict.fromkeys(
             rule._requirements[0] for rule in self.rules))
 
-    def clause_requirements(self, clause, ignore=None):
+    def clause_requirements(self, clause):
         """
-        Return the user requirements that led to the creation of `clause`.
-
-        If the clause hasn't been requested before, we search it and its
-        parents recursively.
+        Return the clauses coming from user requirements that led to the
+        creation of `clause`: the clause itself if it does, then those of its
+        flattened trail.
         """
-        ignore = ignore or set()
-        if clause in ignore:
-            return []
-        ignore.add(clause)
         if clause not in self._clause_requirements:
-            # We haven't searched this clause before. Do so now.
-            reqs = []
-            if clause.rule and clause.rule._requirements:
-                # This clause came directly from a rule that came from a
-                # user requirement.
-                reqs.append(clause)
-            if clause.learned:
-                # This clause is a learned synthesis of many other clauses. We
-                # must follow them to find their requirements.
-                trail = self.clause_trail(clause)
-                reqs.extend(r for c in trail
-                            for r in self.clause_requirements(c, ignore))
-            # Memoize our result to avoid combinatorial explosion on recursive
-            # calls
+            clauses = itertools.chain((clause,), self.clause_trail(clause))
+            reqs = [c for c in clauses if c.rule and c.rule._requirements]
             self._clause_requirements[clause] = reqs
         return self._clause_requirements[clause]
 
-    def clause_trail(self, clause, ignore=None):
+    def clause_trail(self, clause):
         """
         Return the entire flattened list of clauses in this clause's trail.
 
         A learned clause has a "trail" of clauses which led to the learned
         clause being created. Clauses in this trail might also be learned
-        clauses. This method recursively builds up all of non-learned clauses
-        found by expanding and concatenating these trails.
+        clauses. This method builds up the list of the non-learned clauses
+        found by expanding these trails depth first, keeping only the first
+        occurrence of each.
+
+        The trails of learned clauses form a DAG, which is walked once
+        without recursion, visiting each learned clause a single time and
+        keeping only the non-learned clauses.
         """
-        ignore = ignore or set()
-        if clause in ignore:
+        flat_trails = self._flat_clause_trails
+        if clause in flat_trails:
+            return flat_trails[clause]
+        if not clause.learned:
             return []
-        ignore.add(clause)
-        if clause not in self._flat_clause_trails:
-            flat_trail = []
-            if clause.learned:
-                for t_clause in self._clause_trails[clause]:
-                    if t_clause.learned:
-                        flat_trail.extend(self.clause_trail(t_clause, ignore))
-                    else:
-                        flat_trail.append(t_clause)
-                    ignore.add(t_clause)
-            self._flat_clause_trails[clause] = flat_trail
-        return self._flat_clause_trails[clause]
+
+        trails = self._clause_trails
+        visited = set([clause])
+        flat_trail = []
+        stack = [iter(trails[clause])]
+        while stack:
+            for child in stack[-1]:
+                if child in visited:
+                    continue
+                visited.add(child)
+                if child.learned:
+                    stack.append(iter(trails[child]))
+                    break
+                flat_trail.append(child)
+            else:
+                stack.pop()
+        flat_trails[clause] = flat_trail
+        return flat_trail
 
     def to_string(self, pool=None):
         # Build a string description of each conflict we've found
@@ -264,7 +321,8 @@ class UNSAT(object):
 
 class MiniSATSolver(object):
     @classmethod
-    def from_rules(cls, rules, policy=None):
+    def from_rules(cls, rules, policy=None, stats=None, preprocess=False,
+                   frozen=()):
         """
         Construct a SAT solver from a rules generator.
 
@@ -273,19 +331,36 @@ class MiniSATSolver(object):
         rules: RulesGenerator
         policy: IPolicy
             The policy to use for this SAT solver.
+        stats: SolverStats
+            If given, the statistics to fill while searching.
+        preprocess: bool
+            If True, simplify the clauses with
+            :func:`~simplesat.sat.preprocess.preprocess_clauses` first.
+        frozen: iterable of int
+            The variables the simplifications must leave to the search, when
+            preprocessing.
 
         Returns
         -------
         solver: MiniSATSolver.
 
         """
-        solver = cls(policy)
-        for rule in rules:
-            solver.add_clause(rule.literals, rule=rule)
+        solver = cls(policy, stats=stats)
+        clauses = [Clause(rule.literals, rule=rule) for rule in rules]
+        if preprocess:
+            variables = set(abs(lit) for clause in clauses
+                            for lit in clause.lits)
+            clauses, trails = preprocess_clauses(clauses, frozen=frozen)
+            solver.clause_trails.update(trails)
+            # Frozen variables may be left in no clause.
+            for variable in variables:
+                solver.assignments[variable] = None
+        for clause in clauses:
+            solver.add_clause(clause)
         solver._setup_assignments()
         return solver
 
-    def __init__(self, policy=None):
+    def __init__(self, policy=None, stats=None):
 
         self.clauses = []
         self.watches = defaultdict(list)
@@ -316,6 +391,14 @@ class MiniSATSolver(object):
         # Whether the system is satisfiable.
         self.status = None
 
+        # Work done so far, as limited by SearchBudget.
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+        # Detailed statistics, only collected when requested.
+        self.stats = stats
+
         self._policy = policy or DefaultPolicy()
 
     def add_clause(self, clause, rule=None):
@@ -367,10 +450,14 @@ class MiniSATSolver(object):
                 assignments[variable] = None
 
     def propagate(self):
+        stats = self.stats
         while len(self.prop_queue) > 0:
             lit = self.prop_queue.popleft()
+            self.propagations += 1
             clauses = self.watches[lit]
             self.watches[lit] = []
+            if stats is not None:
+                stats.watch_visits += len(clauses)
 
             while len(clauses) > 0:
                 clause = clauses.pop()
@@ -389,6 +476,8 @@ class MiniSATSolver(object):
                         self.prop_queue.clear()
                         for remaining in clauses:
                             self.watches[lit].append(remaining)
+                        if stats is not None:
+                            stats.watch_visits -= len(clauses)
                         return clause
                     else:
                         # Non-conflicting unit literal.
@@ -419,11 +508,45 @@ class MiniSATSolver(object):
             self.assigning_clauses[abs(lit)] = cause
             return True
 
-    def search(self):
+    def search(self, stop_event=None, budget=None):
         """ Return next solution or Raise SatisfiabilityError if unsatisfiable.
+
+        Parameters
+        ----------
+        stop_event : threading.Event, optional
+            If given, the search is abandoned once the event is set, raising
+            SolverInterrupted with the current statistics.
+        budget : SearchBudget, optional
+            If given, the search is abandoned once any of its limits is
+            reached, raising SolverBudgetExceeded with the current
+            statistics.
         """
+        if self.stats is None:
+            return self._search(stop_event, budget)
+
+        stats = self.stats
+        counters = (self.conflicts, self.decisions, self.propagations)
+        start = default_timer()
+        try:
+            return self._search(stop_event, budget)
+        finally:
+            stats.search_time += default_timer() - start
+            stats.conflicts += self.conflicts - counters[0]
+            stats.decisions += self.decisions - counters[1]
+            stats.propagations += self.propagations - counters[2]
+
+    def _search(self, stop_event, budget):
+        stats = self.stats
         root_level = self.decision_level
+        if budget is not None:
+            limits = self._budget_limits(budget)
         while True:
+            if stop_event is not None and stop_event.is_set():
+                raise SolverInterrupted(
+                    "SAT search interrupted", self.statistics())
+            if budget is not None:
+                self._check_budget(limits)
+
             conflict_clause = self.propagate()
             if conflict_clause is None:
                 if self.number_assigned == self.number_variables:
@@ -431,14 +554,24 @@ class MiniSATSolver(object):
                     return self.assignments.copy()  # Do something better...
                 else:
                     # New variable decision.
-                    p = self._policy.get_next_package_id(
-                        self.assignments,
-                        self.clauses,
-                    )
-
+                    if stats is None:
+                        p = self._policy.get_next_package_id(
+                            self.assignments,
+                            self.clauses,
+                        )
+                    else:
+                        start = default_timer()
+                        p = self._policy.get_next_package_id(
+                            self.assignments,
+                            self.clauses,
+                        )
+                        stats.policy_time += default_timer() - start
+
+                    self.decisions += 1
                     self.assume(p)
             else:
                 # Conflict!
+                self.conflicts += 1
                 learned_clause, bt_level = self.analyze(conflict_clause)
                 if root_level == self.decision_level:
                     conflict = UNSAT(
@@ -450,6 +583,30 @@ class MiniSATSolver(object):
                 self.cancel_until(max(bt_level, root_level))
                 self.record(learned_clause)
 
+    def _budget_limits(self, budget):
+        """ Return the (name, counter, limit) triples of the budget, with the
+        limits made absolute.
+        """
+        limits = []
+        for name, limit in (("conflicts", budget.max_conflicts),
+                            ("decisions", budget.max_decisions),
+                            ("propagations", budget.max_propagations)):
+            if limit is not None:
+                limits.append((name, limit + getattr(self, name)))
+        if budget.timeout is not None:
+            limits.append(("timeout", default_timer() + budget.timeout))
+        return limits
+
+    def _check_budget(self, limits):
+        for name, limit in limits:
+            if name == "timeout":
+                exceeded = default_timer() > limit
+            else:
+                exceeded = getattr(self, name) > limit
+            if exceeded:
+                msg = "SAT search exceeded its {} budget".format(name)
+                raise SolverBudgetExceeded(msg, self.statistics(), name)
+
     def validate(self, solution_map):
         """Check whether a given set of assignments solves this SAT problem.
         """
@@ -510,6 +667,13 @@ class MiniSATSolver(object):
 
         learned_lits.append(-p)  # At this point p is the UIP.
         learned = Clause(learned_lits, learned=True)
+
+        stats = self.stats
+        if stats is not None:
+            size = len(learned_lits)
+            stats.learned_clauses += 1
+            stats.learned_literals += size
+            stats.max_learned_size = max(stats.max_learned_size, size)
         self.clause_trails[learned] = clause_trail
         return learned, btlevel
 
@@ -562,6 +726,25 @@ class MiniSATSolver(object):
         self.trail_lim.append(len(self.trail))  # FIXME: This is fishy.
         return self.enqueue(lit, cause=cause)
 
+    def statistics(self):
+        """ Return a dict describing the current state of the search.
+
+        When the solver collects a :class:`SolverStats`, its counters are
+        included too.
+        """
+        statistics = {} if self.stats is None else self.stats.asdict()
+        statistics.update({
+            "variables": self.number_variables,
+            "assigned": self.number_assigned,
+            "clauses": len(self.clauses),
+            "learned_clauses": len(self.clause_trails),
+            "decision_level": self.decision_level,
+            "conflicts": self.conflicts,
+            "decisions": self.decisions,
+            "propagations": self.propagations,
+        })
+        return statistics
+
     @property
     def number_assigned(self):
         """ Return the number of currently assigned variables.
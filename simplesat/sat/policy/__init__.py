@@ -5,4 +5,6 @@ from .undetermined_clause_policy import (
     LoggedUndeterminedClausePolicy, UndeterminedClausePolicy
 )
 
-InstalledFirstPolicy = LoggedUndeterminedClausePolicy
+InstalledFirstPolicy = UndeterminedClausePolicy
+# Records every decision and assignment change, for debugging reports.
+LoggedInstalledFirstPolicy = LoggedUndeterminedClausePolicy
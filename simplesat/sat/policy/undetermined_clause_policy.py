@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import itertools
+
 import six
 
 from .policy import IPolicy, pkg_id_to_version
@@ -27,8 +29,15 @@ class UndeterminedClausePolicy(IPolicy):
             key=by_version)
 
         self._decision_set = set()
+        # The decision set at the last refresh, sorted by descending version.
+        # The decision set only shrinks until the next refresh, so the best
+        # candidate is the first of these still in it, and the ones before it
+        # can be skipped for good.
+        self._decision_order = []
+        self._decision_index = 0
         self._requirements = set()
-        self._all_ids = set()
+        self._all_ids = set(self._prefer_installed_pkg_ids)
+        self._n_clauses_seen = 0
 
     def add_requirements(self, package_ids):
         self._requirements.update(package_ids)
@@ -49,11 +58,11 @@ class UndeterminedClausePolicy(IPolicy):
             candidate_id = best(self._requirements, assignments)
 
         if candidate_id is None:
-            candidate_id = best(self._decision_set, assignments, update=True)
+            candidate_id = self._best_decision_candidate(assignments)
 
         if candidate_id is None:
             self._refresh_decision_set(assignments, clauses)
-            candidate_id = best(self._decision_set, assignments)
+            candidate_id = self._best_decision_candidate(assignments)
 
         if candidate_id is None:
             candidate_id = best(self._all_ids, assignments)
@@ -71,35 +80,57 @@ class UndeterminedClausePolicy(IPolicy):
             if p_id not in assignments.assigned_ids:
                 return p_id
 
-    def _best_candidate(self, package_ids, assignments, update=False):
+    def _best_candidate(self, package_ids, assignments):
         by_version = six.functools.partial(pkg_id_to_version, self._pool)
         unassigned = self._without_assigned(package_ids, assignments)
-        if update:
-            package_ids.clear()
-            package_ids.update(unassigned)
         try:
             return max(unassigned, key=by_version)
         except ValueError:
             return None
 
+    def _best_decision_candidate(self, assignments):
+        """ Drop the assigned packages from the decision set for good, and
+        return the most recent of the others.
+        """
+        decision_set = self._without_assigned(self._decision_set, assignments)
+        self._decision_set = decision_set
+
+        order = self._decision_order
+        index = self._decision_index
+        while index < len(order) and order[index] not in decision_set:
+            index += 1
+        self._decision_index = index
+        if index < len(order):
+            return order[index]
+        return None
+
     def _refresh_decision_set(self, assignments, clauses):
         assignments.consume_changelog()
 
-        all_ids = {abs(l) for c in clauses for l in c.lits}
-        all_ids.update(self._prefer_installed_pkg_ids)
-        self._all_ids = all_ids
+        # Clauses are only ever appended, so only the new ones may bring new
+        # package ids.
+        new_clauses = itertools.islice(clauses, self._n_clauses_seen, None)
+        self._all_ids.update(abs(l) for c in new_clauses for l in c.lits)
+        self._n_clauses_seen = len(clauses)
 
-        unsatisfied_clauses = {
-            clause for clause in clauses
-            if not any(assignments.value(l) for l in clause.lits)
+        value = assignments.value
+        true_literals = {
+            package_id if value(package_id) else -package_id
+            for package_id in assignments.assigned_ids
         }
-        self._decision_set.clear()
-        self._decision_set.update(
-            abs(lit)
-            for clause in unsatisfied_clauses
-            for lit in clause.lits
-        )
-        self._decision_set.difference_update(assignments.assigned_ids)
+        unsatisfied_literals = set(itertools.chain.from_iterable(
+            clause.lits for clause in clauses
+            if true_literals.isdisjoint(clause.lits)
+        ))
+        decision_set = {abs(lit) for lit in unsatisfied_literals}
+        decision_set.difference_update(assignments.assigned_ids)
+        self._decision_set = decision_set
+
+        # Break ties between equal versions by the lowest package id.
+        by_version = six.functools.partial(pkg_id_to_version, self._pool)
+        self._decision_order = sorted(
+            sorted(decision_set), key=by_version, reverse=True)
+        self._decision_index = 0
 
 
 LoggedUndeterminedClausePolicy = LoggedPolicy(UndeterminedClausePolicy)
@@ -0,0 +1,171 @@
+"""
+Simplify the clauses of a problem before the search.
+
+The simplifications keep the problem equivalent for the search:
+
+* tautologies and duplicate clauses are dropped,
+* unit clauses are propagated: the clauses they satisfy are dropped, and
+  the literals they falsify are removed from the other clauses,
+* clauses subsumed by another one are dropped,
+* clauses are strengthened by self-subsuming resolution: if ``C = a | b``
+  and ``D = -a | b | c``, ``D`` becomes ``b | c``.
+
+Variables are not eliminated, even when they only appear negated: the
+policy may still install such a package, e.g. to upgrade an installed one.
+
+A clause made by removing literals from another one is a learned clause,
+whose trail holds the clauses it was derived from, so that :class:`UNSAT`
+explanations still lead back to the rules given by the user.
+"""
+from __future__ import absolute_import
+
+from collections import defaultdict
+
+from .clause import Clause
+
+
+class _Conflict(Exception):
+    pass
+
+
+class _Simplifier(object):
+
+    def __init__(self):
+        self.trails = {}
+        # The position of each clause in the output, inherited by the clauses
+        # derived from it.
+        self.position = {}
+        self.literals = {}
+        self.occurrences = defaultdict(set)
+        self.values = {}
+        self.units = []
+        self.queue = []
+
+    def add(self, clause, position):
+        literals = frozenset(clause.lits)
+        self.position[clause] = position
+        self.literals[clause] = literals
+        for lit in literals:
+            self.occurrences[lit].add(clause)
+        if len(literals) == 1:
+            self.units.append(clause)
+        else:
+            self.queue.append(clause)
+
+    def remove(self, clause):
+        for lit in self.literals.pop(clause):
+            self.occurrences[lit].discard(clause)
+
+    def derive(self, clause, removed_lit, reason):
+        """ Replace `clause` by a copy without `removed_lit`, derived from
+        `clause` and `reason`.
+        """
+        lits = [lit for lit in clause.lits if lit != removed_lit]
+        if not lits:
+            raise _Conflict()
+        derived = Clause(lits, learned=True)
+        self.trails[derived] = [clause, reason]
+        position = self.position[clause]
+        self.remove(clause)
+        self.add(derived, position)
+        return derived
+
+    def propagate_units(self):
+        while self.units:
+            clause = self.units.pop()
+            if clause not in self.literals:
+                continue
+            lit, = self.literals[clause]
+            value = self.values.get(abs(lit))
+            if value is not None:
+                if value != (lit > 0):
+                    raise _Conflict()
+                # Another unit clause already sets this literal.
+                self.remove(clause)
+                continue
+            self.values[abs(lit)] = lit > 0
+            for satisfied in list(self.occurrences[lit]):
+                if satisfied is not clause:
+                    self.remove(satisfied)
+            for falsified in list(self.occurrences[-lit]):
+                self.derive(falsified, -lit, clause)
+
+    def subsume(self):
+        """ Drop the clauses subsumed by others, and strengthen clauses by
+        self-subsuming resolution, smallest clauses first.
+        """
+        queue = sorted(self.queue, key=lambda c: len(c.lits), reverse=True)
+        self.queue = []
+        while queue:
+            clause = queue.pop()
+            literals = self.literals.get(clause)
+            if literals is None or len(literals) < 2:
+                continue
+            occurrences = self.occurrences
+            rarest = min(literals, key=lambda lit: len(occurrences[lit]))
+            for other in list(occurrences[rarest]):
+                if other is not clause and literals <= self.literals[other]:
+                    self.remove(other)
+            for lit in literals:
+                rest = literals - frozenset((lit,))
+                for other in list(occurrences[-lit]):
+                    if rest <= self.literals[other]:
+                        derived = self.derive(other, -lit, clause)
+                        queue.append(derived)
+            if self.units:
+                self.propagate_units()
+            queue.extend(self.queue)
+            self.queue = []
+
+
+def preprocess_clauses(clauses, frozen=()):
+    """ Return simplified clauses equivalent to `clauses` for the search.
+
+    Parameters
+    ----------
+    clauses : list of Clause
+        The clauses to simplify.
+    frozen : iterable of int, optional
+        Variables which must be left for the search to decide, even if they
+        end up in no clause, e.g. the ids of installed packages, which the
+        policy decides first.
+
+    Returns
+    -------
+    clauses : list of Clause
+        The simplified clauses, in the order of the clauses they come from.
+        The variables left in no clause and not frozen are set to false by
+        unit clauses.
+    trails : dict
+        The clauses each derived clause comes from, to be added to the
+        solver's clause trails.
+
+    If the simplifications find a conflict, the clauses are returned as they
+    are, so that the search finds it again and explains it.
+    """
+    frozen = frozenset(frozen)
+    simplifier = _Simplifier()
+    variables = set()
+    seen = set()
+    for position, clause in enumerate(clauses):
+        literals = frozenset(clause.lits)
+        variables.update(abs(lit) for lit in literals)
+        if literals in seen or any(-lit in literals for lit in literals):
+            continue
+        seen.add(literals)
+        simplifier.add(clause, position)
+
+    try:
+        simplifier.propagate_units()
+        simplifier.subsume()
+    except _Conflict:
+        return list(clauses), {}
+
+    result = sorted(simplifier.literals, key=simplifier.position.get)
+    present = set(abs(lit) for clause in result for lit in clause.lits)
+    for variable in sorted(variables - present - frozen):
+        # Left in no clause, so the policy would not find it.
+        unit = Clause([-variable], learned=True)
+        simplifier.trails[unit] = []
+        result.append(unit)
+    return result, simplifier.trails
@@ -0,0 +1,70 @@
+from attr import attr, attributes, asdict
+
+
+@attributes
+class SolverStats(object):
+    """
+    Counters describing the work done by a :class:`MiniSATSolver`.
+
+    The solver only fills them when given a ``SolverStats`` instance, so that
+    the hot paths of the search don't pay for them otherwise. They accumulate
+    over every search made by the solver.
+
+    Attributes
+    ----------
+    conflicts : int
+        The number of conflicts analyzed.
+    decisions : int
+        The number of decisions made.
+    propagations : int
+        The number of assignments propagated.
+    watch_visits : int
+        The number of clauses visited in the watch lists while propagating.
+    learned_clauses : int
+        The number of clauses learned from conflicts.
+    learned_literals : int
+        The total number of literals in the learned clauses.
+    max_learned_size : int
+        The number of literals in the largest learned clause.
+    policy_time : float
+        The time spent choosing decisions, in seconds.
+    search_time : float
+        The time spent searching, in seconds.
+
+
+    >>> stats = SolverStats()
+    >>> solver = MiniSATSolver.from_rules(rules, policy, stats=stats)
+    >>> solver.search()
+    >>> json.dumps(stats.asdict())
+    """
+    conflicts = attr(default=0)
+    decisions = attr(default=0)
+    propagations = attr(default=0)
+    watch_visits = attr(default=0)
+    learned_clauses = attr(default=0)
+    learned_literals = attr(default=0)
+    max_learned_size = attr(default=0)
+    policy_time = attr(default=0.0)
+    search_time = attr(default=0.0)
+
+    @property
+    def mean_learned_size(self):
+        """ The mean number of literals in the learned clauses. """
+        if self.learned_clauses == 0:
+            return 0.0
+        return self.learned_literals / float(self.learned_clauses)
+
+    def update(self, other):
+        """ Add the counters of `other`, e.g. from a search made in another
+        process, to these ones.
+        """
+        for name in ("conflicts", "decisions", "propagations", "watch_visits",
+                     "learned_clauses", "learned_literals", "policy_time",
+                     "search_time"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.max_learned_size = max(
+            self.max_learned_size, other.max_learned_size)
+
+    def asdict(self):
+        """ Return the counters as a dict of plain numbers. """
+        return asdict(self)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+import threading
+import unittest
+
+from simplesat.errors import (
+    SatisfiabilityError, SolverBudgetExceeded, SolverInterrupted
+)
+from simplesat.rules_generator import PackageRule, RuleType
+
+from ..backends import MiniSATBackend, SubprocessBackend
+from ..minisat import SearchBudget
+
+
+# A brute force solver for tiny problems, printing its result like SAT
+# competition solvers do.
+FAKE_SOLVER = textwrap.dedent("""
+    import itertools
+    import sys
+
+    clauses = []
+    with open(sys.argv[1]) as fp:
+        for line in fp:
+            if line[0] not in "cp":
+                clauses.append([int(w) for w in line.split()[:-1]])
+    variables = sorted(set(abs(l) for c in clauses for l in c))
+    for values in itertools.product((True, False), repeat=len(variables)):
+        model = dict(zip(variables, values))
+        if all(any(model[abs(l)] == (l > 0) for l in c) for c in clauses):
+            print("s SATISFIABLE")
+            print("v " + " ".join(
+                str(v if model[v] else -v) for v in variables) + " 0")
+            break
+    else:
+        print("s UNSATISFIABLE")
+""")
+
+
+def _rules(clauses):
+    return [PackageRule(clause, RuleType.job_install) for clause in clauses]
+
+
+class TestBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.solver_path = os.path.join(self.directory, "solver.py")
+        with open(self.solver_path, "w") as fp:
+            fp.write(FAKE_SOLVER)
+        self.backend = SubprocessBackend(
+            [sys.executable, self.solver_path, "{input}"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_subprocess_satisfiable(self):
+        # Given
+        rules = _rules([[1, 2], [-1], [-2, 3]])
+
+        # When
+        solution = self.backend.solve(rules)
+
+        # Then
+        self.assertEqual({1: False, 2: True, 3: True}, solution.to_dict())
+        self.assertEqual(
+            solution.to_dict(), MiniSATBackend().solve(rules).to_dict())
+
+    def test_subprocess_unsatisfiable(self):
+        # Given
+        rules = _rules([[1, 2], [-1], [-2]])
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityError):
+            self.backend.solve(rules)
+
+    def test_subprocess_unsatisfiable_budget(self):
+        # Given
+        rules = _rules([[1, 2], [1, -2], [-1, 2], [-1, -2]])
+        budget = SearchBudget(max_conflicts=0, timeout=60)
+
+        # When/Then
+        with self.assertRaises(SolverBudgetExceeded):
+            self.backend.solve(rules, budget=budget)
+
+    def test_subprocess_stop_event(self):
+        # Given
+        rules = _rules([[1, 2]])
+        backend = SubprocessBackend(
+            [sys.executable, "-c", "import time; time.sleep(60)"])
+        stop_event = threading.Event()
+        stop_event.set()
+
+        # When/Then
+        with self.assertRaises(SolverInterrupted):
+            backend.solve(rules, stop_event=stop_event)
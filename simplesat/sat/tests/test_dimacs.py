@@ -0,0 +1,93 @@
+import unittest
+
+import six
+from okonomiyaki.versions import EnpkgVersion
+
+from simplesat.constraints import PrettyPackageStringParser
+from simplesat.pool import Pool
+from simplesat.repository import Repository
+
+from ..clause import Clause
+from ..dimacs import (
+    DimacsError, iter_dimacs, pool_key, read_dimacs, read_dimacs_solution,
+    write_dimacs
+)
+
+
+P = PrettyPackageStringParser(EnpkgVersion.from_string).parse_to_package
+
+
+class TestDimacs(unittest.TestCase):
+
+    def test_round_trip(self):
+        # Given
+        clauses = [Clause([1, -2]), Clause([2, 3, -4]), Clause([-1])]
+        fp = six.StringIO()
+
+        # When
+        write_dimacs(fp, clauses, key=[(1, u"numpy 1.9.2-1")],
+                     comments=[u"generated"])
+        fp.seek(0)
+        cnf = read_dimacs(fp)
+
+        # Then
+        self.assertEqual(4, cnf.n_variables)
+        self.assertEqual([[1, -2], [2, 3, -4], [-1]], cnf.clauses)
+        self.assertEqual({1: u"numpy 1.9.2-1"}, cnf.key)
+        self.assertTrue(fp.getvalue().startswith(
+            u"c generated\nc key 1 numpy 1.9.2-1\np cnf 4 3\n1 -2 0\n"))
+
+    def test_pool_key(self):
+        # Given
+        repository = Repository([P(u"mkl 10.3-1"), P(u"numpy 1.9.2-1")])
+        pool = Pool([repository])
+
+        # When
+        key = list(pool_key(pool))
+
+        # Then
+        self.assertEqual(
+            [(1, u"mkl 10.3-1"), (2, u"numpy 1.9.2-1")], key)
+
+    def test_clauses_across_lines(self):
+        # Given
+        fp = six.StringIO(u"c comment\np cnf 3 2\n1 -2\n 0 2 3 0\n%\n0\n")
+
+        # When
+        clauses = list(iter_dimacs(fp))
+
+        # Then
+        self.assertEqual([[1, -2], [2, 3]], clauses)
+
+    def test_invalid(self):
+        # Given
+        texts = [
+            u"1 2 0\n",
+            u"p cnf 2 1\n1 x 0\n",
+            u"p cnf 2 2\n1 2 0\n",
+            u"p dnf 2 1\n1 2 0\n",
+        ]
+
+        # When/Then
+        for text in texts:
+            with self.assertRaises(DimacsError):
+                read_dimacs(six.StringIO(text))
+
+    def test_read_solution(self):
+        # Given
+        outputs = {
+            u"SAT\n1 -2 3 0\n": [1, -2, 3],
+            u"c kissat\ns SATISFIABLE\nv 1 -2\nv 3 0\n": [1, -2, 3],
+            u"UNSAT\n": None,
+            u"s UNSATISFIABLE\n": None,
+        }
+
+        # When/Then
+        for output, expected in outputs.items():
+            self.assertEqual(
+                expected, read_dimacs_solution(six.StringIO(output)))
+
+        with self.assertRaises(DimacsError):
+            read_dimacs_solution(six.StringIO(u"s UNKNOWN\n"))
+        with self.assertRaises(DimacsError):
+            read_dimacs_solution(six.StringIO(u""))
@@ -1,16 +1,35 @@
+import threading
 import unittest
 
 import mock
 import six
 
+from simplesat.errors import (
+    SatisfiabilityError, SolverBudgetExceeded, SolverInterrupted
+)
+
 from ..assignment_set import AssignmentSet
 from ..clause import Clause
-from ..minisat import MiniSATSolver
+from ..minisat import MiniSATSolver, SearchBudget, UNSAT
+from ..stats import SolverStats
 
 
 # TODO: Move all ZM01 related tests to a separate module.
 
 
+def _pigeonhole_solver(stats=None):
+    """Create a solver for an unsatisfiable problem which needs a search:
+    three pigeons in two holes, pigeon i being in hole j when 2*i+j+1.
+    """
+    s = MiniSATSolver(stats=stats)
+    for clause in ([1, 2], [3, 4], [5, 6],
+                   [-1, -3], [-1, -5], [-3, -5],
+                   [-2, -4], [-2, -6], [-4, -6]):
+        s.add_clause(Clause(clause))
+    s._setup_assignments()
+    return s
+
+
 def zm01_solver(add_conflict=False):
     """Create a solver with a non-trivial implication graph.
 
@@ -546,3 +565,159 @@ class TestMiniSATSolver(unittest.TestCase):
 
         # Then
         self.assertFalse(status)
+
+    def test_unsat_explained_lazily(self):
+        # Given
+        s = _pigeonhole_solver()
+
+        # When
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            s.search()
+
+        # Then
+        unsat = ctx.exception.unsat
+        self.assertIsNone(unsat._lazy_conflict_paths)
+
+        # When
+        message = str(ctx.exception)
+
+        # Then
+        self.assertIsNotNone(unsat._lazy_conflict_paths)
+        self.assertEqual(unsat.to_string(), message)
+
+    def test_clause_trail_deep(self):
+        # Given
+        leaves = [Clause([i, i + 1]) for i in range(1, 5001)]
+        trails = {}
+        learned = None
+        for i, leaf in enumerate(leaves):
+            trail = [leaf] if learned is None else [learned, leaf, leaves[0]]
+            learned = Clause([-i - 1], learned=True)
+            trails[learned] = trail
+        unsat = UNSAT(learned, learned, trails, {})
+
+        # When
+        flat_trail = unsat.clause_trail(learned)
+
+        # Then
+        self.assertEqual(leaves, flat_trail)
+        self.assertEqual([], unsat.clause_trail(leaves[0]))
+
+    def test_clause_trail_shared(self):
+        # Given
+        a, b, c = Clause([1, 2]), Clause([-2, 3]), Clause([-3])
+        left = Clause([1, 3], learned=True)
+        right = Clause([-2], learned=True)
+        top = Clause([1], learned=True)
+        trails = {left: [a, b], right: [b, c], top: [right, left]}
+        unsat = UNSAT(top, top, trails, {})
+
+        # When
+        flat_trail = unsat.clause_trail(top)
+
+        # Then
+        self.assertEqual([b, c, a], flat_trail)
+        self.assertEqual([a, b], unsat.clause_trail(left))
+
+    def test_search_stop_event(self):
+        # Given
+        s = MiniSATSolver()
+        s.add_clause(Clause([1, -2]))
+        s.add_clause(Clause([1, 2, -3]))
+        s._setup_assignments()
+        stop_event = threading.Event()
+        stop_event.set()
+
+        # When/Then
+        with self.assertRaises(SolverInterrupted) as ctx:
+            s.search(stop_event=stop_event)
+
+        # Then
+        statistics = ctx.exception.statistics
+        self.assertEqual(3, statistics["variables"])
+        self.assertEqual(0, statistics["assigned"])
+        self.assertEqual(2, statistics["clauses"])
+
+        # When
+        stop_event.clear()
+        solution = s.search(stop_event=stop_event)
+
+        # Then
+        self.assertTrue(s.validate(solution))
+
+    def test_search_budget(self):
+        # When/Then
+        with self.assertRaises(SatisfiabilityError):
+            _pigeonhole_solver().search(budget=SearchBudget())
+
+        # When/Then
+        with self.assertRaises(SolverBudgetExceeded) as ctx:
+            _pigeonhole_solver().search(budget=SearchBudget(max_conflicts=0))
+
+        # Then
+        self.assertEqual("conflicts", ctx.exception.budget)
+        self.assertEqual(1, ctx.exception.statistics["conflicts"])
+
+        # When/Then
+        with self.assertRaises(SolverBudgetExceeded) as ctx:
+            _pigeonhole_solver().search(budget=SearchBudget(max_decisions=0))
+
+        # Then
+        self.assertEqual("decisions", ctx.exception.budget)
+        self.assertEqual(1, ctx.exception.statistics["decisions"])
+
+        # When/Then
+        with self.assertRaises(SolverBudgetExceeded) as ctx:
+            _pigeonhole_solver().search(
+                budget=SearchBudget(max_propagations=1))
+
+        # Then
+        self.assertEqual("propagations", ctx.exception.budget)
+
+        # When/Then
+        with self.assertRaises(SolverBudgetExceeded) as ctx:
+            _pigeonhole_solver().search(budget=SearchBudget(timeout=-1))
+
+        # Then
+        self.assertEqual("timeout", ctx.exception.budget)
+        self.assertEqual(0, ctx.exception.statistics["propagations"])
+
+    def test_search_stats(self):
+        # Given
+        stats = SolverStats()
+        s = _pigeonhole_solver(stats=stats)
+
+        # When
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+        # Then
+        self.assertEqual(s.conflicts, stats.conflicts)
+        self.assertEqual(s.decisions, stats.decisions)
+        self.assertEqual(s.propagations, stats.propagations)
+        self.assertEqual(stats.conflicts, stats.learned_clauses)
+        self.assertGreater(stats.watch_visits, 0)
+        self.assertGreaterEqual(
+            stats.learned_literals, stats.max_learned_size)
+        self.assertGreater(stats.search_time, 0.0)
+        self.assertEqual(
+            stats.learned_literals / float(stats.learned_clauses),
+            stats.mean_learned_size)
+
+        # When
+        data = stats.asdict()
+
+        # Then
+        self.assertEqual(stats, SolverStats(**data))
+
+    def test_search_without_stats(self):
+        # Given
+        s = _pigeonhole_solver()
+
+        # When
+        with self.assertRaises(SatisfiabilityError):
+            s.search()
+
+        # Then
+        self.assertIsNone(s.stats)
+        self.assertEqual(2, s.conflicts)
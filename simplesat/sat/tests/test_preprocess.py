@@ -0,0 +1,85 @@
+import unittest
+
+from ..clause import Clause
+from ..minisat import UNSAT
+from ..preprocess import preprocess_clauses
+
+
+def _lits(clauses):
+    return [list(clause.lits) for clause in clauses]
+
+
+class TestPreprocessClauses(unittest.TestCase):
+    def test_tautologies_and_duplicates(self):
+        # Given
+        clauses = [Clause([1, 2]), Clause([-1, 1, 3]), Clause([2, 1]),
+                   Clause([-2, 3])]
+
+        # When
+        result, trails = preprocess_clauses(clauses, frozen=[1, 2, 3])
+
+        # Then
+        self.assertEqual([clauses[0], clauses[3]], result)
+        self.assertEqual({}, trails)
+
+    def test_unit_propagation(self):
+        # Given
+        unit = Clause([1])
+        clauses = [unit, Clause([-1, 2, 3]), Clause([1, 4])]
+
+        # When
+        result, trails = preprocess_clauses(clauses)
+
+        # Then
+        self.assertEqual([[1], [2, 3], [-4]], _lits(result))
+        derived = result[1]
+        self.assertTrue(derived.learned)
+        self.assertEqual([clauses[1], unit], trails[derived])
+        self.assertEqual([], trails[result[2]])
+
+    def test_subsumption(self):
+        # Given
+        clauses = [Clause([1, 2, 3]), Clause([-4, 5]), Clause([2, 1])]
+
+        # When
+        result, trails = preprocess_clauses(clauses, frozen=[3])
+
+        # Then
+        self.assertEqual([clauses[1], clauses[2]], result)
+        self.assertEqual({}, trails)
+
+    def test_self_subsuming_resolution(self):
+        # Given
+        clauses = [Clause([-1, 2, 3]), Clause([1, 2])]
+
+        # When
+        result, trails = preprocess_clauses(clauses)
+
+        # Then
+        self.assertEqual([[2, 3], [1, 2]], _lits(result))
+        self.assertEqual(clauses, trails[result[0]])
+
+    def test_derived_clauses_trail_back(self):
+        # Given
+        clauses = [Clause([1]), Clause([-1, 2, 3]), Clause([-2, 3]),
+                   Clause([-3, 4, 5])]
+
+        # When
+        result, trails = preprocess_clauses(clauses, frozen=[2])
+
+        # Then
+        self.assertEqual([[1], [3], [4, 5]], _lits(result))
+        unsat = UNSAT(result[1], result[1], trails, {})
+        self.assertEqual(
+            set(clauses[:3]), set(unsat.clause_trail(result[1])))
+
+    def test_conflict(self):
+        # Given
+        clauses = [Clause([1]), Clause([-1, 2]), Clause([-2, -1])]
+
+        # When
+        result, trails = preprocess_clauses(clauses)
+
+        # Then
+        self.assertEqual(clauses, result)
+        self.assertEqual({}, trails)
@@ -0,0 +1,71 @@
+import unittest
+
+from okonomiyaki.versions import EnpkgVersion
+
+from simplesat.constraints import PrettyPackageStringParser
+from simplesat.pool import Pool
+from simplesat.repository import Repository
+
+from ..assignment_set import AssignmentSet
+from ..clause import Clause
+from ..policy import UndeterminedClausePolicy
+
+
+P = PrettyPackageStringParser(EnpkgVersion.from_string).parse_to_package
+
+
+class TestUndeterminedClausePolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.repository = Repository([
+            P(u"mkl 10.3-1"),
+            P(u"mkl 11.0-1"),
+            P(u"numpy 1.9.2-1"),
+            P(u"scipy 1.9.2-1"),
+        ])
+        self.pool = Pool([self.repository])
+        self.mkl_10, self.mkl_11, self.numpy, self.scipy = (
+            self.pool.package_id(package) for package in self.repository)
+
+    def test_most_recent_first(self):
+        # Given
+        clauses = [
+            Clause([self.mkl_10, self.mkl_11]),
+            Clause([-self.numpy, self.scipy]),
+        ]
+        assignments = AssignmentSet(
+            dict.fromkeys([self.mkl_10, self.mkl_11, self.numpy, self.scipy]))
+        policy = UndeterminedClausePolicy(self.pool, Repository())
+
+        # When
+        suggestions = []
+        for _ in range(4):
+            package_id = policy.get_next_package_id(assignments, clauses)
+            suggestions.append(package_id)
+            assignments[package_id] = False
+
+        # Then
+        # Equal versions are suggested by increasing package id.
+        self.assertEqual(
+            [self.mkl_11, self.mkl_10, self.numpy, self.scipy], suggestions)
+
+    def test_satisfied_clauses_are_skipped(self):
+        # Given
+        clauses = [
+            Clause([self.mkl_10, self.mkl_11]),
+            Clause([self.numpy, self.scipy]),
+        ]
+        assignments = AssignmentSet(
+            dict.fromkeys([self.mkl_10, self.mkl_11, self.numpy, self.scipy]))
+        assignments[self.mkl_10] = True
+        policy = UndeterminedClausePolicy(self.pool, Repository())
+
+        # When
+        first = policy.get_next_package_id(assignments, clauses)
+        assignments[first] = True
+        second = policy.get_next_package_id(assignments, clauses)
+
+        # Then
+        self.assertEqual(self.numpy, first)
+        # Once every clause is satisfied, any unassigned package is suggested.
+        self.assertIn(second, (self.mkl_11, self.scipy))
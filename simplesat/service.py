@@ -0,0 +1,278 @@
+"""
+A long-lived solver which answers a stream of requests against the same
+packages.
+
+Requests and responses are JSON objects, one per line. A request uses the same
+layout as the ``request`` and ``modifiers`` sections of a scenario file::
+
+    {"id": 1,
+     "request": [{"operation": "install", "requirement": "numpy >= 1.8"}],
+     "modifiers": {"allow_newer": ["MKL"]}}
+
+The response to a solvable request lists the operations of the transaction,
+using the layout of the ``transaction`` section of a scenario file::
+
+    {"id": 1, "status": "ok",
+     "operations": [{"kind": "install", "package": "MKL 10.3-1"}, ...],
+     "pretty_operations": [...],
+     "timings": {"rules": 0.01, "solver_init": 0.001, "solve": 0.02,
+                 "total": 0.03},
+     "stats": {"conflicts": 0, "decisions": 12, ...}}
+
+Otherwise, ``status`` is ``"unsatisfiable"`` and ``message`` explains the
+conflict, with the ``stats`` of the failed search, or ``status`` is
+``"error"`` and ``message`` describes what is wrong with the request.
+"""
+from __future__ import absolute_import
+
+import json
+import math
+import os
+
+import six
+from six.moves import socketserver
+
+from simplesat.constraints import InstallRequirement
+from simplesat.dependency_solver import DependencySolver
+from simplesat.errors import SatisfiabilityError, SolverException
+from simplesat.pool import MemoizedPool
+from simplesat.request import Request
+from simplesat.transaction import (
+    InstallOperation, RemoveOperation, UpdateOperation
+)
+from simplesat.utils import timed_context
+
+
+_JOB_OPERATIONS = ("install", "remove", "soft_update", "hard_update")
+_MODIFIER_KINDS = ("allow_newer", "allow_any", "allow_older")
+
+
+def request_from_data(data):
+    """ Return a :class:`Request` from its JSON-like description.
+
+    Parameters
+    ----------
+    data : dict
+        A dict with a ``request`` list of ``{"operation": ...,
+        "requirement": ...}`` jobs and an optional ``modifiers`` dict mapping
+        each kind of modifier to a list of package names.
+
+    Returns
+    -------
+    Request
+        The described request.
+
+    Raises
+    ------
+    ValueError
+        If an operation or modifier is unknown, or if a part of `data` does
+        not have the expected type.
+    """
+    request = Request()
+
+    modifiers = _expect_type(data.get("modifiers", {}), dict, "modifiers")
+    for kind, values in modifiers.items():
+        if kind not in _MODIFIER_KINDS:
+            raise ValueError("Unknown modifier {!r}".format(kind))
+        for value in _expect_type(values, list, kind):
+            getattr(request, kind)(
+                _expect_type(value, six.string_types, "package name"))
+
+    for job in _expect_type(data.get("request", []), list, "request"):
+        job = _expect_type(job, dict, "job")
+        operation = job["operation"]
+        if operation == "upgrade":
+            request.upgrade()
+        elif operation in _JOB_OPERATIONS:
+            requirement_string = _expect_type(
+                job["requirement"], six.string_types, "requirement")
+            requirement = InstallRequirement._from_string(requirement_string)
+            getattr(request, operation)(requirement)
+        else:
+            raise ValueError("Unknown operation {!r}".format(operation))
+
+    return request
+
+
+def _expect_type(value, types, what):
+    if not isinstance(value, types):
+        raise ValueError("Invalid {}: {!r}".format(what, value))
+    return value
+
+
+def _package_string(package):
+    return "{} {}".format(package.name, package.version)
+
+
+def operation_to_data(operation):
+    """ Return the JSON-like description of a transaction operation. """
+    if isinstance(operation, InstallOperation):
+        return {"kind": "install",
+                "package": _package_string(operation.package)}
+    elif isinstance(operation, UpdateOperation):
+        return {"kind": "update",
+                "from": _package_string(operation.source),
+                "to": _package_string(operation.package)}
+    elif isinstance(operation, RemoveOperation):
+        return {"kind": "remove",
+                "package": _package_string(operation.package)}
+    else:
+        msg = "Unknown operation: {!r}".format(operation)
+        raise ValueError(msg)
+
+
+def _elapsed(context):
+    # Phases which did not run have a NaN time, which is not valid JSON.
+    elapsed = context.elapsed
+    return None if math.isnan(elapsed) else elapsed
+
+
+class SolverService(object):
+
+    """
+    Solve a stream of requests against the same packages.
+
+    The pool is built once and remembers the packages satisfying each
+    requirement, so the cost of loading and indexing the packages, and of
+    most of the lookups made while generating rules, is shared by all of the
+    requests.
+
+    Parameters
+    ----------
+    remote_repositories : list of Repository
+        Repositories containing package available for installation.
+    installed_repository : Repository
+        Repository containing the packages which are currently installed.
+    use_pruning : bool, optional
+        Passed on to the :class:`DependencySolver`.
+    strict : bool, optional
+        Passed on to the :class:`DependencySolver`.
+
+
+    >>> scenario = Scenario.from_yaml('numpy.yaml')
+    >>> service = SolverService.from_scenario(scenario)
+    >>> service.serve(sys.stdin, sys.stdout)
+    """
+
+    @classmethod
+    def from_scenario(cls, scenario, **kwargs):
+        """ Create a service for the repositories of a :class:`Scenario`. """
+        return cls(scenario.remote_repositories,
+                   scenario.installed_repository, **kwargs)
+
+    def __init__(self, remote_repositories, installed_repository,
+                 use_pruning=True, strict=False):
+        self._pool = MemoizedPool(remote_repositories)
+        self._pool.add_repository(installed_repository)
+        self._solver = DependencySolver(
+            self._pool, remote_repositories, installed_repository,
+            use_pruning=use_pruning, strict=strict, collect_stats=True)
+
+    @property
+    def pool(self):
+        """ The :class:`Pool` shared by all requests. """
+        return self._pool
+
+    def handle(self, data):
+        """ Solve the request described by `data` and return the response.
+
+        Parameters
+        ----------
+        data : dict
+            The JSON-like description of a request, as described in
+            :mod:`simplesat.service`.
+
+        Returns
+        -------
+        dict
+            The JSON-like response.
+        """
+        response = {"id": data.get("id")}
+        solver = self._solver
+        # A malformed request is never solved, so do not report the timings
+        # of the previous one.
+        solver._reset_timers()
+        with timed_context("Total") as total:
+            try:
+                request = request_from_data(data)
+                transaction = solver.solve(request)
+            except SatisfiabilityError as e:
+                response["status"] = "unsatisfiable"
+                response["message"] = e.unsat.to_string(pool=self._pool)
+                response["requirements"] = [
+                    str(r) for r in e.unsat.requirements]
+                if e.stats is not None:
+                    response["stats"] = e.stats.asdict()
+            except (SolverException, KeyError, ValueError) as e:
+                response["status"] = "error"
+                response["message"] = u"{}: {}".format(
+                    e.__class__.__name__, e)
+            else:
+                response["status"] = "ok"
+                response["operations"] = [
+                    operation_to_data(op) for op in transaction.operations]
+                response["pretty_operations"] = [
+                    operation_to_data(op)
+                    for op in transaction.pretty_operations]
+                response["stats"] = transaction.stats.asdict()
+
+        response["timings"] = {
+            "rules": _elapsed(solver._last_rules_time),
+            "solver_init": _elapsed(solver._last_solver_init_time),
+            "solve": _elapsed(solver._last_solve_time),
+            "total": _elapsed(total),
+        }
+        return response
+
+    def handle_line(self, line):
+        """ Answer one JSON line with one JSON line, without the newline. """
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+        except ValueError as e:
+            response = {"id": None, "status": "error",
+                        "message": "Invalid request: {}".format(e)}
+        else:
+            response = self.handle(data)
+        return json.dumps(response, sort_keys=True)
+
+    def serve(self, input_stream, output_stream):
+        """ Answer each line of `input_stream` on `output_stream` until the
+        input is exhausted.
+
+        Parameters
+        ----------
+        input_stream : file-like object
+            A text stream of JSON requests, one per line. Blank lines are
+            ignored.
+        output_stream : file-like object
+            A text stream to write the JSON responses to, one per line.
+        """
+        for line in iter(input_stream.readline, ''):
+            if line.strip():
+                output_stream.write(self.handle_line(line) + "\n")
+                output_stream.flush()
+
+    def serve_unix_socket(self, path):
+        """ Answer requests sent to the Unix socket at `path`, forever.
+
+        Each connection is a stream of JSON lines, as for :meth:`serve`.
+        Connections are answered one at a time.
+        """
+        service = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in iter(self.rfile.readline, b''):
+                    if line.strip():
+                        response = service.handle_line(line.decode('utf-8'))
+                        self.wfile.write((response + "\n").encode('utf-8'))
+                        self.wfile.flush()
+
+        server = socketserver.UnixStreamServer(path, _Handler)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(path)
@@ -0,0 +1,334 @@
+"""
+Generate large, reproducible package indices to stress-test the solver.
+
+The indices mimic the shape of real channels: a few core packages are
+depended upon by most others, following a Zipf distribution, some packages
+form deep dependency chains or diamonds, older builds pin their dependencies
+with ``^=``, some packages provide virtual packages and some explicitly
+conflict with old versions of others.
+
+The latest build of each package only puts lower bounds on its dependencies,
+and conflicts never exclude the latest builds, so that installing the latest
+build of anything is always possible, even if the solver may have to search
+for it.
+
+Packages are generated one name at a time, so that indices too large to hold
+in memory can be streamed to a scenario file::
+
+    >>> index = SyntheticIndex(n_names=200000, seed=42)
+    >>> with io.open('large.yaml', 'w', encoding='utf-8') as fp:
+    ...     index.write_scenario(fp, index.requirement_strings(5))
+"""
+from __future__ import absolute_import
+
+import bisect
+import random
+
+import six
+from okonomiyaki.versions import EnpkgVersion
+
+from simplesat.constraints.package_parser import package_to_pretty_string
+from simplesat.package import PackageMetadata, RepositoryInfo
+from simplesat.package import RepositoryPackageMetadata
+from simplesat.repository import Repository
+
+
+_REGULAR, _CHAIN, _DIAMOND = range(3)
+
+# The constraint of a dependency on any version, as parsed from a package
+# string.
+_ANY = (("",),)
+
+
+class SyntheticIndex(object):
+    """ A seeded generator of synthetic packages.
+
+    The same parameters and seed always yield the same packages, on a given
+    Python version.
+
+    Parameters
+    ----------
+    n_names : int
+        The number of distinct package names.
+    builds_per_name : int, optional
+        The number of versions of each package.
+    mean_dependencies : float, optional
+        The mean number of dependencies of each package, besides those of
+        chains and diamonds.
+    zipf_exponent : float, optional
+        The exponent of the Zipf distribution of dependency popularity. Higher
+        values concentrate the dependencies on fewer core packages.
+    block_size : int, optional
+        Names are grouped in consecutive blocks of this size, each of which is
+        a chain, a group of diamonds or a regular block. Chains are as deep as
+        the blocks are large.
+    chain_fraction, diamond_fraction : float, optional
+        The fraction of the blocks which are chains and groups of diamonds.
+    pin_probability : float, optional
+        The probability for a dependency of an older build to be pinned with
+        ``^=``.
+    n_virtual : int, optional
+        The number of virtual packages.
+    providers_per_virtual : int, optional
+        The number of package names providing each virtual package.
+    virtual_dependency_probability : float, optional
+        The probability for a package to depend on a virtual package.
+    conflict_probability : float, optional
+        The probability for a package to conflict with older versions of
+        another package.
+    seed : int, optional
+        The seed of the random generators.
+    """
+
+    def __init__(self, n_names, builds_per_name=3, mean_dependencies=3.0,
+                 zipf_exponent=1.1, block_size=20, chain_fraction=0.05,
+                 diamond_fraction=0.05, pin_probability=0.2, n_virtual=10,
+                 providers_per_virtual=3, virtual_dependency_probability=0.02,
+                 conflict_probability=0.01, seed=0):
+        if n_names < 1 or builds_per_name < 1:
+            raise ValueError(
+                "n_names and builds_per_name must be strictly positive")
+        self.n_names = n_names
+        self.builds_per_name = builds_per_name
+        self.mean_dependencies = mean_dependencies
+        self.zipf_exponent = zipf_exponent
+        self.block_size = block_size
+        self.chain_fraction = chain_fraction
+        self.diamond_fraction = diamond_fraction
+        self.pin_probability = pin_probability
+        self.n_virtual = n_virtual
+        self.providers_per_virtual = providers_per_virtual
+        self.virtual_dependency_probability = virtual_dependency_probability
+        self.conflict_probability = conflict_probability
+        self.seed = seed
+
+        # The virtual packages are provided by the first names.
+        self._n_providers = min(n_names, n_virtual * providers_per_virtual)
+        self._name_format = "p{{:0{}d}}".format(len(str(n_names - 1)))
+        self._versions = [
+            "1.{}.0-1".format(build) for build in range(builds_per_name)]
+        self._zipf_cumulative = self._zipf_cumulative_weights()
+        self._version_cache = {}
+
+    def __len__(self):
+        return self.n_names * self.builds_per_name
+
+    def name(self, index):
+        """ The name of the `index`-th package name. """
+        return self._name_format.format(index)
+
+    def virtual_name(self, index):
+        """ The name of the `index`-th virtual package. """
+        return "virtual{}".format(index)
+
+    def requirement_strings(self, count, older=False):
+        """ Return requirements for `count` of the least popular names, which
+        are the last ones.
+
+        Parameters
+        ----------
+        count : int
+            The number of requirements.
+        older : bool, optional
+            If True, require builds older than the latest, whose dependencies
+            may be pinned. Such requests may be unsatisfiable, and take more
+            search to solve.
+        """
+        start = max(self.n_names - count, 0)
+        names = [self.name(index) for index in range(start, self.n_names)]
+        if older and self.builds_per_name > 1:
+            latest = self._versions[-1].split("-")[0]
+            return ["{} < {}".format(name, latest) for name in names]
+        return names
+
+    def iter_package_specs(self):
+        """ Yield each package as a (name, version string, install_requires,
+        conflicts, provides) tuple, with the constraints laid out as in
+        :class:`PackageMetadata`.
+        """
+        for index in six.moves.range(self.n_names):
+            for spec in self._name_specs(index):
+                yield spec
+
+    def iter_packages(self):
+        """ Yield each package as a :class:`PackageMetadata`. """
+        for name, version, install_requires, conflicts, provides in (
+                self.iter_package_specs()):
+            yield PackageMetadata(
+                name, self._version(version),
+                install_requires=install_requires, conflicts=conflicts,
+                provides=provides)
+
+    def iter_package_strings(self):
+        """ Yield each package as a pretty package string. """
+        for package in self.iter_packages():
+            yield package_to_pretty_string(package)
+
+    def repository(self, repository_info=None):
+        """ Return a :class:`Repository` of all the packages.
+
+        Parameters
+        ----------
+        repository_info : IRepositoryInfo, optional
+            If given, the packages are wrapped as
+            :class:`RepositoryPackageMetadata` of this repository.
+        """
+        packages = self.iter_packages()
+        if repository_info is not None:
+            packages = (RepositoryPackageMetadata(package, repository_info)
+                        for package in packages)
+        return Repository(packages)
+
+    def iter_scenario_lines(self, requirements, installed=()):
+        """ Yield the lines, as text, of a scenario YAML file installing
+        `requirements`, as read by :meth:`Scenario.from_yaml`.
+
+        Parameters
+        ----------
+        requirements : iterable of str
+            The requirements to install.
+        installed : iterable of str, optional
+            The pretty strings of the installed packages, which must be among
+            the generated ones.
+        """
+        yield u"packages:\n"
+        for package_string in self.iter_package_strings():
+            yield u"    - {}\n".format(package_string)
+        installed = list(installed)
+        if installed:
+            yield u"\ninstalled:\n"
+            for package_string in installed:
+                yield u"    - {}\n".format(package_string)
+        yield u"\nrequest:\n"
+        for requirement in requirements:
+            yield u'    - operation: "install"\n'
+            yield u'      requirement: "{}"\n'.format(requirement)
+
+    def write_scenario(self, fp, requirements, installed=()):
+        """ Write a scenario YAML file installing `requirements` to the text
+        file `fp`, one package at a time.
+
+        See :meth:`iter_scenario_lines` for the parameters.
+        """
+        for line in self.iter_scenario_lines(requirements, installed):
+            fp.write(line)
+
+    def _version(self, version_string):
+        try:
+            return self._version_cache[version_string]
+        except KeyError:
+            version = self._version_cache[version_string] = (
+                EnpkgVersion.from_string(version_string))
+            return version
+
+    def _rng(self, kind, index):
+        # Independent generators for each name and block keep the output
+        # independent of the iteration order.
+        return random.Random((self.seed * 3 + kind) * 1000003 + index)
+
+    def _zipf_cumulative_weights(self):
+        cumulative = []
+        total = 0.0
+        for rank in six.moves.range(1, self.n_names + 1):
+            total += rank ** -self.zipf_exponent
+            cumulative.append(total)
+        return cumulative
+
+    def _popular_index(self, rng, below):
+        """ Return a Zipf-distributed index lower than `below`. """
+        total = self._zipf_cumulative[below - 1]
+        return min(bisect.bisect_left(self._zipf_cumulative,
+                                      rng.random() * total), below - 1)
+
+    def _block_kind(self, block):
+        draw = self._rng(0, block).random()
+        if draw < self.chain_fraction:
+            return _CHAIN
+        elif draw < self.chain_fraction + self.diamond_fraction:
+            return _DIAMOND
+        else:
+            return _REGULAR
+
+    def _structural_dependencies(self, index):
+        block, offset = divmod(index, self.block_size)
+        kind = self._block_kind(block)
+        if kind == _CHAIN and offset > 0:
+            return [index - 1]
+        elif kind == _DIAMOND:
+            # Groups of 4: a bottom, two middles depending on it, and a top
+            # depending on both middles.
+            position = offset % 4
+            if position in (1, 2):
+                return [index - position]
+            elif position == 3:
+                return [index - 2, index - 1]
+        return []
+
+    def _name_specs(self, index):
+        rng = self._rng(1, index)
+        name = self.name(index)
+        builds = self.builds_per_name
+
+        dependencies = self._structural_dependencies(index)
+        if index > 0:
+            n_dependencies = rng.randint(
+                0, int(round(2 * self.mean_dependencies)))
+            for _ in range(n_dependencies):
+                dependency = self._popular_index(rng, index)
+                if dependency not in dependencies:
+                    dependencies.append(dependency)
+        minimum_builds = [rng.randrange(builds) for _ in dependencies]
+
+        virtual_dependency = None
+        if (index >= self._n_providers > 0 and
+                rng.random() < self.virtual_dependency_probability):
+            virtual_dependency = self.virtual_name(
+                rng.randrange(self._n_providers // self.providers_per_virtual))
+
+        conflicts = ()
+        if index > 0 and builds > 1 and (
+                rng.random() < self.conflict_probability):
+            conflict = self.name(self._popular_index(rng, index))
+            constraint = "< {}".format(
+                self._versions[rng.randrange(1, builds)].split("-")[0])
+            conflicts = ((conflict, ((constraint,),)),)
+
+        provides = ()
+        if index < self._n_providers:
+            virtual = self.virtual_name(index // self.providers_per_virtual)
+            provides = ((virtual, _ANY),)
+
+        for build in range(builds):
+            is_latest = build == builds - 1
+            install_requires = []
+            for dependency, minimum in zip(dependencies, minimum_builds):
+                version = self._versions[minimum].split("-")[0]
+                if not is_latest and rng.random() < self.pin_probability:
+                    constraint = "^= {}".format(version)
+                else:
+                    constraint = ">= {}".format(version)
+                install_requires.append(
+                    (self.name(dependency), ((constraint,),)))
+            if virtual_dependency is not None:
+                install_requires.append((virtual_dependency, _ANY))
+            yield (name, self._versions[build],
+                   tuple(sorted(install_requires)), conflicts, provides)
+
+
+def synthetic_repository(n_names, seed=0, repository_name=u"remote",
+                         **kwargs):
+    """ Return a :class:`Repository` of synthetic packages.
+
+    Parameters
+    ----------
+    n_names : int
+        The number of distinct package names.
+    seed : int, optional
+        The seed of the random generators.
+    repository_name : str, optional
+        The name of the repository the packages belong to.
+    **kwargs
+        Other parameters of :class:`SyntheticIndex`.
+    """
+    index = SyntheticIndex(n_names, seed=seed, **kwargs)
+    return index.repository(RepositoryInfo(repository_name))
@@ -29,6 +29,13 @@ PACKAGE_DEF_2 = dedent("""\
     C 0.0.0-1; depends (E >= 1.0.0)
 """)
 
+PACKAGE_DEF_CYCLE = dedent("""\
+    F 0.0.0-1; depends (G)
+    G 0.0.0-1; depends (H)
+    H 0.0.0-1; depends (F)
+    I 0.0.0-1; depends (F)
+""")
+
 
 class TestComputeDependencies(unittest.TestCase):
 
@@ -73,6 +80,15 @@ class TestComputeDependencies(unittest.TestCase):
         deps = compute_dependencies(self.repos, requirement, transitive=True)
         self.assertEqual(deps, set(expected_deps))
 
+    def test_cyclic_requirements_transitive(self):
+        repository = Repository(packages_from_definition(PACKAGE_DEF_CYCLE))
+        requirement = InstallRequirement._from_string('G')
+        expected_deps = packages_from_definition(PACKAGE_DEF_CYCLE)
+
+        deps = compute_dependencies([repository], requirement,
+                                    transitive=True)
+        self.assertEqual(deps, set(expected_deps[:3]))
+
 
 class TestComputeReverseDependencies(unittest.TestCase):
 
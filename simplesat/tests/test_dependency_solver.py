@@ -5,10 +5,13 @@ import six
 
 from simplesat.constraints import ConstraintModifiers, Requirement
 from simplesat.errors import NoPackageFound, UnexpectedlySatisfiable
-from simplesat.test_utils import packages_from_definition
+from simplesat.test_utils import (
+    packages_from_definition, pool_and_repository_from_packages
+)
 
 from ..dependency_solver import (
-    minimal_unsatisfiable_subset, requirements_are_satisfiable
+    RequirementChecker, _connected_packages, minimal_unsatisfiable_subset,
+    requirements_are_satisfiable
 )
 
 
@@ -83,6 +86,96 @@ class TestRequirementsAreSatistifiable(unittest.TestCase):
         self.assertTrue(result.is_satisfiable)
 
 
+class TestRequirementChecker(unittest.TestCase):
+    def setUp(self):
+        packages_definition = textwrap.dedent("""
+        MKL 10.3-1
+        MKL 11.4.1-1
+        numpy 1.9.2-1; depends (MKL == 10.3-1)
+        numpy 1.10.4-1; depends (MKL == 11.4.1-1)
+        """)
+        self.packages = packages_from_definition(packages_definition)
+        self.requirement_sets = [
+            [R("numpy")],
+            [R("numpy < 1.10")],
+            [R("numpy < 1.10"), R("MKL >= 11")],
+            [R("numpy > 1.10"), R("MKL >= 11")],
+        ]
+
+    def test_requirements_are_satisfiable(self):
+        # Given
+        checker = RequirementChecker(self.packages)
+
+        # When
+        results = [checker.requirements_are_satisfiable(requirements)
+                   for requirements in self.requirement_sets]
+
+        # Then
+        expected = [
+            requirements_are_satisfiable(self.packages, requirements)
+            for requirements in self.requirement_sets
+        ]
+        self.assertEqual(expected, results)
+        self.assertEqual([True, True, False, True],
+                         [result.is_satisfiable for result in results])
+
+    def test_satisfy_requirements(self):
+        # Given
+        checker = RequirementChecker(self.packages)
+
+        # When
+        packages = checker.satisfy_requirements([R("numpy < 1.10")])
+
+        # Then
+        self.assertEqual((self.packages[0], self.packages[2]), packages)
+
+    def test_requirements_are_complete(self):
+        # Given
+        checker = RequirementChecker(self.packages)
+
+        # When/Then
+        result = checker.requirements_are_complete([R("numpy < 1.10")])
+        self.assertFalse(result.is_satisfiable)
+        result = checker.requirements_are_complete(
+            [R("numpy < 1.10"), R("MKL < 11")])
+        self.assertTrue(result.is_satisfiable)
+
+    def test_constraint_modifiers(self):
+        # Given
+        modifiers = ConstraintModifiers(allow_newer=("MKL",))
+        checker = RequirementChecker(self.packages, modifiers=modifiers)
+
+        # When
+        results = checker.check_many(self.requirement_sets)
+
+        # Then
+        self.assertEqual([True, True, True, True],
+                         [result.is_satisfiable for result in results])
+
+    def test_check_many(self):
+        # Given
+        checker = RequirementChecker(self.packages)
+        expected = [checker.requirements_are_satisfiable(requirements)
+                    for requirements in self.requirement_sets]
+
+        # When
+        results = checker.check_many(self.requirement_sets)
+        parallel_results = checker.check_many(
+            self.requirement_sets * 3, processes=2)
+
+        # Then
+        self.assertEqual(expected, results)
+        self.assertEqual(expected * 3, parallel_results)
+
+    def test_check_many_raises_if_unresolvable_requirement(self):
+        # Given
+        checker = RequirementChecker(self.packages)
+
+        # When/Then
+        with self.assertRaises(NoPackageFound):
+            checker.check_many([[R("numpy")], [R("foo")]], processes=2)
+
+
 def requirements_from_definition(s):
     return [R(line) for line in s.splitlines() if line.strip()]
 
@@ -235,3 +328,41 @@ class TestMinUnsat(unittest.TestCase):
         # When/Then
         with self.assertRaises(UnexpectedlySatisfiable):
             minimal_unsatisfiable_subset(requirements, callback)
+
+
+class TestConnectedPackages(unittest.TestCase):
+    def setUp(self):
+        packages_definition = textwrap.dedent("""
+        A 1.0.0-1; depends (B)
+        B 1.0.0-1; depends (C)
+        C 1.0.0-1; depends (B)
+        D 1.0.0-1; depends (E)
+        E 1.0.0-1
+        F 1.0.0-1
+        """)
+        self.pool, _ = pool_and_repository_from_packages(packages_definition)
+
+    def test_prune_unneeded_packages(self):
+        # Given
+        solution = [1, 2, 3, 4, 5, -6]
+        root_ids = {1, 6}
+
+        # When
+        result = _connected_packages(solution, root_ids, self.pool)
+
+        # Then
+        self.assertEqual({1, 2, 3, -6}, result)
+
+    def test_prune_with_dependency_ids(self):
+        # Given
+        solution = [1, 2, 3, 4, 5, -6]
+        root_ids = {1}
+        # A partial mapping; other dependencies are looked up in the pool.
+        dependency_ids = {1: (2,), 2: (3, 5)}
+
+        # When
+        result = _connected_packages(solution, root_ids, self.pool,
+                                     dependency_ids)
+
+        # Then
+        self.assertEqual({1, 2, 3, 5}, result)
@@ -116,6 +116,80 @@ class TestPool(unittest.TestCase):
             self, versions, ["1.8.0-1", "1.8.0-2", "1.8.0-3"]
         )
 
+    def test_what_provides_not_equal(self):
+        # Given
+        repository = Repository(self.packages_from_definition(NUMPY_PACKAGES))
+        requirement = InstallRequirement._from_string(
+            "numpy ^= 1.8.0, numpy != 1.8.0-2, numpy != 1.9.0-1")
+
+        # When
+        pool = Pool([repository])
+        candidates = pool.what_provides(requirement)
+        versions = [str(candidate.version) for candidate in candidates]
+
+        # Then
+        self.assertEqual(versions, ["1.8.0-1", "1.8.0-3"])
+
+    def test_what_provides_empty_interval(self):
+        # Given
+        repository = Repository(self.packages_from_definition(NUMPY_PACKAGES))
+        requirement = InstallRequirement._from_string(
+            "numpy >= 1.8.0, numpy < 1.7.0")
+
+        # When
+        pool = Pool([repository])
+        candidates = pool.what_provides(requirement)
+
+        # Then
+        self.assertEqual(candidates, [])
+
+    def test_what_provides_keeps_pool_order(self):
+        # Given
+        repository_1 = Repository(self.packages_from_definition(
+            u"numpy 1.8.0-1\nnumpy 1.9.0-1"))
+        repository_2 = Repository(self.packages_from_definition(
+            u"numpy 1.7.0-1\nnumpy 1.8.0-1\nnumpy 1.9.1-1"))
+        requirement = InstallRequirement._from_string(
+            "numpy >= 1.8.0, numpy != 1.9.0-1")
+
+        # When
+        pool = Pool([repository_1])
+        pool.what_provides(requirement)
+        pool.add_repository(repository_2)
+        candidates = pool.what_provides(requirement)
+
+        # Then
+        expected = [
+            list(repository_1)[0], list(repository_2)[1],
+            list(repository_2)[2],
+        ]
+        self.assertEqual(candidates, expected)
+
+    def test_what_provides_same_as_matches(self):
+        # Given
+        repository = Repository(self.packages_from_definition(NUMPY_PACKAGES))
+        requirement_strings = (
+            "numpy", "numpy *", "numpy == 1.6.0-0", "numpy == 1.6.2-1",
+            "numpy > 1.6.0-1", "numpy <= 1.6.1", "numpy < 1.6.0b2-1",
+            "numpy ^= 1.6.0b2", "numpy ^= 1.2", "numpy != 1.5.1-2",
+            "numpy > 1.4.0-9, numpy <= 1.5.1-2, numpy != 1.5.1-1",
+            "mkl ^= 10.3, mkl >= 10.2-2",
+        )
+        pool = Pool([repository])
+
+        for requirement_string in requirement_strings:
+            requirement = InstallRequirement._from_string(requirement_string)
+
+            # When
+            candidates = pool.what_provides(requirement)
+
+            # Then
+            expected = [
+                package for package in pool.name_to_packages(requirement.name)
+                if requirement.matches(package.version)
+            ]
+            self.assertEqual(candidates, expected, requirement_string)
+
     def test_id_to_string(self):
         # Given
         repository = Repository(self.packages_from_definition(NUMPY_PACKAGES))
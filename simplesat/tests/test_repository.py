@@ -1,3 +1,4 @@
+import pickle
 import textwrap
 import unittest
 
@@ -270,3 +271,22 @@ class TestRepository(unittest.TestCase):
         self.assertTrue(packages[0] in repository)
         self.assertEqual(len(repository), 1)
         self.assertEqual(list(repository), [package])
+
+    def test_pickle(self):
+        # Given
+        packages_definition = textwrap.dedent(u"""\
+        nose 1.2.1-1
+        nose 1.3.0-1
+        numpy 1.9.2-1\
+        """)
+        packages = self.packages_from_definition(packages_definition)
+        repository = Repository(packages)
+
+        # When
+        unpickled = pickle.loads(pickle.dumps(repository))
+
+        # Then
+        self.assertEqual(list(unpickled), packages)
+        self.assertEqual(
+            unpickled.find_packages(u"nose"), tuple(packages[:2]))
+        self.assertEqual(unpickled.find_packages(u"scipy"), ())
@@ -0,0 +1,183 @@
+import json
+import textwrap
+import unittest
+
+import six
+
+from simplesat.repository import Repository
+from simplesat.test_utils import packages_from_definition
+
+from ..service import SolverService, request_from_data
+
+
+PACKAGES = textwrap.dedent("""
+MKL 10.3-1
+MKL 11.4.1-1
+numpy 1.9.2-1; depends (MKL == 10.3-1)
+numpy 1.10.4-1; depends (MKL == 11.4.1-1)
+""")
+
+
+class TestRequestFromData(unittest.TestCase):
+    def test_simple(self):
+        # Given
+        data = {
+            "request": [
+                {"operation": "install", "requirement": "numpy < 1.10"},
+                {"operation": "remove", "requirement": "MKL"},
+            ],
+            "modifiers": {"allow_newer": ["MKL"]},
+        }
+
+        # When
+        request = request_from_data(data)
+
+        # Then
+        self.assertEqual(
+            ["install", "remove"], [job.kind.name for job in request.jobs])
+        self.assertEqual(
+            ["numpy < 1.10-0", "MKL"],
+            [str(job.requirement) for job in request.jobs])
+        self.assertEqual(
+            set(["MKL"]), set(request.modifiers.allow_newer))
+
+    def test_invalid(self):
+        # When/Then
+        with self.assertRaises(ValueError):
+            request_from_data({"request": [{"operation": "frobnicate"}]})
+        with self.assertRaises(ValueError):
+            request_from_data({"modifiers": {"allow_sideways": ["MKL"]}})
+
+    def test_invalid_types(self):
+        # Given
+        payloads = [
+            {"modifiers": ["allow_newer"]},
+            {"modifiers": {"allow_newer": "MKL"}},
+            {"modifiers": {"allow_newer": [1]}},
+            {"request": "install numpy"},
+            {"request": ["install numpy"]},
+            {"request": [{"operation": "install", "requirement": 1}]},
+        ]
+
+        for data in payloads:
+            # When/Then
+            with self.assertRaises(ValueError):
+                request_from_data(data)
+
+
+class TestSolverService(unittest.TestCase):
+    def setUp(self):
+        packages = packages_from_definition(PACKAGES)
+        self.service = SolverService([Repository(packages)], Repository())
+
+    def test_handle_satisfiable(self):
+        # Given
+        data = {
+            "id": 1,
+            "request": [
+                {"operation": "install", "requirement": "numpy < 1.10"}],
+        }
+
+        # When
+        response = self.service.handle(data)
+
+        # Then
+        self.assertEqual(1, response["id"])
+        self.assertEqual("ok", response["status"])
+        self.assertEqual(
+            [{"kind": "install", "package": "MKL 10.3-1"},
+             {"kind": "install", "package": "numpy 1.9.2-1"}],
+            response["operations"])
+        self.assertEqual(
+            set(["rules", "solver_init", "solve", "total"]),
+            set(response["timings"]))
+        self.assertIsNotNone(response["timings"]["solve"])
+        self.assertEqual(0, response["stats"]["conflicts"])
+
+    def test_handle_unsatisfiable(self):
+        # Given
+        data = {
+            "id": 2,
+            "request": [
+                {"operation": "install", "requirement": "numpy < 1.10"},
+                {"operation": "install", "requirement": "MKL >= 11"},
+            ],
+        }
+
+        # When
+        response = self.service.handle(data)
+
+        # Then
+        self.assertEqual("unsatisfiable", response["status"])
+        self.assertIn("Conflicting requirements", response["message"])
+        self.assertGreater(response["stats"]["conflicts"], 0)
+
+    def test_handle_missing_package(self):
+        # Given
+        data = {"request": [{"operation": "install", "requirement": "foo"}]}
+
+        # When
+        response = self.service.handle(data)
+
+        # Then
+        self.assertEqual("error", response["status"])
+        self.assertIn("foo", response["message"])
+        self.assertIsNone(response["timings"]["solve"])
+
+    def test_handle_invalid_types(self):
+        # Given
+        data = {"id": 2, "request": [None], "modifiers": {}}
+
+        # When
+        response = self.service.handle(data)
+
+        # Then
+        self.assertEqual(2, response["id"])
+        self.assertEqual("error", response["status"])
+        self.assertEqual("ValueError: Invalid job: None", response["message"])
+
+    def test_handle_invalid_after_valid(self):
+        # Given
+        self.service.handle({"id": 1, "request": [
+            {"operation": "install", "requirement": "numpy"}]})
+        data = {"id": 2, "request": [{"operation": "install"}]}
+
+        # When
+        response = self.service.handle(data)
+
+        # Then
+        self.assertEqual("error", response["status"])
+        timings = response["timings"]
+        self.assertIsNone(timings["rules"])
+        self.assertIsNone(timings["solver_init"])
+        self.assertIsNone(timings["solve"])
+        self.assertIsNotNone(timings["total"])
+
+    def test_serve(self):
+        # Given
+        lines = [
+            json.dumps({"id": 1, "request": [
+                {"operation": "install", "requirement": "numpy"}]}),
+            "",
+            "not json",
+            json.dumps({"id": 3, "request": [
+                {"operation": "install", "requirement": "numpy < 1.10"}]}),
+        ]
+        input_stream = six.StringIO(u"\n".join(lines) + u"\n")
+        output_stream = six.StringIO()
+
+        # When
+        self.service.serve(input_stream, output_stream)
+
+        # Then
+        responses = [
+            json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual(
+            [(1, "ok"), (None, "error"), (3, "ok")],
+            [(r["id"], r["status"]) for r in responses])
+        self.assertEqual(
+            {"kind": "install", "package": "numpy 1.10.4-1"},
+            responses[0]["operations"][-1])
+        self.assertEqual(
+            {"kind": "install", "package": "numpy 1.9.2-1"},
+            responses[2]["operations"][-1])
@@ -1,33 +1,53 @@
 import io
+import multiprocessing
+import pickle
 import textwrap
+import threading
+import time
 import unittest
 
+import mock
+import six
 from okonomiyaki.versions import EnpkgVersion
 
 from simplesat.constraints import (
     ConstraintModifiers, PrettyPackageStringParser, InstallRequirement
 )
 from simplesat.dependency_solver import (
-    DependencySolver, packages_are_consistent,
+    PORTFOLIO, DependencySolver, SearchConfiguration,
+    _search_configuration_in_process, packages_are_consistent,
     requirements_from_packages, packages_from_requirements,
     requirements_are_satisfiable, requirements_are_complete,
     satisfy_requirements, simplify_requirements,
 )
 from simplesat.errors import (
-    MissingInstallRequires, SatisfiabilityError, SatisfiabilityErrorWithHint
+    MissingInstallRequires, SatisfiabilityError, SatisfiabilityErrorWithHint,
+    SolverBudgetExceeded, SolverInterrupted, SolverTimeout
 )
 from simplesat.pool import Pool
 from simplesat.repository import Repository
 from simplesat.request import Request
+from simplesat.sat import MiniSATBackend, SearchBudget
+from simplesat.sat.policy.policy_logger import PolicyLogger
 from simplesat.test_utils import Scenario
 from simplesat.transaction import (
     InstallOperation, RemoveOperation, UpdateOperation
 )
+from simplesat.utils.tracing import RecordingTracer
 
 
 R = InstallRequirement._from_string
 P = PrettyPackageStringParser(EnpkgVersion.from_string).parse_to_package
 
+# Whether worker processes see the objects patched in the test process.
+_FORKED_PROCESSES = getattr(
+    multiprocessing, "get_start_method", lambda: "fork")() == "fork"
+
+
+def _search_component_without_solution(task):
+    # Replaces the component worker, which must be importable by the pool.
+    return None, None
+
 
 class SolverHelpersMixin(object):
     def setUp(self):
@@ -636,7 +656,6 @@ class TestSolver(SolverHelpersMixin, unittest.TestCase):
         self.assertEqual(packages, expected_packages)
 
 
-
 class TestSolverWithHint(SolverHelpersMixin, unittest.TestCase):
     def test_no_conflict(self):
         # Given
@@ -724,3 +743,460 @@ class TestSolverWithHint(SolverHelpersMixin, unittest.TestCase):
 
         self.assertMultiLineEqual(
             ctx.exception.hint_pretty_string, r_hint_pretty_string)
+
+
+class NumpySolverMixin(SolverHelpersMixin):
+    """ A solver for a small repository, and a request to install numpy. """
+
+    def setUp(self):
+        super(NumpySolverMixin, self).setUp()
+        self.repository.update([
+            P(u"mkl 10.3-1"),
+            P(u"mkl 11.0-1"),
+            P(u"numpy 1.9.2-1; depends (mkl == 10.3-1)"),
+        ])
+        self.request = Request()
+        self.request.install(R(u"numpy"))
+        pool = Pool([self.repository, self.installed_repository])
+        self.solver = DependencySolver(
+            pool, [self.repository], self.installed_repository)
+
+
+class TestSolverInterruption(NumpySolverMixin, unittest.TestCase):
+    def run_async(self, awaitable):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(awaitable(loop))
+        finally:
+            loop.close()
+
+    def test_solve_stop_event(self):
+        # Given
+        stop_event = threading.Event()
+        stop_event.set()
+
+        # When/Then
+        with self.assertRaises(SolverInterrupted) as ctx:
+            self.solver.solve(self.request, stop_event=stop_event)
+
+        # Then
+        statistics = ctx.exception.statistics
+        self.assertEqual(
+            set(["rules_time", "solver_init_time", "solve_time"]),
+            set(statistics))
+
+    def test_solve_budget(self):
+        # Given
+        self.solver.budget = SearchBudget(timeout=-1)
+
+        # When/Then
+        with self.assertRaises(SolverBudgetExceeded) as ctx:
+            self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual("timeout", ctx.exception.budget)
+        statistics = ctx.exception.statistics
+        self.assertIn("decisions", statistics)
+        self.assertIn("solve_time", statistics)
+
+        # Given
+        self.solver.budget = SearchBudget(max_conflicts=10, timeout=60)
+
+        # When
+        transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(2, len(transaction.operations))
+
+    @unittest.skipIf(six.PY2, "solve_async requires Python 3")
+    def test_solve_async(self):
+        # When
+        transaction = self.run_async(
+            lambda loop: self.solver.solve_async(
+                self.request, timeout=60, loop=loop))
+
+        # Then
+        self.assertEqual(
+            [u"mkl", u"numpy"],
+            [op.package.name for op in transaction.operations])
+
+    @unittest.skipIf(six.PY2, "solve_async requires Python 3")
+    def test_solve_async_timeout(self):
+        # Given
+        # Keep the solver busy, so that the solve is still waiting when the
+        # timeout expires.
+        self.solver._solve_lock.acquire()
+
+        def awaitable(loop):
+            loop.call_later(0.2, self.solver._solve_lock.release)
+            return self.solver.solve_async(
+                self.request, timeout=0.05, loop=loop)
+
+        # When/Then
+        with self.assertRaises(SolverTimeout) as ctx:
+            self.run_async(awaitable)
+
+        # Then
+        self.assertIn("rules_time", ctx.exception.statistics)
+
+        # When
+        transaction = self.run_async(
+            lambda loop: self.solver.solve_async(self.request, loop=loop))
+
+        # Then
+        self.assertEqual(2, len(transaction.operations))
+
+
+class TestSolverStats(NumpySolverMixin, unittest.TestCase):
+    def test_collect_stats(self):
+        # Given
+        self.solver.collect_stats = True
+
+        # When
+        transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(0, transaction.stats.conflicts)
+        self.assertGreater(transaction.stats.propagations, 0)
+
+        # Given
+        self.request.install(R(u"mkl > 10.3-1"))
+
+        # When/Then
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.solver.solve(self.request)
+
+        # Then
+        self.assertIsNotNone(ctx.exception.stats)
+
+        # Given
+        self.solver.collect_stats = False
+
+        # When
+        transaction = self.solver.solve(Request())
+
+        # Then
+        self.assertIsNone(transaction.stats)
+
+
+class TestSolverTracing(NumpySolverMixin, unittest.TestCase):
+    def test_tracer(self):
+        # Given
+        self.solver.tracer = tracer = RecordingTracer()
+
+        # When
+        self.solver.solve(self.request)
+
+        # Then
+        spans = dict((span.name, span) for span in tracer.spans)
+        six.assertCountEqual(
+            self,
+            ["solve", "upgrade_conversion", "generate_rules", "solver_init",
+             "search", "prune", "transaction"],
+            spans)
+        self.assertEqual(0, spans["solve"].depth)
+        self.assertEqual(1, spans["search"].depth)
+        self.assertEqual(3, spans["generate_rules"].attributes["pool_size"])
+        self.assertEqual(2, spans["transaction"].attributes["operations"])
+        self.assertIn("conflicts", spans["search"].attributes)
+
+
+class TestSolverPolicyLogging(NumpySolverMixin, unittest.TestCase):
+    def test_log_policy(self):
+        # When
+        transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertNotIsInstance(self.solver._last_policy, PolicyLogger)
+
+        # Given
+        self.solver.log_policy = True
+
+        # When
+        logged_transaction = self.solver.solve(self.request)
+
+        # Then
+        policy = self.solver._last_policy
+        self.assertIsInstance(policy, PolicyLogger)
+        self.assertEqual(
+            len(policy._log_suggestions),
+            len(policy._log_assignment_changes))
+        counts, _ = policy._log_histogram()
+        self.assertEqual(len(policy._log_suggestions), sum(counts.values()))
+        self.assertEqual(
+            transaction.operations, logged_transaction.operations)
+
+
+class TestSatisfiabilityErrorPickling(NumpySolverMixin, unittest.TestCase):
+    def test_satisfiability_error_pickle(self):
+        # Given
+        self.request.install(R(u"mkl == 11.0-1"))
+        self.solver.collect_stats = True
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.solver.solve(self.request)
+        error = ctx.exception
+
+        # When
+        with mock.patch.object(
+                type(error.unsat), "to_string",
+                side_effect=AssertionError("explained")):
+            representation = repr(error)
+        unpickled = pickle.loads(pickle.dumps(error))
+
+        # Then
+        self.assertEqual((error.unsat,), error.args)
+        self.assertTrue(representation.startswith("SatisfiabilityError("))
+        self.assertIsInstance(unpickled, SatisfiabilityError)
+        self.assertEqual(str(error), str(unpickled))
+        self.assertEqual(error.stats.asdict(), unpickled.stats.asdict())
+
+
+class TestSolverBackend(NumpySolverMixin, unittest.TestCase):
+    def test_backend(self):
+        # Given
+        expected = self.solver.solve(self.request)
+        self.solver.backend = MiniSATBackend()
+
+        # When
+        transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
+
+
+class TestSolverPreprocess(NumpySolverMixin, unittest.TestCase):
+    def test_preprocess(self):
+        # Given
+        expected = self.solver.solve(self.request)
+        self.solver.preprocess = True
+
+        # When
+        transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
+
+        # Given
+        self.request.install(R(u"mkl == 11.0-1"))
+
+        # When
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.solver.solve(self.request)
+        pool = self.solver._pool
+        message = ctx.exception.unsat.to_string(pool)
+        self.solver.preprocess = False
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(ctx.exception.unsat.to_string(pool), message)
+        self.assertIn(u"mkl == 11.0-1", message)
+
+
+class TestSolverPortfolio(NumpySolverMixin, unittest.TestCase):
+    def test_portfolio(self):
+        # Given
+        expected = self.solver.solve(self.request)
+        tracer = RecordingTracer()
+        self.solver.tracer = tracer
+        self.solver.portfolio = PORTFOLIO
+
+        # When
+        transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
+        span, = [span for span in tracer.spans if span.name == "search"]
+        self.assertEqual(0, span.attributes["configuration"])
+        self.assertNotIn(
+            "default", [configuration.policy for configuration in PORTFOLIO])
+
+    @unittest.skipUnless(_FORKED_PROCESSES, "Needs forked processes")
+    def test_portfolio_fallback(self):
+        # Given
+        create_sat_solver = DependencySolver._create_sat_solver
+
+        def create_sat_solver_without_preprocessing(
+                solver, rules, policy, stats, preprocess=None):
+            if preprocess:
+                raise ValueError("Preprocessing failed")
+            return create_sat_solver(solver, rules, policy, stats, preprocess)
+
+        self.solver.portfolio = [SearchConfiguration(preprocess=True),
+                                 SearchConfiguration("latest_first")]
+
+        with mock.patch.object(
+                DependencySolver, "_create_sat_solver",
+                create_sat_solver_without_preprocessing):
+            # When
+            transaction = self.solver.solve(self.request)
+
+            # Then
+            self.assertEqual(
+                [u"mkl", u"numpy"],
+                [op.package.name for op in transaction.operations])
+
+            # Given
+            self.solver.portfolio = [SearchConfiguration(preprocess=True),
+                                     SearchConfiguration(preprocess=True)]
+
+            # When/Then
+            with self.assertRaisesRegexp(ValueError, "Preprocessing failed"):
+                self.solver.solve(self.request)
+
+    def test_unknown_search_configuration_policy(self):
+        # When/Then
+        with self.assertRaises(ValueError):
+            SearchConfiguration("unknown")
+
+    def test_portfolio_unsatisfiable(self):
+        # Given
+        self.request.install(R(u"mkl == 11.0-1"))
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.solver.solve(self.request)
+        expected = str(ctx.exception)
+        self.solver.portfolio = PORTFOLIO
+
+        # When
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected, str(ctx.exception))
+
+    @unittest.skipUnless(_FORKED_PROCESSES, "Needs forked processes")
+    def test_portfolio_wrongly_unsatisfiable(self):
+        # Given
+        expected = self.solver.solve(self.request)
+        self.solver.portfolio = PORTFOLIO
+
+        def search_without_solution(connection, *args):
+            connection.send((True, (None, None)))
+
+        with mock.patch(
+                "simplesat.dependency_solver."
+                "_search_configuration_in_process", search_without_solution):
+            # When
+            transaction = self.solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
+
+    @unittest.skipUnless(_FORKED_PROCESSES, "Needs forked processes")
+    def test_portfolio_waits_for_earlier_configurations(self):
+        # Given
+        search = _search_configuration_in_process
+
+        def slow_search(connection, *args):
+            configuration = args[5]
+            if configuration.preprocess:
+                connection.send((False, ValueError("Preprocessing failed")))
+                return
+            if configuration.policy == "latest_first":
+                time.sleep(0.2)
+            search(connection, *args)
+
+        tracer = RecordingTracer()
+        self.solver.tracer = tracer
+        self.solver.portfolio_grace = 30.0
+        self.solver.portfolio = [SearchConfiguration(preprocess=True),
+                                 SearchConfiguration("latest_first"),
+                                 SearchConfiguration()]
+
+        with mock.patch(
+                "simplesat.dependency_solver."
+                "_search_configuration_in_process", slow_search):
+            # When
+            self.solver.solve(self.request)
+
+        # Then
+        span, = [span for span in tracer.spans if span.name == "search"]
+        self.assertEqual(1, span.attributes["configuration"])
+
+
+class TestSolverDecomposition(SolverHelpersMixin, unittest.TestCase):
+    def setUp(self):
+        super(TestSolverDecomposition, self).setUp()
+        self.repository.update([
+            P(u"mkl 10.3-1"),
+            P(u"mkl 11.0-1"),
+            P(u"numpy 1.9.2-1; depends (mkl == 10.3-1)"),
+            P(u"numpy 1.10.4-1; depends (mkl == 11.0-1)"),
+            P(u"libgfortran 3.0.0-2"),
+            P(u"openssl 1.0.2-1"),
+            P(u"openssl 1.0.2-3"),
+            P(u"requests 2.9.1-1; depends (openssl ^= 1.0.2)"),
+        ])
+        self.installed_repository.update([
+            P(u"openssl 1.0.2-1"),
+            P(u"zlib 1.2.8-3"),
+        ])
+        self.request = Request()
+        self.request.install(R(u"numpy"))
+        self.request.install(R(u"requests"))
+
+    def create_solver(self, **kw):
+        pool = Pool([self.repository, self.installed_repository])
+        return DependencySolver(
+            pool, [self.repository], self.installed_repository, **kw)
+
+    def test_decompose(self):
+        # Given
+        expected = self.create_solver().solve(self.request)
+        tracer = RecordingTracer()
+        solver = self.create_solver(decompose=True, tracer=tracer)
+
+        # When
+        transaction = solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
+        span, = [span for span in tracer.spans if span.name == "decompose"]
+        self.assertEqual(2, span.attributes["components"])
+
+    def test_decompose_processes(self):
+        # Given
+        expected = self.create_solver().solve(self.request)
+        solver = self.create_solver(
+            decompose=True, processes=2, collect_stats=True)
+
+        # When
+        transaction = solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
+        self.assertGreater(transaction.stats.decisions, 0)
+
+    def test_decompose_unsatisfiable(self):
+        # Given
+        self.request.install(R(u"mkl == 11.0-1"))
+        self.request.install(R(u"numpy < 1.10"))
+        with self.assertRaises(SatisfiabilityError) as ctx:
+            self.create_solver().solve(self.request)
+        expected = str(ctx.exception)
+
+        for processes in (None, 2):
+            solver = self.create_solver(decompose=True, processes=processes)
+
+            # When
+            with self.assertRaises(SatisfiabilityError) as ctx:
+                solver.solve(self.request)
+
+            # Then
+            self.assertEqual(expected, str(ctx.exception))
+
+    @unittest.skipUnless(_FORKED_PROCESSES, "Needs forked processes")
+    def test_decompose_processes_wrongly_unsatisfiable(self):
+        # Given
+        expected = self.create_solver().solve(self.request)
+        solver = self.create_solver(decompose=True, processes=2)
+
+        with mock.patch(
+                "simplesat.dependency_solver._search_component_in_worker",
+                _search_component_without_solution):
+            # When
+            transaction = solver.solve(self.request)
+
+        # Then
+        self.assertEqual(expected.operations, transaction.operations)
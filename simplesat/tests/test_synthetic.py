@@ -0,0 +1,125 @@
+import io
+import unittest
+
+import six
+
+from simplesat.constraints import InstallRequirement
+from simplesat.dependency_solver import DependencySolver
+from simplesat.pool import Pool
+from simplesat.repository import Repository
+from simplesat.request import Request
+from simplesat.test_utils import Scenario, packages_from_definition
+
+from ..synthetic import SyntheticIndex, synthetic_repository
+
+
+class TestSyntheticIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SyntheticIndex(
+            300, builds_per_name=3, conflict_probability=0.1,
+            virtual_dependency_probability=0.1, seed=1)
+
+    def test_reproducible(self):
+        # Given
+        other = SyntheticIndex(
+            300, builds_per_name=3, conflict_probability=0.1,
+            virtual_dependency_probability=0.1, seed=1)
+        reseeded = SyntheticIndex(
+            300, builds_per_name=3, conflict_probability=0.1,
+            virtual_dependency_probability=0.1, seed=2)
+
+        # When
+        package_strings = list(self.index.iter_package_strings())
+
+        # Then
+        self.assertEqual(900, len(package_strings))
+        self.assertEqual(len(self.index), len(package_strings))
+        self.assertEqual(
+            package_strings, list(other.iter_package_strings()))
+        self.assertNotEqual(
+            package_strings, list(reseeded.iter_package_strings()))
+
+    def test_package_strings_round_trip(self):
+        # When
+        package_strings = list(self.index.iter_package_strings())
+
+        # Then
+        self.assertEqual(
+            list(self.index.iter_packages()),
+            packages_from_definition(u"\n".join(package_strings)))
+
+    def test_features(self):
+        # When
+        packages = list(self.index.iter_packages())
+
+        # Then
+        def has(attribute, predicate=lambda name, constraints: True):
+            return any(
+                predicate(name, constraints)
+                for package in packages
+                for name, constraints in getattr(package, attribute))
+
+        self.assertTrue(has("conflicts"))
+        self.assertTrue(has(
+            "install_requires",
+            lambda name, constraints: constraints[0][0].startswith("^=")))
+        self.assertTrue(has(
+            "install_requires",
+            lambda name, constraints: name.startswith("virtual")))
+        self.assertTrue(has(
+            "provides",
+            lambda name, constraints: name.startswith("virtual")))
+
+        # Dependencies only go to earlier names.
+        for package in packages:
+            for name, _ in package.install_requires:
+                if not name.startswith("virtual"):
+                    self.assertLess(name, package.name)
+
+    def test_latest_builds_are_installable(self):
+        # Given
+        repository = self.index.repository()
+        pool = Pool([repository])
+        request = Request()
+        for requirement in self.index.requirement_strings(10):
+            request.install(InstallRequirement._from_string(requirement))
+        solver = DependencySolver(pool, [repository], Repository())
+
+        # When
+        transaction = solver.solve(request)
+
+        # Then
+        self.assertGreaterEqual(len(transaction.operations), 10)
+        for operation in transaction.operations:
+            self.assertEqual("1.2.0-1", str(operation.package.version))
+
+    def test_write_scenario(self):
+        # Given
+        fp = io.StringIO()
+        requirements = self.index.requirement_strings(3, older=True)
+
+        # When
+        self.index.write_scenario(fp, requirements)
+        scenario = Scenario.from_yaml(io.StringIO(fp.getvalue()))
+
+        # Then
+        lines = self.index.iter_scenario_lines(requirements)
+        for line in lines:
+            self.assertIsInstance(line, six.text_type)
+        self.assertEqual(
+            [u"p297 < 1.2.0-0", u"p298 < 1.2.0-0", u"p299 < 1.2.0-0"],
+            [str(job.requirement) for job in scenario.request.jobs])
+        self.assertEqual(
+            list(self.index.iter_packages()), list(scenario.packages.values()))
+
+
+class TestSyntheticRepository(unittest.TestCase):
+    def test_simple(self):
+        # When
+        repository = synthetic_repository(50, seed=3, builds_per_name=2)
+
+        # Then
+        self.assertEqual(100, len(repository))
+        self.assertEqual(
+            set([u"remote"]),
+            set(package.repository_info.name for package in repository))
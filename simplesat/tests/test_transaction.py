@@ -7,6 +7,7 @@ import unittest
 from textwrap import dedent
 
 from simplesat.test_utils import pool_and_repository_from_packages
+from simplesat.utils.graph import package_lit_dependency_graph
 
 from ..transaction import (
     InstallOperation, RemoveOperation, Transaction, UpdateOperation
@@ -89,3 +90,49 @@ class TestTransaction(unittest.TestCase):
 
         # Then
         self.assertListEqual(expected, result)
+
+    def test_operations_with_dependency_ids(self):
+
+        # Given
+        installed = {1, 3, 5, 6, 7, 9, 10, 11, 12, 13, 15, 19}
+        wanted = {20, 8, 11, 12, 4}
+        decisions = wanted.union(-i for i in installed if i not in wanted)
+        graph = package_lit_dependency_graph(
+            self.pool, self.pool.package_ids, closed=False)
+        # Leave some packages out to check they are looked up in the pool
+        dependency_ids = {
+            package_id: tuple(dependencies)
+            for package_id, dependencies in graph.items()
+            if package_id % 3
+        }
+
+        # When
+        expected = Transaction(self.pool, decisions, installed)
+        transaction = Transaction(self.pool, decisions, installed,
+                                  dependency_ids=dependency_ids)
+
+        # Then
+        self.assertListEqual(expected.operations, transaction.operations)
+        self.assertListEqual(expected.pretty_operations,
+                             transaction.pretty_operations)
+
+    def test_operations_cyclic_dependencies(self):
+
+        # Given
+        installed = {1, 3}
+        decisions = {-1, -3, 2, 10}
+        dependency_ids = {2: (10,), 10: (2,)}
+
+        # When
+        transaction = Transaction(self.pool, decisions, installed,
+                                  dependency_ids=dependency_ids)
+        result = transaction.operations
+        expected = [
+            RemoveOperation(self.pool.id_to_package(3)),
+            RemoveOperation(self.pool.id_to_package(1)),
+            InstallOperation(self.pool.id_to_package(2)),
+            InstallOperation(self.pool.id_to_package(10)),
+        ]
+
+        # Then
+        self.assertListEqual(expected, result)
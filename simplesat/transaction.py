@@ -1,8 +1,7 @@
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 from attr import attr, attributes
 
-from .constraints import InstallRequirement
 from simplesat.utils.graph import toposort, package_lit_dependency_graph
 
 
@@ -27,9 +26,30 @@ class RemoveOperation(Operation):
 
 
 class Transaction(object):
-
-    def __init__(self, pool, decisions, installed_package_ids):
+    """ The operations needed to go from the installed packages to a solution.
+
+    Parameters
+    ----------
+    pool : Pool
+        The pool against which the package ids are resolved.
+    decisions : iterable of int
+        The solution, as signed package ids.
+    installed_package_ids : iterable of int
+        The ids of the currently installed packages.
+    dependency_ids : dict, optional
+        A mapping of package ids to the ids of the packages satisfying their
+        install_requires, such as :attr:`RulesGenerator.dependency_ids`. The
+        dependencies of packages missing from it are looked up in the pool.
+    stats : SolverStats, optional
+        The statistics of the search which found the solution, if collected.
+    """
+
+    def __init__(self, pool, decisions, installed_package_ids,
+                 dependency_ids=None, stats=None):
+        self.stats = stats
         self._pool = pool
+        self._dependency_ids = dependency_ids or {}
+        installed_package_ids = set(installed_package_ids)
         self._local_packages = {
             self._package_key(package_id): package_id
             for package_id in installed_package_ids
@@ -89,10 +109,19 @@ class Transaction(object):
     def _as_pretty_operations(self, operations):
         pkg_to_ops = OrderedDict((op.package, [op]) for op in operations)
 
+        # NOTE: this assumes that the name of the package is also the name of
+        # the thing that is being provided. This is not always true. Consider
+        # that apache2 and nginx can both provide "webserver", etc.
+        providers = defaultdict(list)
+        for pkg in pkg_to_ops:
+            for name, _ in pkg.provides:
+                providers[name].append(pkg)
+
         for pkg in reversed(tuple(pkg_to_ops.keys())):
             if pkg in pkg_to_ops:
-                for update in self._find_other_providers(pkg):
-                    pkg_to_ops[pkg] += pkg_to_ops.pop(update, [])
+                for update in providers[pkg.name]:
+                    if update != pkg:
+                        pkg_to_ops[pkg] += pkg_to_ops.pop(update, [])
 
         combine = self._merge_operations
         return [combine(ops) for ops in pkg_to_ops.values()]
@@ -104,9 +133,24 @@ class Transaction(object):
         first, second = sorted(ops, key=lambda o: rank.index(o.__class__))
         return UpdateOperation(first.package, second.package)
 
+    def _dependency_graph(self, decisions):
+        """ Return the dependency graph between the package literals in
+        `decisions`, as described in :func:`toposort`. """
+        lit_by_id = {abs(lit): lit for lit in decisions}
+        graph = {}
+        for lit in lit_by_id.values():
+            package_id = abs(lit)
+            dependency_ids = self._dependency_ids.get(package_id)
+            if dependency_ids is None:
+                dependency_ids = package_lit_dependency_graph(
+                    self._pool, (package_id,), closed=False)[package_id]
+            graph[lit] = set(
+                lit_by_id[dep_id] for dep_id in dependency_ids
+                if dep_id in lit_by_id)
+        return graph
+
     def _safe_operations(self, decisions, installed_package_ids):
-        graph = package_lit_dependency_graph(self._pool, decisions,
-                                             closed=True)
+        graph = self._dependency_graph(decisions)
         removals = []
         installs = []
 
@@ -114,7 +158,6 @@ class Transaction(object):
         for group in toposort(graph):
             # Sort the set of independent packages for determinism
             for package_id in sorted(group, key=abs):
-                assert package_id in decisions
                 if package_id < 0 and -package_id in installed_package_ids:
                     removals.append(-package_id)
                 elif (package_id > 0 and
@@ -123,6 +166,7 @@ class Transaction(object):
 
         install_operations = []
         remove_operations = []
+        kept_ids = set()
 
         # Installations should happen bottom up
         for package_id in installs:
@@ -137,24 +181,15 @@ class Transaction(object):
             if preferred_id != package_id:
                 # Because we are not installing the remote package, do not
                 # remove original version
-                if preferred_id in removals:
-                    removals.remove(preferred_id)
+                kept_ids.add(preferred_id)
             else:
                 package = self._pool.id_to_package(package_id)
                 install_operations.append(InstallOperation(package))
 
         # Removals should happen top down
         for package_id in reversed(removals):
-            package = self._pool.id_to_package(package_id)
-            remove_operations.append(RemoveOperation(package))
+            if package_id not in kept_ids:
+                package = self._pool.id_to_package(package_id)
+                remove_operations.append(RemoveOperation(package))
 
         return remove_operations + install_operations
-
-    def _find_other_providers(self, package):
-        # NOTE: this assumes that the name of the package is also the name of
-        # the thing that is being provided. This is not always true. Consider
-        # that apache2 and nginx can both provide "webserver", etc.
-        requirement = InstallRequirement._from_string(package.name)
-        return [
-            p for p in self._pool.what_provides(requirement) if p != package
-        ]
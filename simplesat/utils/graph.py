@@ -11,7 +11,7 @@ import itertools
 from simplesat.constraints.requirement import InstallRequirement
 
 
-def toposort(nodes_to_edges):
+def toposort(nodes_to_edges, cycles=None):
     """Return an iterator over topologically sorted groups of nodes.
 
     Output is a list of sets in
@@ -19,6 +19,9 @@ def toposort(nodes_to_edges):
     each subsequent set consists of items that depend upon items in the
     preceeding sets.
 
+    This runs in time linear in the number of nodes and edges. Nodes which
+    depend on each other cyclically are kept together and yielded in the same
+    set, once everything else they depend on has been yielded.
 
     Parameters
     ----------
@@ -27,59 +30,86 @@ def toposort(nodes_to_edges):
         nodes and values are all of the nodes on which the key depends.
 
         For example, if node 1 depends on 2, we have ``{1: {2}, 2: set()}``.
+    cycles : list, optional
+        If given, each strongly connected component of more than one node,
+        i.e. each group of cyclic dependencies, is appended to it as a tuple.
 
     Yields
     ------
     set of nodes
         Each yielded set contains nodes which depend only on nodes that have
-        already been yielded in a previous set. The first set contains the
-        nodes with no outgoing edges.
-
-    Raises
-    ------
-    ValueError
-        If the graph contains cyclic dependencies.
-
-
-    >>> print '\\n'.join(repr(sorted(x)) for x in toposort2({
-        ...     2: set([11]),
-        ...     9: set([11,8]),
-        ...     10: set([11,3]),
-        ...     11: set([7,5]),
-        ...     8: set([7,3]),
-        ...     }))
-    {3, 5, 7}
-    {8, 11}
-    {2, 9, 10}
+        already been yielded in a previous set, or on nodes of the same cycle.
+        The first set contains the nodes with no outgoing edges.
+
+
+    >>> for group in toposort({
+    ...     2: set([11]),
+    ...     9: set([11, 8]),
+    ...     10: set([11, 3]),
+    ...     11: set([7, 5]),
+    ...     8: set([7, 3]),
+    ...     }):
+    ...     print(sorted(group))
+    [3, 5, 7]
+    [8, 11]
+    [2, 9, 10]
 
     """
 
-    data = {k: v.copy() for k, v in six.iteritems(nodes_to_edges)}
-
-    # Ignore self dependencies.
-    for k, v in six.iteritems(data):
-        v.discard(k)
+    dependencies = {}
+    for node, deps in six.iteritems(nodes_to_edges):
+        # Ignore self dependencies.
+        dependencies[node] = deps = set(deps)
+        deps.discard(node)
 
-    # Find all items that don't depend on anything.
+    # Add empty dependences for items which only appear as dependencies.
     extra_items_in_deps = set(
-        itertools.chain.from_iterable(six.itervalues(data)))
-    extra_items_in_deps.difference_update(set(six.iterkeys(data)))
-
-    # Add empty dependences where needed
-    data.update({item: set() for item in extra_items_in_deps})
-
-    while True:
-        ordered = set(item for item, dep in six.iteritems(data) if not dep)
-        if not ordered:
-            break
-        yield ordered
-        data = {item: (dep - ordered)
-                for item, dep in six.iteritems(data)
-                if item not in ordered}
-    if data:
-        msg = "Cyclic dependencies exist among these items:\n{}"
-        cyclic = '\n'.join(repr(x) for x in six.iteritems(data))
-        raise ValueError(msg.format(cyclic))
+        itertools.chain.from_iterable(six.itervalues(dependencies)))
+    for item in extra_items_in_deps:
+        dependencies.setdefault(item, set())
+
+    dependents = defaultdict(list)
+    for node, deps in six.iteritems(dependencies):
+        for dep in deps:
+            dependents[dep].append(node)
+
+    # The number of dependencies of each node not yielded yet.
+    pending = {node: len(deps) for node, deps in six.iteritems(dependencies)}
+    group = [node for node, count in six.iteritems(pending) if count == 0]
+
+    while group:
+        yield set(group)
+        next_group = []
+        for node in group:
+            del pending[node]
+            for dependent in dependents[node]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    next_group.append(dependent)
+        group = next_group
+
+    if pending:
+        # Only cycles, and the nodes depending on them, are left. Order them
+        # by the acyclic graph of their strongly connected components.
+        remaining = {
+            node: [dep for dep in dependencies[node] if dep in pending]
+            for node in pending
+        }
+        components = strongly_connected_components(remaining)
+        component_of = {
+            node: i for i, component in enumerate(components)
+            for node in component
+        }
+        condensed = {
+            i: set(component_of[dep]
+                   for node in component for dep in remaining[node]
+                   if component_of[dep] != i)
+            for i, component in enumerate(components)
+        }
+        if cycles is not None:
+            cycles.extend(c for c in components if len(c) > 1)
+        for component_ids in toposort(condensed):
+            yield set(node for i in component_ids for node in components[i])
 
 
 def package_lit_dependency_graph(pool, package_lits, closed=True):
@@ -127,25 +157,235 @@ def package_lit_dependency_graph(pool, package_lits, closed=True):
     return dict(nodes_to_edges)
 
 
+def strongly_connected_components(nodes_to_edges):
+    """ Return the strongly connected components of a directed graph.
+
+    This is an iterative version of Tarjan's algorithm, so it is not limited
+    by the depth of the recursion stack.
+
+    Parameters
+    ----------
+    nodes_to_edges : dict from node to iterable of nodes
+        A directed graph expressed as an adjacency dict. Nodes which only
+        appear as neighbors are treated as having no outgoing edges.
+
+    Returns
+    -------
+    components : list of tuple of nodes
+        The components in reverse topological order: every component comes
+        after all of the components reachable from it.
+
+
+    >>> strongly_connected_components({0: [1], 1: [0, 2], 2: []})
+    [(2,), (1, 0)]
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+
+    for root in nodes_to_edges:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(nodes_to_edges.get(root, ())))]
+
+        while work:
+            node, neighbors = work[-1]
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = len(index)
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append(
+                        (neighbor, iter(nodes_to_edges.get(neighbor, ()))))
+                    break
+                elif neighbor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[neighbor])
+            else:
+                # Every neighbor of `node` has been explored.
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(tuple(component))
+
+    return components
+
+
+def connected_components(groups):
+    """ Partition `groups` into the components of the undirected graph linking
+    the nodes of each group together.
+
+    The components are found with a union-find over the nodes, in time almost
+    linear in the total size of the groups.
+
+    Parameters
+    ----------
+    groups : sequence of iterables of nodes
+        The groups of nodes, e.g. the variables of each clause.
+
+    Returns
+    -------
+    components : list of list of int
+        The indices in `groups` of the groups of each component, ordered by
+        their first group. Empty groups form components of their own.
+
+
+    >>> connected_components([[1, 2], [3], [2, 4], [], [3, 5]])
+    [[0, 2], [1, 4], [3]]
+    """
+    parent = {}
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        # Compress the path, so that later lookups are short.
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    group_roots = []
+    for group in groups:
+        root = None
+        for node in group:
+            if node not in parent:
+                parent[node] = node
+            node_root = find(node)
+            if root is None:
+                root = node_root
+            elif node_root != root:
+                parent[node_root] = root
+        group_roots.append(root)
+
+    components = []
+    component_indices = {}
+    for i, root in enumerate(group_roots):
+        if root is None:
+            components.append([i])
+            continue
+        root = find(root)
+        if root not in component_indices:
+            component_indices[root] = len(components)
+            components.append([])
+        components[component_indices[root]].append(i)
+    return components
+
+
+def _iter_bits(bits):
+    """ Yield the index of each bit set in the integer `bits`. """
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class TransitiveClosure(object):
+    """ The transitive closure of a directed graph.
+
+    The graph is condensed into its strongly connected components, and the
+    set of nodes reachable from each component is stored once as an integer
+    bitset. Sets of nodes are only built when a node is looked up.
+
+    Parameters
+    ----------
+    nodes_to_edges : dict from node to iterable of nodes
+        A directed graph expressed as an adjacency dict.
+
+
+    >>> closure = TransitiveClosure({0: [1], 1: [2], 2: []})
+    >>> closure[0]
+    {1, 2}
+    """
+
+    def __init__(self, nodes_to_edges):
+        components = strongly_connected_components(nodes_to_edges)
+
+        self._nodes = []
+        self._node_to_component = {}
+        component_bits = []
+        for i, component in enumerate(components):
+            bits = 0
+            for node in component:
+                bits |= 1 << len(self._nodes)
+                self._nodes.append(node)
+                self._node_to_component[node] = i
+            component_bits.append(bits)
+
+        # Components come out of Tarjan's algorithm sinks first, so every
+        # component we point to has already been computed.
+        self._reachable = []
+        for i, component in enumerate(components):
+            bits = 0
+            for node in component:
+                for neighbor in nodes_to_edges.get(node, ()):
+                    j = self._node_to_component[neighbor]
+                    if j == i:
+                        # Part of a cycle, so the component reaches itself.
+                        bits |= component_bits[i]
+                    else:
+                        bits |= component_bits[j] | self._reachable[j]
+            self._reachable.append(bits)
+
+    def __contains__(self, node):
+        return node in self._node_to_component
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __getitem__(self, node):
+        bits = self._reachable[self._node_to_component[node]]
+        return set(self._nodes[i] for i in _iter_bits(bits))
+
+    def items(self):
+        for node in self._nodes:
+            yield node, self[node]
+
+
 def transitive_neighbors(nodes_to_edges):
     """ Return the set of all reachable nodes for each node in the
     nodes_to_edges adjacency dict. """
-    trans = defaultdict(set)
-    for node in nodes_to_edges.keys():
-        _transitive(node, nodes_to_edges, trans)
-    return dict(trans)
-
-
-def _transitive(node, nodes_to_edges, trans):
-    trans = trans if trans is not None else defaultdict(set)
-    if node in trans:
-        return trans
-    neighbors = nodes_to_edges[node]
-    trans[node].update(neighbors)
-    for neighbor in neighbors:
-        _transitive(neighbor, nodes_to_edges, trans)
-        trans[node].update(trans[neighbor])
-    return trans
+    return dict(TransitiveClosure(nodes_to_edges).items())
+
+
+def reachable_nodes(nodes, neighbor_func):
+    """ Return the set of nodes which can be reached in one or more steps from
+    any of `nodes` by following neighbors as given by `neighbor_func(node)`.
+
+    Unlike :func:`transitive_neighbors`, only the part of the graph which is
+    actually reachable is explored, so `neighbor_func` may compute neighbors
+    lazily.
+
+
+    >>> def neighbor_func(node):
+    ...     return [node + 1] if node < 3 else []
+    >>> reachable_nodes([1], neighbor_func)
+    {2, 3}
+    """
+    visited = set()
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        for neighbor in neighbor_func(node):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                stack.append(neighbor)
+    return visited
 
 
 def connected_nodes(node, neighbor_func, visited=None):
@@ -0,0 +1,193 @@
+"""
+Helpers to profile solves, and to summarize the profiles by subsystem.
+
+Two profilers are supported: :mod:`cProfile`, which counts every call, and
+:class:`StackSampler`, which periodically samples the stack and can write it
+in the collapsed format read by flamegraph tools.
+"""
+from __future__ import absolute_import, division
+
+import collections
+import os.path
+import signal
+
+import six
+
+
+# Subsystems, from the most to the least specific path.
+_SUBSYSTEMS = (
+    (("simplesat", "sat", "policy"), "policy"),
+    (("simplesat", "sat"), "sat"),
+    (("simplesat", "constraints"), "constraints"),
+    (("simplesat", "pool.py"), "pool"),
+    (("simplesat", "repository.py"), "pool"),
+    (("simplesat", "rules_generator.py"), "rules"),
+    (("simplesat", "transaction.py"), "transaction"),
+    (("simplesat",), "solver"),
+)
+
+SUBSYSTEMS = (
+    "pool", "rules", "sat", "policy", "transaction", "constraints", "solver",
+    "other",
+)
+
+
+def _path_parts(filename):
+    return tuple(os.path.normpath(filename).replace("\\", "/").split("/"))
+
+
+def subsystem(filename):
+    """ Return the subsystem of simplesat the source file belongs to, or
+    "other".
+    """
+    parts = _path_parts(filename)
+    for prefix, name in _SUBSYSTEMS:
+        size = len(prefix)
+        for start in range(len(parts) - size, -1, -1):
+            if parts[start:start + size] == prefix:
+                return name
+    return "other"
+
+
+def _short_filename(filename):
+    parts = _path_parts(filename)
+    if "simplesat" in parts:
+        index = len(parts) - 1 - parts[::-1].index("simplesat")
+        return "/".join(parts[index:])
+    return parts[-1]
+
+
+def frame_label(filename, function_name):
+    """ Return a short label for a function, such as
+    ``simplesat/sat/minisat.py:propagate``.
+    """
+    return "{}:{}".format(_short_filename(filename), function_name)
+
+
+def summarize_pstats(stats, top=20):
+    """ Return a report of the time spent in each subsystem, and of the
+    `top` functions with the most internal time.
+
+    Parameters
+    ----------
+    stats : pstats.Stats
+        The profile.
+    top : int, optional
+        The number of functions to list.
+    """
+    by_subsystem = collections.defaultdict(float)
+    functions = []
+    for (filename, lineno, function_name), (_, ncalls, tottime, cumtime, _) \
+            in six.iteritems(stats.stats):
+        name = subsystem(filename)
+        by_subsystem[name] += tottime
+        functions.append(
+            (tottime, cumtime, ncalls, name,
+             frame_label(filename, function_name)))
+
+    total = sum(by_subsystem.values()) or 1.0
+    lines = ["{:<12} {:>10} {:>7}".format("subsystem", "time (s)", "%")]
+    for name in SUBSYSTEMS:
+        if name in by_subsystem:
+            lines.append("{:<12} {:>10.3f} {:>6.1f}%".format(
+                name, by_subsystem[name], 100 * by_subsystem[name] / total))
+
+    lines.append("")
+    lines.append("{:>10} {:>10} {:>10}  {:<12} {}".format(
+        "tottime", "cumtime", "ncalls", "subsystem", "function"))
+    functions.sort(reverse=True)
+    for tottime, cumtime, ncalls, name, label in functions[:top]:
+        lines.append("{:>10.3f} {:>10.3f} {:>10}  {:<12} {}".format(
+            tottime, cumtime, ncalls, name, label))
+    return "\n".join(lines)
+
+
+class StackSampler(object):
+    """ A sampling profiler of the main thread, based on SIGPROF.
+
+    It only works on Unix, and only samples while the main thread runs Python
+    code. Like :class:`cProfile.Profile`, it is started with :meth:`enable`
+    and stopped with :meth:`disable`.
+
+    Parameters
+    ----------
+    interval : float, optional
+        The CPU time between samples, in seconds.
+
+
+    >>> sampler = StackSampler()
+    >>> with sampler:
+    ...     solver.solve(request)
+    >>> with open('solve.collapsed', 'w') as fp:
+    ...     sampler.write_collapsed(fp)
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._previous_handler = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.disable()
+
+    def enable(self):
+        """ Start sampling. """
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def disable(self):
+        """ Stop sampling. """
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[tuple(stack)] += 1
+
+    def write_collapsed(self, fp):
+        """ Write the samples to the text file `fp`, one stack per line in
+        the collapsed format of flamegraph.pl and speedscope.
+        """
+        counts = collections.Counter()
+        for stack, count in six.iteritems(self.samples):
+            labels = ";".join(frame_label(*entry) for entry in stack)
+            counts[labels] += count
+        for labels, count in sorted(counts.items()):
+            fp.write("{} {}\n".format(labels, count))
+
+    def summary(self, top=20):
+        """ Return a report of the share of samples in each subsystem, and of
+        the `top` functions most often on top of the stack.
+        """
+        by_subsystem = collections.Counter()
+        by_function = collections.Counter()
+        for stack, count in six.iteritems(self.samples):
+            filename, function_name = stack[-1]
+            by_subsystem[subsystem(filename)] += count
+            by_function[filename, function_name] += count
+
+        total = sum(by_subsystem.values()) or 1
+        lines = ["{:<12} {:>10} {:>7}".format("subsystem", "samples", "%")]
+        for name in SUBSYSTEMS:
+            if name in by_subsystem:
+                lines.append("{:<12} {:>10} {:>6.1f}%".format(
+                    name, by_subsystem[name],
+                    100 * by_subsystem[name] / total))
+
+        lines.append("")
+        lines.append("{:>10}  {:<12} {}".format(
+            "samples", "subsystem", "function"))
+        for (filename, function_name), count in by_function.most_common(top):
+            lines.append("{:>10}  {:<12} {}".format(
+                count, subsystem(filename),
+                frame_label(filename, function_name)))
+        return "\n".join(lines)
@@ -3,13 +3,15 @@
 
 from __future__ import division, print_function
 
+import sys
 import unittest
 from textwrap import dedent
 
 from simplesat.test_utils import pool_and_repository_from_packages
 
 from ..graph import (
-    package_lit_dependency_graph, toposort, transitive_neighbors
+    connected_components, package_lit_dependency_graph, reachable_nodes,
+    strongly_connected_components, toposort, transitive_neighbors
 )
 
 
@@ -62,6 +64,101 @@ class TestGraph(unittest.TestCase):
         # Then
         self.assertEqual(result, expected)
 
+    def test_transitive_neighbors_cycle(self):
+        # Given
+        graph = {
+            0: [1],
+            1: [2],
+            2: [0],
+            3: [0],
+        }
+
+        expected = {
+            0: {0, 1, 2},
+            1: {0, 1, 2},
+            2: {0, 1, 2},
+            3: {0, 1, 2},
+        }
+
+        # When
+        result = transitive_neighbors(graph)
+
+        # Then
+        self.assertEqual(result, expected)
+
+    def test_transitive_neighbors_deep_chain(self):
+        # Given
+        n = sys.getrecursionlimit() * 2
+        graph = {i: [i + 1] for i in range(n)}
+        graph[n] = []
+
+        # When
+        result = transitive_neighbors(graph)
+
+        # Then
+        self.assertEqual(result[0], set(range(1, n + 1)))
+        self.assertEqual(result[n - 1], {n})
+        self.assertEqual(result[n], set())
+
+    def test_strongly_connected_components(self):
+        # Given
+        graph = {
+            0: [1],
+            1: [2, 3],
+            2: [0],
+            3: [4],
+            4: [3],
+            5: [5],
+            6: [],
+        }
+
+        # When
+        result = strongly_connected_components(graph)
+
+        # Then
+        self.assertEqual(
+            sorted(sorted(c) for c in result),
+            [[0, 1, 2], [3, 4], [5], [6]])
+        position = {node: i for i, c in enumerate(result) for node in c}
+        self.assertLess(position[3], position[0])
+
+    def test_connected_components(self):
+        # Given
+        groups = [[1, 2], [3], [], [2, 4], [5, 6], [4, 5], [3, 7], [8]]
+
+        # When
+        result = connected_components(groups)
+
+        # Then
+        self.assertEqual(result, [[0, 3, 4, 5], [1, 6], [2], [7]])
+
+    def test_connected_components_long_chain(self):
+        # Given
+        n = 10000
+        groups = [[i, i + 1] for i in range(n)]
+
+        # When
+        result = connected_components(groups)
+
+        # Then
+        self.assertEqual(result, [list(range(n))])
+
+    def test_reachable_nodes(self):
+        # Given
+        graph = {
+            0: [1],
+            1: [2],
+            2: [1],
+            3: [0],
+            4: [4],
+        }
+
+        # When/Then
+        self.assertEqual(reachable_nodes([0], graph.get), {1, 2})
+        self.assertEqual(reachable_nodes([3], graph.get), {0, 1, 2})
+        self.assertEqual(reachable_nodes([4], graph.get), {4})
+        self.assertEqual(reachable_nodes([], graph.get), set())
+
     def test_toposort(self):
         # Given
         graph = {
@@ -97,11 +194,36 @@ class TestGraph(unittest.TestCase):
             4: {0},
             5: {1, 2},
             6: {3, 5},
+            7: {4, 6},
         }
 
+        expected = (
+            {0, 1},
+            {4},
+            {2, 3, 5, 6},
+            {7},
+        )
+
+        # When
+        cycles = []
+        result = tuple(toposort(graph, cycles=cycles))
+
+        # Then
+        self.assertEqual(expected, result)
+        self.assertEqual([{2, 3, 5, 6}], [set(c) for c in cycles])
+
+    def test_toposort_deep_chain(self):
+        # Given
+        n = 5000
+        graph = {i: {i + 1} for i in range(n)}
+
+        # When
+        result = tuple(toposort(graph))
+
         # Then
-        with self.assertRaises(ValueError):
-            tuple(toposort(graph))
+        self.assertEqual(n + 1, len(result))
+        self.assertEqual({n}, result[0])
+        self.assertEqual({0}, result[-1])
 
 
 class TestDependencyGraph(unittest.TestCase):
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import cProfile
+import pstats
+import sys
+import unittest
+
+import six
+
+from ..profiling import (
+    StackSampler, frame_label, subsystem, summarize_pstats
+)
+
+
+class TestSubsystem(unittest.TestCase):
+
+    def test_subsystem(self):
+        # Given
+        paths = {
+            "/src/simplesat/pool.py": "pool",
+            "/src/simplesat/rules_generator.py": "rules",
+            "/src/simplesat/sat/minisat.py": "sat",
+            "/src/simplesat/sat/policy/policy_logger.py": "policy",
+            "/src/simplesat/transaction.py": "transaction",
+            "/src/simplesat/constraints/kinds.py": "constraints",
+            "/src/simplesat/dependency_solver.py": "solver",
+            "/usr/lib/python3/json/__init__.py": "other",
+            "<string>": "other",
+        }
+
+        # When/Then
+        for path, expected in paths.items():
+            self.assertEqual(expected, subsystem(path), path)
+
+    def test_frame_label(self):
+        # When
+        label = frame_label("/src/simplesat/sat/minisat.py", "propagate")
+
+        # Then
+        self.assertEqual("simplesat/sat/minisat.py:propagate", label)
+
+
+class TestSummaries(unittest.TestCase):
+
+    def test_summarize_pstats(self):
+        # Given
+        profiler = cProfile.Profile()
+        profiler.enable()
+        sorted(range(100), key=str)
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+
+        # When
+        summary = summarize_pstats(stats, top=2)
+
+        # Then
+        lines = summary.splitlines()
+        self.assertEqual("subsystem", lines[0].split()[0])
+        self.assertIn("other", summary)
+        self.assertEqual(2, len(lines) - lines.index("") - 2)
+
+    def test_stack_sampler(self):
+        # Given
+        sampler = StackSampler()
+
+        # When
+        sampler._sample(None, sys._getframe())
+        sampler._sample(None, sys._getframe())
+        output = six.StringIO()
+        sampler.write_collapsed(output)
+
+        # Then
+        line, = output.getvalue().splitlines()
+        stack, count = line.rsplit(" ", 1)
+        self.assertEqual("2", count)
+        self.assertTrue(stack.endswith(
+            "/test_profiling.py:test_stack_sampler"))
+        self.assertIn("test_stack_sampler", sampler.summary(top=1))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+import six
+
+from ..tracing import (
+    RecordingTracer, Tracer, chrome_trace_events, write_chrome_trace
+)
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_disabled(self):
+        # Given
+        tracer = Tracer()
+
+        # When
+        with tracer.span("solve", jobs=1) as span:
+            span.set_attribute("operations", 2)
+
+        # Then
+        self.assertIsNone(tracer.current_span)
+
+    def test_nested_spans(self):
+        # Given
+        tracer = RecordingTracer()
+
+        # When
+        with tracer.span("solve", jobs=1) as outer:
+            with tracer.span("search") as inner:
+                self.assertIs(inner, tracer.current_span)
+                inner.set_attribute("conflicts", 3)
+            outer.set_attribute("operations", 2)
+
+        # Then
+        self.assertEqual(["search", "solve"], [s.name for s in tracer.spans])
+        self.assertIs(outer, inner.parent)
+        self.assertEqual(1, inner.depth)
+        self.assertEqual({"conflicts": 3}, inner.attributes)
+        self.assertEqual({"jobs": 1, "operations": 2}, outer.attributes)
+        self.assertLessEqual(outer.start, inner.start)
+        self.assertGreaterEqual(outer.end, inner.end)
+        self.assertIsNone(tracer.current_span)
+
+    def test_span_error(self):
+        # Given
+        tracer = RecordingTracer()
+
+        # When
+        with self.assertRaises(ValueError):
+            with tracer.span("solve"):
+                raise ValueError()
+
+        # Then
+        span, = tracer.spans
+        self.assertEqual({"error": "ValueError"}, span.attributes)
+        self.assertIsNotNone(span.duration)
+
+
+class TestChromeTrace(unittest.TestCase):
+
+    def test_events(self):
+        # Given
+        tracer = RecordingTracer()
+        with tracer.span("solve", request=object()):
+            with tracer.span("search", conflicts=3):
+                pass
+
+        # When
+        events = chrome_trace_events(tracer.spans, pid=1)
+
+        # Then
+        self.assertEqual(["solve", "search"], [e["name"] for e in events])
+        for event, span in zip(events, reversed(tracer.spans)):
+            self.assertEqual("X", event["ph"])
+            self.assertEqual(1, event["pid"])
+            self.assertAlmostEqual(span.start * 1e6, event["ts"])
+            self.assertAlmostEqual(span.duration * 1e6, event["dur"])
+        self.assertEqual({"conflicts": 3}, events[1]["args"])
+        self.assertIsInstance(events[0]["args"]["request"], str)
+
+    def test_write(self):
+        # Given
+        tracer = RecordingTracer()
+        with tracer.span("solve"):
+            pass
+        fp = six.StringIO()
+
+        # When
+        write_chrome_trace(tracer.spans, fp)
+
+        # Then
+        data = json.loads(fp.getvalue())
+        self.assertEqual(["solve"], [e["name"] for e in data["traceEvents"]])
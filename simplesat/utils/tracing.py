@@ -0,0 +1,229 @@
+"""
+Tracing spans for the phases of a solve.
+
+A :class:`Tracer` opens nested spans around the phases of
+:meth:`DependencySolver.solve`, each with a name and attributes such as rule
+counts or pool size. The base :class:`Tracer` records nothing and costs close
+to nothing; :class:`RecordingTracer` keeps the finished spans, which can be
+written in the Chrome trace event format with :func:`write_chrome_trace` and
+opened in ``chrome://tracing`` or Perfetto.
+
+Other backends can subclass :class:`Tracer` and override
+:meth:`Tracer.span_finished`.
+"""
+from __future__ import absolute_import
+
+import json
+import os
+import threading
+from timeit import default_timer
+
+
+class Span(object):
+    """ A named, timed phase, with attributes describing it.
+
+    Parameters
+    ----------
+    name : str
+        The name of the phase.
+    attributes : dict
+        Attributes describing the phase.
+    parent : Span or None
+        The enclosing span, if any.
+    """
+
+    __slots__ = ("name", "attributes", "parent", "start", "end", "thread_id")
+
+    def __init__(self, name, attributes, parent=None):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start = None
+        self.end = None
+        self.thread_id = threading.current_thread().ident
+
+    def __repr__(self):
+        return "Span({!r}, {!r})".format(self.name, self.attributes)
+
+    @property
+    def depth(self):
+        """ The number of spans enclosing this one. """
+        depth = 0
+        parent = self.parent
+        while parent is not None:
+            depth += 1
+            parent = parent.parent
+        return depth
+
+    @property
+    def duration(self):
+        """ The duration of the span in seconds, or None if it is open. """
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class _SpanContext(object):
+    __slots__ = ("_tracer", "_span")
+
+    def __init__(self, tracer, span):
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self):
+        self._tracer._push(self._span)
+        return self._span
+
+    def __exit__(self, type, value, traceback):
+        span = self._span
+        if type is not None:
+            span.attributes["error"] = type.__name__
+        self._tracer._pop(span)
+
+
+class _NullSpan(object):
+    """ The span of a tracer which records nothing. """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    """ Open spans around the phases of a solve.
+
+    This base class records nothing. Subclasses set :attr:`enabled` and
+    override :meth:`span_finished` to collect the spans.
+
+
+    >>> tracer = RecordingTracer()
+    >>> with tracer.span("solve", jobs=3) as span:
+    ...     span.set_attribute("operations", 5)
+    """
+
+    #: Whether spans are recorded. Callers may skip computing expensive
+    #: attributes when it is False.
+    enabled = False
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def span(self, name, **attributes):
+        """ Return a context manager for a span nested in the current one.
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase.
+        **attributes
+            Attributes describing the phase. More may be set on the span
+            returned by the context manager.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _SpanContext(
+            self, Span(name, attributes, parent=self.current_span))
+
+    @property
+    def current_span(self):
+        """ The innermost open span of the current thread, or None. """
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    def span_finished(self, span):
+        """ Called with each span as it closes. """
+
+    def _push(self, span):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        span.start = default_timer()
+
+    def _pop(self, span):
+        span.end = default_timer()
+        self._local.stack.pop()
+        self.span_finished(span)
+
+
+class RecordingTracer(Tracer):
+    """ A tracer which keeps every finished span in :attr:`spans`. """
+
+    enabled = True
+
+    def __init__(self):
+        super(RecordingTracer, self).__init__()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def span_finished(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        """ Forget the spans recorded so far. """
+        with self._lock:
+            del self.spans[:]
+
+
+def _jsonable(value):
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    return str(value)
+
+
+def chrome_trace_events(spans, pid=None):
+    """ Return the spans as a list of Chrome trace "complete" events.
+
+    Parameters
+    ----------
+    spans : iterable of Span
+        Finished spans.
+    pid : int, optional
+        The process id to report. Defaults to the current process.
+    """
+    if pid is None:
+        pid = os.getpid()
+    events = []
+    for span in spans:
+        events.append({
+            "name": span.name,
+            "cat": "simplesat",
+            "ph": "X",
+            "ts": span.start * 1e6,
+            "dur": span.duration * 1e6,
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": dict(
+                (key, _jsonable(value))
+                for key, value in span.attributes.items()),
+        })
+    events.sort(key=lambda event: (event["tid"], event["ts"]))
+    return events
+
+
+def write_chrome_trace(spans, fp):
+    """ Write the spans as a Chrome trace event JSON document.
+
+    Parameters
+    ----------
+    spans : iterable of Span
+        Finished spans, such as :attr:`RecordingTracer.spans`.
+    fp : file-like object
+        A text file to write to.
+    """
+    json.dump({"traceEvents": chrome_trace_events(spans),
+               "displayTimeUnit": "ms"}, fp)